@@ -0,0 +1,62 @@
+import argparse
+import json
+import os
+import sys
+import time
+import zipfile
+
+from src.face_detection import FACE_DETECTORS, DetectionConfig
+from src.inference_backends import BACKENDS, get_model_paths
+from src.video_analysis import analyze_image_zip, analyze_video
+
+
+def find_model(backend_name):
+    for path in get_model_paths(backend_name):
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def main():
+    """Analyze a video file or a zip of images offline and write NDJSON"""
+    parser = argparse.ArgumentParser(description="Offline face emotion analysis of a video or image archive")
+    parser.add_argument("input", help="Video file or zip archive of images")
+    parser.add_argument("--output", help="NDJSON output file (default: stdout)")
+    parser.add_argument("--sample-fps", type=float, default=1.0, help="Frames analyzed per second of video")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes")
+    parser.add_argument("--segment-seconds", type=int, default=30, help="Video seconds per worker task")
+    parser.add_argument("--detector", default="haar", choices=FACE_DETECTORS)
+    parser.add_argument("--backend", default="keras", choices=sorted(BACKENDS))
+    parser.add_argument("--model", help="Model file (default: the backend's usual location)")
+    args = parser.parse_args()
+
+    model_path = args.model or find_model(args.backend)
+    if model_path is None:
+        print(f"No model found for the '{args.backend}' backend", file=sys.stderr)
+        sys.exit(1)
+    analyzer_args = (args.detector, DetectionConfig.from_env(os.environ).to_dict(), args.backend, model_path)
+
+    def progress(fraction):
+        print(f"\r{fraction * 100:5.1f}%", end="", file=sys.stderr, flush=True)
+
+    if zipfile.is_zipfile(args.input):
+        records = analyze_image_zip(args.input, analyzer_args, args.workers, progress=progress)
+    else:
+        records = analyze_video(args.input, analyzer_args, args.sample_fps, args.workers,
+                                args.segment_seconds, progress=progress)
+
+    start = time.perf_counter()
+    output = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    count = 0
+    try:
+        for record in records:
+            output.write(json.dumps(record) + "\n")
+            count += 1
+    finally:
+        if args.output:
+            output.close()
+    print(f"\nWrote {count} records in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
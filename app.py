@@ -1,21 +1,42 @@
-from flask import Flask, render_template, Response, request, jsonify, session
+from flask import Flask, render_template, Response, request, jsonify, send_file, stream_with_context, g
 import cv2
 import numpy as np
-import tensorflow as tf
 import os
-import base64
 import json
+import threading
+import time
+import uuid
+import zipfile
 from flask_cors import CORS
-from flask_jwt_extended import JWTManager, create_access_token, jwt_required, get_jwt_identity
+from flask_jwt_extended import JWTManager, create_access_token, jwt_required, get_jwt_identity, verify_jwt_in_request
 import bcrypt
 from src.database import db
 from bson.objectid import ObjectId
 import pandas as pd
 from werkzeug.utils import secure_filename
+from src.face_analysis import DISPLAY_EMOTIONS, predict_emotions
+from src.inference_backends import create_backend, get_model_paths
+from src.video_pipeline import VideoPipeline
+from src.frame_analysis import FrameAnalyzer
+from src.face_tracking import FaceTracker
+from src.emotion_history import EmotionHistoryStore
+from src.face_detection import DetectionConfig, create_face_detector
+from src.jobs import JobManager
+from src.result_cache import CachedTextAnalyzer, MongoResultStore, ResultCache
+from src.online_learning import FeedbackLearner
+from src.analysis_context import StageStats, add_stage_hook
+from src.document_stream import analyze_document, iter_text_chunks
+from src.serving import limit_loaded_threads
+from src.inference_scheduler import MicroBatcher, QueueFull, ScheduledTextAnalyzer, analyzer_batches
+from src.metrics import ENABLED as METRICS_ENABLED, REGISTRY, add_collector, histogram
+from src.structured_log import RateLimitedLogger
+from src.profiling import RequestProfile, SamplingProfiler, new_profile_id
+from src.video_analysis import MediaAnalyzer, analyze_video, analyze_image_zip, video_info
 
 # Conditional imports for text analysis
 try:
-    from src.text_analysis import get_text_analyzer, get_emotion_analyzer, TextAnalyzer
+    from src.text_analysis import (get_text_analyzer, get_emotion_analyzer, TextAnalyzer, train_analyzer_in_process,
+                                   EMOTION_FEEDBACK_PATH)
     TEXT_ANALYSIS_IMPORT_SUCCESS = True
 except ImportError as e:
     print(f"Failed to import text analysis module: {e}")
@@ -31,36 +52,139 @@ else:
 app = Flask(__name__)
 app.config['JWT_SECRET_KEY'] = os.environ.get('JWT_SECRET_KEY', 'sentimentai-secret-key')
 app.config['JWT_ACCESS_TOKEN_EXPIRES'] = 86400  # 24 hours
+# Face model runtime: 'keras', 'keras_function' or 'tflite' (see convert_model.py)
+app.config['INFERENCE_BACKEND'] = os.environ.get('INFERENCE_BACKEND', 'keras')
+# Face model interpreter threads (TFLite; 0 = runtime default), and whether
+# create_app() loads the face model (gunicorn.conf.py defers it to the workers
+# for the TensorFlow backends, whose runtime does not survive a fork)
+app.config['INFERENCE_THREADS'] = int(os.environ.get('INFERENCE_THREADS', 0))
+app.config['FACE_MODEL_PRELOAD'] = os.environ.get('FACE_MODEL_PRELOAD', '1') == '1'
+# Face tracking: full detection every FACE_DETECT_INTERVAL frames, emotion
+# inference per face every FACE_INFERENCE_INTERVAL frames (set FACE_TRACKING=0
+# to run both on every frame)
+app.config['FACE_TRACKING'] = os.environ.get('FACE_TRACKING', '1') == '1'
+app.config['FACE_DETECT_INTERVAL'] = int(os.environ.get('FACE_DETECT_INTERVAL', 10))
+app.config['FACE_INFERENCE_INTERVAL'] = int(os.environ.get('FACE_INFERENCE_INTERVAL', 5))
+for name in ('FACE_DETECT_INTERVAL', 'FACE_INFERENCE_INTERVAL'):
+    if app.config[name] < 1:
+        raise ValueError(f"{name} must be at least 1")
+# Face detector: 'haar', 'lbp', 'ssd' or 'yunet' (DNN models are read from models/)
+app.config['FACE_DETECTOR'] = os.environ.get('FACE_DETECTOR', 'haar')
+# Per-face emotion history: ring buffer length and EMA smoothing factor
+app.config['EMOTION_HISTORY_SIZE'] = int(os.environ.get('EMOTION_HISTORY_SIZE', 30))
+app.config['EMOTION_SMOOTHING_ALPHA'] = float(os.environ.get('EMOTION_SMOOTHING_ALPHA', 0.3))
+# Offline video/image analysis: uploads and NDJSON results are kept in
+# ANALYSIS_DIR; long files are split across ANALYSIS_WORKERS processes
+app.config['ANALYSIS_DIR'] = os.environ.get('ANALYSIS_DIR', os.path.join("data", "analysis"))
+app.config['ANALYSIS_WORKERS'] = int(os.environ.get('ANALYSIS_WORKERS', os.cpu_count() or 1))
+app.config['ANALYSIS_SAMPLE_FPS'] = float(os.environ.get('ANALYSIS_SAMPLE_FPS', 1.0))
+app.config['ANALYSIS_SEGMENT_SECONDS'] = int(os.environ.get('ANALYSIS_SEGMENT_SECONDS', 30))
+# Largest number of texts accepted by the /batch text analysis endpoints
+app.config['TEXT_BATCH_MAX_ITEMS'] = int(os.environ.get('TEXT_BATCH_MAX_ITEMS', 5000))
+# Inference scheduler: concurrent requests to a model are scored together in
+# batches of up to INFERENCE_MAX_BATCH items, waiting at most
+# INFERENCE_MAX_WAIT_MS for a batch to fill (0: take what queued up during the
+# previous call); with INFERENCE_MAX_QUEUE items waiting, requests get 429
+app.config['INFERENCE_MAX_BATCH'] = int(os.environ.get('INFERENCE_MAX_BATCH', 64))
+app.config['INFERENCE_MAX_WAIT_MS'] = float(os.environ.get('INFERENCE_MAX_WAIT_MS', 0))
+app.config['INFERENCE_MAX_QUEUE'] = int(os.environ.get('INFERENCE_MAX_QUEUE', 1024))
+# Streaming document analysis: sentences per model call, sentences in the
+# rolling aggregate, and the longest sentence before it is cut
+app.config['TEXT_STREAM_BATCH_SIZE'] = int(os.environ.get('TEXT_STREAM_BATCH_SIZE', 256))
+app.config['TEXT_STREAM_WINDOW'] = int(os.environ.get('TEXT_STREAM_WINDOW', 20))
+app.config['TEXT_STREAM_MAX_SENTENCE_CHARS'] = int(os.environ.get('TEXT_STREAM_MAX_SENTENCE_CHARS', 1000))
+# Text analysis result cache: LRU entries per process (0 disables it), their
+# lifetime in seconds, and 'memory' or 'mongo' (also share results between
+# worker processes through MongoDB)
+app.config['TEXT_CACHE_SIZE'] = int(os.environ.get('TEXT_CACHE_SIZE', 10000))
+app.config['TEXT_CACHE_TTL'] = int(os.environ.get('TEXT_CACHE_TTL', 3600))
+app.config['TEXT_CACHE_BACKEND'] = os.environ.get('TEXT_CACHE_BACKEND', 'memory')
+# Incremental emotion model (TEXT_INCREMENTAL=1): feedback rows are learned
+# immediately, and a full retrain (compaction) runs in the background after
+# TEXT_COMPACT_AFTER_ROWS new rows or TEXT_COMPACT_INTERVAL seconds
+app.config['TEXT_COMPACT_AFTER_ROWS'] = int(os.environ.get('TEXT_COMPACT_AFTER_ROWS', 5000))
+app.config['TEXT_COMPACT_INTERVAL'] = int(os.environ.get('TEXT_COMPACT_INTERVAL', 3600))
+# Prometheus metrics at /metrics (METRICS_ENABLED=0 turns off the instrumentation)
+app.config['METRICS_ENABLED'] = METRICS_ENABLED
+# Profiling (PROFILING_ENABLED=1): a request sent with an X-Profile header is
+# run under cProfile, and /profiling/sample samples thread stacks for up to
+# PROFILING_MAX_SECONDS. Both need an access token of one of PROFILING_USERS
+# (comma separated user ids; empty allows every user). Profiles go to PROFILE_DIR
+app.config['PROFILING_ENABLED'] = os.environ.get('PROFILING_ENABLED', '0') == '1'
+app.config['PROFILING_USERS'] = [user for user in os.environ.get('PROFILING_USERS', '').split(',') if user]
+app.config['PROFILING_MAX_SECONDS'] = float(os.environ.get('PROFILING_MAX_SECONDS', 120))
+app.config['PROFILE_DIR'] = os.environ.get('PROFILE_DIR', os.path.join("data", "profiles"))
 jwt = JWTManager(app)
 # Updated CORS configuration to include port 3006 (Vite dev server) and other common ports
 CORS(app, origins=["http://localhost:3000", "http://127.0.0.1:3000", "http://localhost:3002", "http://127.0.0.1:3002", "http://localhost:3003", "http://127.0.0.1:3003", "http://localhost:3004", "http://127.0.0.1:3004", "http://localhost:3005", "http://127.0.0.1:3005", "http://localhost:3006", "http://127.0.0.1:3006", "http://localhost:3007", "http://127.0.0.1:3007", "http://localhost:3009", "http://127.0.0.1:3009", "http://localhost:5000", "http://127.0.0.1:5000"])
 
-# Emotion labels (should match the order used during training)
-# Updated to match the training script labels
-EMOTIONS = ['angry', 'disgust', 'fear', 'happy', 'neutral', 'sad', 'surprise']
-
-# For display purposes, we'll capitalize the first letter
-DISPLAY_EMOTIONS = ['Angry', 'Disgust', 'Fear', 'Happy', 'Neutral', 'Sad', 'Surprise']
-
 # Global variables
 camera = None
 model = None
 text_analyzer = None
 emotion_analyzer = None
-latest_emotion_data = None
+video_pipeline = None
+frame_analyzer = None
+# Face detector and detection settings are loaded once and shared; the settings
+# can be changed at runtime through /detection_config
+detection_config = DetectionConfig.from_env(os.environ)
+try:
+    face_detector = create_face_detector(app.config['FACE_DETECTOR'], detection_config)
+except Exception as e:
+    print(f"Error loading '{app.config['FACE_DETECTOR']}' face detector: {e}")
+    print("Falling back to the Haar cascade face detector")
+    face_detector = create_face_detector('haar', detection_config)
+print(f"Using '{face_detector.name}' face detector")
+emotion_history = EmotionHistoryStore(size=app.config['EMOTION_HISTORY_SIZE'],
+                                      num_classes=len(DISPLAY_EMOTIONS),
+                                      alpha=app.config['EMOTION_SMOOTHING_ALPHA'])
+# Background jobs (offline analysis), polled through /analysis_jobs/<job_id>
+job_manager = JobManager(max_workers=2)
+# Emotion model retraining runs one job at a time
+retrain_lock = threading.Lock()
+retrain_job = None
+feedback_learner = None
+if TEXT_ANALYSIS_IMPORT_SUCCESS:
+    feedback_learner = FeedbackLearner(EMOTION_FEEDBACK_PATH,
+                                       compact_after_rows=app.config['TEXT_COMPACT_AFTER_ROWS'],
+                                       compact_interval=app.config['TEXT_COMPACT_INTERVAL'])
+# Results of the text analyzers, keyed by model version and normalized text
+text_result_cache = None
+if app.config['TEXT_CACHE_SIZE'] > 0:
+    shared_store = None
+    if app.config['TEXT_CACHE_BACKEND'] == 'mongo':
+        shared_store = MongoResultStore(db.db['text_results'], app.config['TEXT_CACHE_TTL'])
+    text_result_cache = ResultCache(max_size=app.config['TEXT_CACHE_SIZE'], ttl=app.config['TEXT_CACHE_TTL'],
+                                    shared=shared_store)
+# Time spent per stage (tokenize, negation, clean, lexicon, featurize, predict) of text analysis calls
+text_stage_stats = StageStats()
+add_stage_hook(text_stage_stats.record)
+# Micro-batching queues in front of the sentiment, emotion and face models
+batcher_settings = dict(max_batch_size=app.config['INFERENCE_MAX_BATCH'],
+                        max_wait=app.config['INFERENCE_MAX_WAIT_MS'] / 1000,
+                        max_queue=app.config['INFERENCE_MAX_QUEUE'])
+sentiment_batcher = MicroBatcher('sentiment', analyzer_batches('analyze_sentiment_batch'), **batcher_settings)
+emotion_batcher = MicroBatcher('emotion', analyzer_batches('analyze_emotion_batch'), **batcher_settings)
+face_batcher = MicroBatcher('face', lambda faces: predict_emotions(model, faces), **batcher_settings)
+# Rate-limited JSON log lines for the per-frame and per-request paths
+logger = RateLimitedLogger('app')
+request_seconds = histogram('http_request_duration_seconds', 'Time to handle a request, up to the response headers',
+                            ['method', 'route', 'status'])
+text_stage_seconds = histogram('text_stage_duration_seconds', 'Time per text analysis call spent in each stage',
+                               ['stage'])
+if app.config['METRICS_ENABLED']:
+    add_stage_hook(lambda stage, seconds: text_stage_seconds.observe(seconds, stage))
 
 def load_model():
     """Load the trained emotion detection model"""
     global model
     try:
-        print("Attempting to load model...")
+        backend_name = app.config['INFERENCE_BACKEND']
+        print(f"Attempting to load model with '{backend_name}' backend...")
+        start = time.perf_counter()
         
-        # List all possible model paths
-        model_paths = [
-            os.path.join("models", "emotion_model.h5"),
-            os.path.join("model.h5"),
-            os.path.join("models", "emotion_model.keras")
-        ]
+        # List all possible model paths for the configured backend
+        model_paths = get_model_paths(backend_name)
         
         # Check which paths exist
         existing_paths = [path for path in model_paths if os.path.exists(path)]
@@ -70,8 +194,8 @@ def load_model():
         for model_path in existing_paths:
             try:
                 print(f"Attempting to load model from: {model_path}")
-                model = tf.keras.models.load_model(model_path)
-                print(f"Model loaded successfully from: {model_path}")
+                model = create_backend(backend_name, model_path, app.config['INFERENCE_THREADS'] or None)
+                print(f"Model loaded successfully from: {model_path} in {time.perf_counter() - start:.1f} s")
                 print(f"Model input shape: {model.input_shape}")
                 print(f"Model output shape: {model.output_shape}")
                 return
@@ -81,6 +205,8 @@ def load_model():
                 traceback.print_exc()
         
         print("Model not found or could not be loaded. Please train the model first.")
+        if backend_name == 'tflite':
+            print("Run 'python convert_model.py' to export the TFLite model.")
         model = None
     except Exception as e:
         print(f"Error in load_model function: {e}")
@@ -88,12 +214,54 @@ def load_model():
         traceback.print_exc()
         model = None
 
+def create_app():
+    """Load the models and return the app
+
+    Entry point of wsgi.py and the development server. Under gunicorn with
+    preload_app, this runs once in the master process and the workers share
+    the loaded models copy-on-write.
+    """
+    if model is None and app.config['FACE_MODEL_PRELOAD']:
+        load_model()
+    if text_analyzer is None:
+        load_text_analyzer()
+    if emotion_analyzer is None:
+        load_emotion_analyzer()
+    return app
+
+def init_worker(threads=None):
+    """Set up a server worker forked from the process that ran create_app()
+
+    MongoDB clients must not be shared across a fork, so the worker opens
+    its own; the face model is loaded here when it was not preloaded.
+    """
+    db.connect()
+    if text_result_cache is not None and text_result_cache.shared is not None:
+        text_result_cache.shared = MongoResultStore(db.db['text_results'], app.config['TEXT_CACHE_TTL'])
+    if threads:
+        limit_loaded_threads(threads)
+    if model is None:
+        load_model()
+
+def serve_analyzer(analyzer):
+    """Put the inference scheduler and, if it is enabled, the text result cache in front of an analyzer"""
+    analyzer = ScheduledTextAnalyzer(analyzer, sentiment_batcher, emotion_batcher)
+    if text_result_cache is None:
+        return analyzer
+    return CachedTextAnalyzer(analyzer, text_result_cache)
+
+def unwrapped(analyzer):
+    """The analyzer behind the text result cache and the inference scheduler"""
+    while isinstance(analyzer, (CachedTextAnalyzer, ScheduledTextAnalyzer)):
+        analyzer = analyzer.analyzer
+    return analyzer
+
 def load_text_analyzer():
     """Load the text analyzer"""
     global text_analyzer
     if TEXT_ANALYSIS_AVAILABLE and TEXT_ANALYSIS_IMPORT_SUCCESS:
         try:
-            text_analyzer = get_text_analyzer()
+            text_analyzer = serve_analyzer(get_text_analyzer())
             print("Text analyzer loaded successfully")
         except Exception as e:
             print(f"Error loading text analyzer: {e}")
@@ -108,7 +276,7 @@ def load_emotion_analyzer():
     global emotion_analyzer
     if TEXT_ANALYSIS_AVAILABLE and TEXT_ANALYSIS_IMPORT_SUCCESS:
         try:
-            emotion_analyzer = get_emotion_analyzer()
+            emotion_analyzer = serve_analyzer(get_emotion_analyzer())
             print("Emotion analyzer loaded successfully")
         except Exception as e:
             print(f"Error loading emotion analyzer: {e}")
@@ -118,112 +286,381 @@ def load_emotion_analyzer():
         if not TEXT_ANALYSIS_IMPORT_SUCCESS:
             print("Emotion analysis module not available due to import failure")
 
-def preprocess_face(face):
-    """Preprocess the face image for emotion detection"""
-    try:
-        # Convert to grayscale
-        gray = cv2.cvtColor(face, cv2.COLOR_BGR2GRAY)
-        # Resize to 48x48
-        resized = cv2.resize(gray, (48, 48))
-        # Normalize pixel values
-        normalized = resized / 255.0
-        # Reshape for model input
-        reshaped = normalized.reshape(1, 48, 48, 1)
-        return reshaped
-    except Exception as e:
-        print(f"Error preprocessing face: {e}")
-        # Return a default array if preprocessing fails
-        return np.zeros((1, 48, 48, 1))
+def emotion_dataset_paths():
+    """Datasets the emotion model is retrained on"""
+    return [
+        r"C:\Users\knile\Downloads\emotion_sentences\emotion_sentences.csv",
+        r"c:\Users\knile\OneDrive\Desktop\EmotionSense\data\emotion_sentences.csv",
+        os.path.join("data", "voice_emotion_dataset.csv")  # The uploaded voice dataset
+    ]
+
+def install_emotion_analyzer(analyzer):
+    """Make analyzer serve emotion requests"""
+    global emotion_analyzer
+    # A single reference assignment: requests use either the old or the new
+    # analyzer, never a half-trained one
+    emotion_analyzer = serve_analyzer(analyzer)
+    if isinstance(emotion_analyzer, CachedTextAnalyzer):
+        emotion_analyzer.invalidate()
+
+def retrain_emotion_analyzer(job, dataset_paths):
+    """Train a new emotion analyzer in a worker process and swap it in once validated"""
+    with retrain_lock:
+        incremental = getattr(emotion_analyzer, 'incremental', False)
+        marker = None
+        snapshot_path = None
+        if incremental:
+            # Train on the feedback received so far; newer rows are replayed on install
+            snapshot_path = f"{os.path.splitext(EMOTION_FEEDBACK_PATH)[0]}.{job.id}.csv"
+            marker = feedback_learner.snapshot(snapshot_path)
+            if marker is not None:
+                dataset_paths = dataset_paths + [snapshot_path]
+        
+        job.set_progress(0.1, "Training emotion model in a worker process")
+        print("Re-training emotion analysis model with updated datasets...")
+        try:
+            analyzer, info = train_analyzer_in_process('emotion', dataset_paths, incremental=incremental)
+        finally:
+            if snapshot_path and os.path.exists(snapshot_path):
+                os.remove(snapshot_path)
+        
+        if incremental:
+            feedback_learner.install(analyzer, marker, install_emotion_analyzer)
+        else:
+            install_emotion_analyzer(analyzer)
+        print(f"Emotion analysis model re-trained successfully (version {info['model_version']})")
+    return info
 
-def detect_emotion(face):
-    """Detect emotion from face image"""
-    global model, latest_emotion_data
+def submit_emotion_retrain(**metadata):
+    """Queue a retraining job for the emotion model"""
+    global retrain_job
+    retrain_job = job_manager.submit("retrain_emotion", retrain_emotion_analyzer, emotion_dataset_paths(),
+                                     metadata=metadata)
+    return retrain_job
+
+def detect_emotions(faces):
+    """Detect emotions for all faces of a frame with a single model call
+
+    Returns one (emotion, confidence, probabilities) tuple per face.
+    """
+    global model
     if model is None:
-        return "No Model", 0.0
+        return [("No Model", 0.0, None) for _ in faces]
+    if len(faces) == 0:
+        return []
     
     try:
-        processed_face = preprocess_face(face)
-        predictions = model.predict(processed_face, verbose=0)  # verbose=0 to reduce output
-        emotion_idx = np.argmax(predictions)
-        confidence = float(predictions[0][emotion_idx])
-        # Use DISPLAY_EMOTIONS for showing to user
-        emotion = DISPLAY_EMOTIONS[emotion_idx]
-        
-        # Store the latest emotion data
-        latest_emotion_data = {
-            "emotions": DISPLAY_EMOTIONS,
-            "predictions": [float(p) for p in predictions[0]],
-            "dominant_emotion": emotion,
-            "confidence": confidence
-        }
-        
-        return emotion, confidence
+        # Scored together with the faces of concurrent callers
+        return face_batcher.run(list(faces))
     except Exception as e:
-        print(f"Error detecting emotion: {e}")
-        return "Error", 0.0
+        logger.error("emotion_detection_failed", faces=len(faces), error=str(e))
+        return [("Error", 0.0, None) for _ in faces]
+
+def encode_error_frame(message):
+    """Encode a black frame showing an error message"""
+    frame = np.zeros((480, 640, 3), dtype=np.uint8)
+    cv2.putText(frame, message, (50, 240), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2)
+    ret, buffer = cv2.imencode('.jpg', frame)
+    return buffer.tobytes() if ret else None
+
+def mjpeg_part(jpeg_bytes):
+    """Wrap JPEG bytes as one part of a multipart MJPEG stream"""
+    return (b'--frame\r\n'
+            b'Content-Type: image/jpeg\r\n\r\n' + jpeg_bytes + b'\r\n')
+
+def build_emotion_data(history_window=10):
+    """Build the /emotion_data payload from the per-face history buffers"""
+    faces = []
+    for summary in emotion_history.summaries(history_window=history_window):
+        smoothed = summary["smoothed"]
+        emotion_idx = int(np.argmax(smoothed))
+        faces.append({
+            "id": summary["id"],
+            "box": summary["box"],
+            "dominant_emotion": DISPLAY_EMOTIONS[emotion_idx],
+            "confidence": float(smoothed[emotion_idx]),
+            "predictions": smoothed.tolist(),
+            "latest_predictions": summary["latest"].tolist(),
+            "majority_emotion": DISPLAY_EMOTIONS[summary["majority_index"]],
+            "history": summary["history"].tolist(),
+            "history_timestamps": summary["history_timestamps"].tolist()
+        })
+    if not faces:
+        return None
+    
+    # Top-level fields describe the most recently updated face
+    primary = faces[0]
+    return {
+        "emotions": DISPLAY_EMOTIONS,
+        "predictions": primary["predictions"],
+        "dominant_emotion": primary["dominant_emotion"],
+        "confidence": primary["confidence"],
+        "faces": faces
+    }
+
+def analysis_worker_args():
+    """Arguments for src.video_analysis.build_analyzer matching the live setup
+
+    Each analysis pool worker process loads its own detector and model
+    instance from these.
+    """
+    return (face_detector.name, detection_config.to_dict(), model.name, model.model_path)
+
+def local_media_analyzer():
+    """A MediaAnalyzer for offline analysis in this process, on the loaded face model
+
+    Faces are scored through face_batcher like the camera's, so no second
+    model is loaded. The detector is a new instance, which leaves the
+    camera detector's search state alone.
+    """
+    return MediaAnalyzer(create_face_detector(face_detector.name, detection_config), detect_emotions)
+
+def save_analysis_upload(file):
+    """Save an uploaded file under ANALYSIS_DIR with a unique name"""
+    os.makedirs(app.config['ANALYSIS_DIR'], exist_ok=True)
+    extension = os.path.splitext(secure_filename(file.filename))[1].lower()
+    path = os.path.join(app.config['ANALYSIS_DIR'], f"upload_{uuid.uuid4().hex}{extension}")
+    file.save(path)
+    return path
+
+def analysis_result_path(job_id):
+    return os.path.join(app.config['ANALYSIS_DIR'], f"{job_id}.ndjson")
+
+def run_analysis_job(job, records, upload_path):
+    """Write the records of an offline analysis to the job's NDJSON file"""
+    output_path = analysis_result_path(job.id)
+    count = 0
+    try:
+        with open(output_path + ".part", "w", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record) + "\n")
+                count += 1
+        os.replace(output_path + ".part", output_path)
+    finally:
+        if os.path.exists(output_path + ".part"):
+            os.remove(output_path + ".part")
+        if os.path.exists(upload_path):
+            os.remove(upload_path)
+    return {"records": count, "result_url": f"/analysis_jobs/{job.id}/result"}
+
+def ndjson_stream(records, upload_path):
+    """Stream records as NDJSON, removing the upload (if any) afterwards"""
+    try:
+        for record in records:
+            yield json.dumps(record) + "\n"
+    finally:
+        if upload_path is not None and os.path.exists(upload_path):
+            os.remove(upload_path)
+
+def read_text_batch():
+    """Texts of a batch analysis request, or an error message"""
+    data = request.get_json(silent=True) or {}
+    texts = data.get('texts')
+    if not isinstance(texts, list) or not all(isinstance(text, str) for text in texts):
+        return None, "'texts' must be a list of strings"
+    if len(texts) > app.config['TEXT_BATCH_MAX_ITEMS']:
+        return None, f"At most {app.config['TEXT_BATCH_MAX_ITEMS']} texts per request"
+    return texts, None
+
+def analyze_text_batch(analyze_batch, texts, empty_result):
+    """Run a batch analyzer over the non-empty texts, keeping request order"""
+    indices = [i for i, text in enumerate(texts) if text]
+    results = [dict(empty_result) for _ in texts]
+    for i, result in zip(indices, analyze_batch([texts[i] for i in indices])):
+        results[i] = result
+    return {"results": results, "count": len(results)}
+
+def stream_document_analysis(analyze_batch, label_key):
+    """Stream per-sentence results of the uploaded ('file' field) or raw request body as NDJSON
+
+    The text is read and scored a chunk at a time, so documents of any
+    size are analyzed without holding them in memory. Uploads are saved
+    first, as request files are closed once the view returns.
+    """
+    upload_path = None
+    if request.mimetype == 'multipart/form-data':
+        file = request.files.get('file')
+        if file is None or file.filename == '':
+            return jsonify({"success": False, "message": "No text file provided"}), 400
+        upload_path = save_analysis_upload(file)
+        chunks = read_text_file(upload_path)
+    else:
+        chunks = iter_text_chunks(request.stream)
+    records = analyze_document(chunks, analyze_batch, label_key,
+                               batch_size=app.config['TEXT_STREAM_BATCH_SIZE'],
+                               window=app.config['TEXT_STREAM_WINDOW'],
+                               max_chars=app.config['TEXT_STREAM_MAX_SENTENCE_CHARS'])
+    return Response(stream_with_context(ndjson_stream(records, upload_path)), mimetype='application/x-ndjson')
+
+def read_text_file(path):
+    """Yield the text of a saved upload a chunk at a time"""
+    with open(path, 'rb') as f:
+        yield from iter_text_chunks(f)
+
+def start_video_pipeline():
+    """Start the capture/detection/encoding threads for the open camera"""
+    global video_pipeline, frame_analyzer
+    if video_pipeline is not None and video_pipeline.running:
+        return video_pipeline
+    tracker = None
+    if app.config['FACE_TRACKING']:
+        tracker = FaceTracker(detect_interval=app.config['FACE_DETECT_INTERVAL'],
+                              inference_interval=app.config['FACE_INFERENCE_INTERVAL'])
+    emotion_history.clear()
+    face_detector.reset()
+    analyzer = FrameAnalyzer(face_detector, detect_emotions, tracker, emotion_history)
+    frame_analyzer = analyzer
+    video_pipeline = VideoPipeline(camera, analyzer.analyze)
+    video_pipeline.start()
+    print("Video pipeline started")
+    return video_pipeline
+
+def stop_video_pipeline():
+    """Stop the video pipeline threads"""
+    global video_pipeline
+    if video_pipeline is not None:
+        video_pipeline.stop()
+        video_pipeline = None
+        print("Video pipeline stopped")
 
 def generate_frames():
-    """Generate video frames with emotion detection"""
-    global camera
-    if camera is None or not camera.isOpened():
-        print("Camera is not opened")
+    """Generate video frames with emotion detection from the shared pipeline"""
+    pipeline = video_pipeline
+    if pipeline is None or not pipeline.running:
+        logger.warning("camera_not_opened")
         # Return a single frame with error message
-        frame = np.zeros((480, 640, 3), dtype=np.uint8)
-        cv2.putText(frame, "Camera not available", (50, 240), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2)
-        ret, buffer = cv2.imencode('.jpg', frame)
-        frame = buffer.tobytes()
-        yield (b'--frame\r\n'
-               b'Content-Type: image/jpeg\r\n\r\n' + frame + b'\r\n')
+        yield mjpeg_part(encode_error_frame("Camera not available"))
         return
-
-    # Load Haar Cascade for face detection
-    face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
     
-    while True:
-        try:
-            success, frame = camera.read()
-            if not success or frame is None:
-                print("Failed to read frame from camera")
-                break
-            
-            # Convert to grayscale for face detection
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-            
-            # Detect faces
-            faces = face_cascade.detectMultiScale(gray, scaleFactor=1.1, minNeighbors=5, minSize=(30, 30))
-            
-            # Process each detected face
-            for (x, y, w, h) in faces:
-                # Extract face region
-                face = frame[y:y+h, x:x+w]
-                
-                # Detect emotion
-                emotion, confidence = detect_emotion(face)
-                
-                # Draw rectangle around face
-                cv2.rectangle(frame, (x, y), (x+w, y+h), (0, 255, 0), 2)
-                
-                # Display emotion and confidence
-                text = f"{emotion}: {confidence:.2f}"
-                cv2.putText(frame, text, (x, y-10), cv2.FONT_HERSHEY_SIMPLEX, 0.9, (0, 255, 0), 2)
-            
-            ret, buffer = cv2.imencode('.jpg', frame)
-            if not ret:
-                print("Failed to encode frame")
-                continue
-            frame = buffer.tobytes()
-            yield (b'--frame\r\n'
-                   b'Content-Type: image/jpeg\r\n\r\n' + frame + b'\r\n')
-        except Exception as e:
-            print(f"Error in generate_frames: {e}")
-            # Return a single frame with error message
-            frame = np.zeros((480, 640, 3), dtype=np.uint8)
-            cv2.putText(frame, f"Error: {str(e)}", (50, 240), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2)
-            ret, buffer = cv2.imencode('.jpg', frame)
-            frame = buffer.tobytes()
-            yield (b'--frame\r\n'
-                   b'Content-Type: image/jpeg\r\n\r\n' + frame + b'\r\n')
-            break
+    # Every viewer receives the same encoded bytes; slow viewers skip frames.
+    # WSGI servers require bytes, so pass on the shared object behind the view.
+    subscription = pipeline.subscribe()
+    try:
+        for frame_view in subscription:
+            yield frame_view.obj
+    finally:
+        subscription.close()
+
+def collect_app_metrics():
+    """Counters behind the /..._stats endpoints, read when /metrics is scraped"""
+    families = []
+    if text_result_cache is not None:
+        stats = text_result_cache.get_stats()
+        families += [
+            ('text_cache_lookups_total', 'counter', 'Text result cache lookups by result',
+             [({'result': 'hit'}, stats['hits']), ({'result': 'shared_hit'}, stats['shared_hits']),
+              ({'result': 'miss'}, stats['misses'])]),
+            ('text_cache_hit_ratio', 'gauge', 'Share of text result cache lookups that were hits',
+             [({}, stats['hit_rate'])]),
+            ('text_cache_entries', 'gauge', 'Entries in the text result cache', [({}, stats['size'])]),
+            ('text_cache_removals_total', 'counter', 'Text result cache entries removed by reason',
+             [({'reason': 'evicted'}, stats['evictions']), ({'reason': 'expired'}, stats['expirations'])])
+        ]
+    batchers = {batcher.name: batcher.get_stats() for batcher in (sentiment_batcher, emotion_batcher, face_batcher)}
+    families += [
+        ('inference_queue_depth', 'gauge', 'Items waiting in the inference scheduler queue',
+         [({'model': name}, stats['queue_depth']) for name, stats in batchers.items()]),
+        ('inference_rejected_total', 'counter', 'Items refused because the inference scheduler queue was full',
+         [({'model': name}, stats['rejected']) for name, stats in batchers.items()]),
+        ('inference_scheduled_batches_total', 'counter', 'Batches run by the inference scheduler',
+         [({'model': name}, stats['batches']) for name, stats in batchers.items()])
+    ]
+    pipeline = video_pipeline
+    if pipeline is not None:
+        stats = pipeline.get_stats()
+        families += [
+            ('video_pipeline_running', 'gauge', 'Whether the camera pipeline is running',
+             [({}, int(stats['running']))]),
+            ('video_frames_encoded_total', 'counter', 'Frames encoded by the camera pipeline',
+             [({}, stats['frames_encoded'])]),
+            ('video_frames_dropped_total', 'counter', 'Frames dropped by a camera pipeline stage that fell behind',
+             [({'stage': name}, stage['dropped']) for name, stage in stats['stages'].items()]),
+            ('video_viewers', 'gauge', 'Clients watching /video_feed', [({}, stats['viewers']['subscribers'])])
+        ]
+    return families
+
+add_collector(collect_app_metrics)
+
+if app.config['METRICS_ENABLED']:
+    @app.before_request
+    def start_request_timer():
+        g.request_start = time.perf_counter()
+
+    @app.after_request
+    def record_request_time(response):
+        start = g.pop('request_start', None)
+        if start is not None:
+            route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+            request_seconds.observe(time.perf_counter() - start, request.method, route, str(response.status_code))
+        return response
+
+# Thread name prefixes sampled by /profiling/sample: the camera pipeline and
+# its face model queue (the frames /video_feed serves), the text model
+# queues, or every thread
+PROFILE_THREAD_GROUPS = {
+    'video': ('video-', 'batcher-face'),
+    'text': ('batcher-sentiment', 'batcher-emotion'),
+    'all': None
+}
+# Files written per profile: request profiles have txt and prof, sampled ones folded
+PROFILE_FORMATS = {'txt': 'text/plain', 'folded': 'text/plain', 'prof': 'application/octet-stream'}
+
+def profiling_denied():
+    """None when the request may use profiling, otherwise the error response"""
+    if not app.config['PROFILING_ENABLED']:
+        return jsonify({"error": "Profiling is disabled"}), 404
+    try:
+        verify_jwt_in_request()
+    except Exception as e:
+        return jsonify({"error": f"Profiling requires a valid access token: {e}"}), 401
+    allowed = app.config['PROFILING_USERS']
+    if allowed and get_jwt_identity() not in allowed:
+        return jsonify({"error": "Profiling is not allowed for this user"}), 403
+    return None
+
+def profile_path(profile_id, extension):
+    return os.path.join(app.config['PROFILE_DIR'], f"{profile_id}.{extension}")
+
+def run_sampling_profile(job, profile_id, seconds, interval, thread_prefixes):
+    """Job task: sample thread stacks and write them as <profile_id>.folded"""
+    profiler = SamplingProfiler(interval, thread_prefixes)
+    profiler.run(seconds, progress=job.set_progress)
+    os.makedirs(app.config['PROFILE_DIR'], exist_ok=True)
+    profiler.write_folded(profile_path(profile_id, 'folded'))
+    return {"profile_id": profile_id, "samples": profiler.samples, "stacks": len(profiler.stacks)}
+
+if app.config['PROFILING_ENABLED']:
+    @app.before_request
+    def start_request_profile():
+        if 'X-Profile' not in request.headers:
+            return None
+        denied = profiling_denied()
+        if denied:
+            return denied
+        profile = RequestProfile(app.config['PROFILE_DIR'], f"{request.method} {request.path}")
+        if profile.start():
+            g.request_profile = profile
+        else:
+            g.request_profile_busy = True
+        return None
+
+    @app.after_request
+    def finish_request_profile(response):
+        profile = g.pop('request_profile', None)
+        if profile is not None:
+            profile.stop()
+            response.headers['X-Profile-Id'] = profile.id
+            response.headers['X-Profile-Ms'] = f"{profile.seconds * 1000:.1f}"
+        elif g.pop('request_profile_busy', False):
+            response.headers['X-Profile-Id'] = 'busy'
+        return response
+
+    @app.teardown_request
+    def abandon_request_profile(exception):
+        # after_request does not run when the response could not be built
+        profile = g.pop('request_profile', None)
+        if profile is not None:
+            profile.stop()
 
 @app.route('/health')
 def health():
@@ -239,23 +676,18 @@ def index():
 @app.route('/video_feed')
 def video_feed():
     """Video streaming route"""
-    global camera
-    print("Video feed endpoint accessed")
-    if camera is None or not camera.isOpened():
-        print("Camera not available for video feed")
+    logger.info("video_feed_requested")
+    if video_pipeline is None or not video_pipeline.running:
+        logger.warning("video_feed_camera_unavailable")
         # Return a single error frame
-        frame = np.zeros((480, 640, 3), dtype=np.uint8)
-        cv2.putText(frame, "Camera not available", (50, 240), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2)
-        ret, buffer = cv2.imencode('.jpg', frame)
-        if ret:
-            frame_bytes = buffer.tobytes()
-            return Response(b'--frame\r\n'
-                          b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n',
+        frame_bytes = encode_error_frame("Camera not available")
+        if frame_bytes:
+            return Response(mjpeg_part(frame_bytes),
                           mimetype='multipart/x-mixed-replace; boundary=frame')
         else:
             return "Failed to encode error frame", 500
     
-    print("Starting video stream")
+    logger.info("video_feed_started")
     return Response(generate_frames(),
                     mimetype='multipart/x-mixed-replace; boundary=frame')
 
@@ -305,9 +737,11 @@ def start_camera():
                 print("Failed to start any camera")
                 return "Failed to start camera - no working camera found. Please check that your webcam is connected and not in use by another application."
             else:
+                start_video_pipeline()
                 return "Camera started"
         else:
             print("Camera already running")
+            start_video_pipeline()
             return "Camera already running"
     except Exception as e:
         print(f"Error starting camera: {e}")
@@ -320,6 +754,7 @@ def stop_camera():
     """Stop the camera"""
     global camera
     try:
+        stop_video_pipeline()
         if camera is not None and camera.isOpened():
             camera.release()
             camera = None
@@ -332,11 +767,234 @@ def stop_camera():
 
 @app.route('/emotion_data')
 def get_emotion_data():
-    """Get the latest emotion data"""
-    global latest_emotion_data
-    if latest_emotion_data is None:
+    """Get the smoothed emotion data of every tracked face"""
+    history_window = request.args.get('history', 10, type=int)
+    if not 1 <= history_window <= emotion_history.size:
+        return jsonify({"error": f"history must be between 1 and {emotion_history.size}"}), 400
+    emotion_data = build_emotion_data(history_window) if video_pipeline is not None else None
+    if emotion_data is None:
         return jsonify({"error": "No emotion data available"}), 404
-    return jsonify(latest_emotion_data), 200
+    return jsonify(emotion_data), 200
+
+@app.route('/pipeline_stats')
+def get_pipeline_stats():
+    """Get per-stage latency and drop counters of the video pipeline"""
+    if video_pipeline is None:
+        return jsonify({"running": False, "stages": {}}), 200
+    stats = video_pipeline.get_stats()
+    if frame_analyzer is not None and frame_analyzer.tracker is not None:
+        stats["tracking"] = frame_analyzer.tracker.get_stats()
+    return jsonify(stats), 200
+
+@app.route('/text_cache_stats')
+def get_text_cache_stats():
+    """Get hit, miss and eviction counters of the text result cache"""
+    if text_result_cache is None:
+        return jsonify({"enabled": False}), 200
+    return jsonify(dict(text_result_cache.get_stats(), enabled=True)), 200
+
+@app.route('/inference_stats')
+def get_inference_stats():
+    """Get queue depth, batch size histogram and queue wait times of the inference scheduler"""
+    return jsonify({batcher.name: batcher.get_stats()
+                    for batcher in (sentiment_batcher, emotion_batcher, face_batcher)}), 200
+
+@app.route('/text_stage_stats')
+def get_text_stage_stats():
+    """Get per-stage timings of the text analysis calls"""
+    return jsonify({"stages": text_stage_stats.get_stats()}), 200
+
+@app.route('/metrics')
+def get_metrics():
+    """Prometheus metrics of this process"""
+    if not app.config['METRICS_ENABLED']:
+        return jsonify({"error": "Metrics are disabled"}), 404
+    return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/profiling/sample', methods=['POST'])
+def start_sampling_profile():
+    """Sample thread stacks in the background and save them in the flamegraph folded format"""
+    denied = profiling_denied()
+    if denied:
+        return denied
+    data = request.get_json(silent=True) or {}
+    try:
+        seconds = float(data.get('seconds', 10))
+        interval_ms = float(data.get('interval_ms', 5))
+    except (TypeError, ValueError):
+        return jsonify({"error": "seconds and interval_ms must be numbers"}), 400
+    threads = data.get('threads', 'video')
+    if threads not in PROFILE_THREAD_GROUPS:
+        return jsonify({"error": f"threads must be one of {', '.join(PROFILE_THREAD_GROUPS)}"}), 400
+    if not 0 < seconds <= app.config['PROFILING_MAX_SECONDS'] or interval_ms < 1:
+        return jsonify({"error": f"seconds must be in (0, {app.config['PROFILING_MAX_SECONDS']:g}] "
+                                 f"and interval_ms at least 1"}), 400
+    if threads == 'video' and (video_pipeline is None or not video_pipeline.running):
+        return jsonify({"error": "Camera is not running"}), 409
+    
+    profile_id = new_profile_id()
+    job = job_manager.submit('sampling_profile', run_sampling_profile, profile_id, seconds, interval_ms / 1000,
+                             PROFILE_THREAD_GROUPS[threads],
+                             metadata={"profile_id": profile_id, "seconds": seconds, "threads": threads})
+    return jsonify({"job_id": job.id, "profile_id": profile_id, "status": job.status}), 202
+
+@app.route('/profiling')
+def list_profiles():
+    """List the saved profiles and their formats, newest first"""
+    denied = profiling_denied()
+    if denied:
+        return denied
+    profiles = {}
+    directory = app.config['PROFILE_DIR']
+    for name in os.listdir(directory) if os.path.isdir(directory) else []:
+        profile_id, _, extension = name.rpartition('.')
+        if extension in PROFILE_FORMATS:
+            entry = profiles.setdefault(profile_id, {"profile_id": profile_id, "formats": [], "created_at": 0.0})
+            entry["formats"].append(extension)
+            entry["created_at"] = max(entry["created_at"], os.path.getmtime(os.path.join(directory, name)))
+    return jsonify({"profiles": sorted(profiles.values(), key=lambda entry: entry["created_at"], reverse=True)}), 200
+
+@app.route('/profiling/<profile_id>')
+def get_profile_file(profile_id):
+    """Download a profile: ?format=txt (default for request profiles), prof or folded (sampled)"""
+    denied = profiling_denied()
+    if denied:
+        return denied
+    if not profile_id.isalnum():
+        return jsonify({"error": "Profile not found"}), 404
+    extension = request.args.get('format')
+    if extension is None:
+        extension = 'txt' if os.path.exists(profile_path(profile_id, 'txt')) else 'folded'
+    if extension not in PROFILE_FORMATS:
+        return jsonify({"error": f"format must be one of {', '.join(PROFILE_FORMATS)}"}), 400
+    path = profile_path(profile_id, extension)
+    if not os.path.exists(path):
+        return jsonify({"error": "Profile not found"}), 404
+    return send_file(os.path.abspath(path), mimetype=PROFILE_FORMATS[extension],
+                     as_attachment=extension == 'prof', download_name=f"{profile_id}.{extension}")
+
+@app.route('/detection_config', methods=['GET', 'POST'])
+def face_detection_config():
+    """Get or update the face detection settings"""
+    if request.method == 'POST':
+        values = request.get_json(silent=True)
+        if not isinstance(values, dict):
+            return jsonify({
+                "success": False,
+                "message": "Request body must be a JSON object of detection settings"
+            }), 400
+        try:
+            detection_config.update(values)
+        except ValueError as e:
+            return jsonify({
+                "success": False,
+                "message": str(e)
+            }), 400
+    config = detection_config.to_dict()
+    config['detector'] = face_detector.name
+    return jsonify(config), 200
+
+# Offline analysis routes
+@app.route('/analyze_video', methods=['POST'])
+def analyze_video_file():
+    """Analyze an uploaded video file into a per-second emotion timeline
+
+    Runs as a background job unless stream=1 is passed, in which case the
+    NDJSON timeline is streamed back as it is produced.
+    """
+    if model is None:
+        return jsonify({"success": False, "message": "Face emotion model is not loaded"}), 503
+    file = request.files.get('video')
+    if file is None or file.filename == '':
+        return jsonify({"success": False, "message": "No video file provided"}), 400
+    try:
+        sample_fps = request.form.get('sample_fps', app.config['ANALYSIS_SAMPLE_FPS'], type=float)
+        workers = request.form.get('workers', app.config['ANALYSIS_WORKERS'], type=int)
+        if sample_fps is None or sample_fps <= 0 or workers is None or workers < 1:
+            return jsonify({"success": False, "message": "sample_fps and workers must be positive numbers"}), 400
+
+        upload_path = save_analysis_upload(file)
+        try:
+            info = video_info(upload_path)
+        except ValueError as e:
+            os.remove(upload_path)
+            return jsonify({"success": False, "message": str(e)}), 400
+
+        worker_args = analysis_worker_args()
+        if request.form.get('stream') == '1':
+            # This process yields the timeline in order as it is produced
+            records = analyze_video(upload_path, worker_args, sample_fps, workers=1,
+                                    analyzer=local_media_analyzer())
+            return Response(stream_with_context(ndjson_stream(records, upload_path)),
+                            mimetype='application/x-ndjson')
+
+        def task(job):
+            records = analyze_video(upload_path, worker_args, sample_fps, workers,
+                                    app.config['ANALYSIS_SEGMENT_SECONDS'], progress=job.set_progress,
+                                    analyzer=local_media_analyzer())
+            return run_analysis_job(job, records, upload_path)
+
+        job = job_manager.submit('video_analysis', task,
+                                 metadata={"filename": file.filename, "sample_fps": sample_fps, **info})
+        return jsonify({
+            "success": True,
+            "job_id": job.id,
+            "status_url": f"/analysis_jobs/{job.id}"
+        }), 202
+    except Exception as e:
+        return jsonify({"success": False, "message": f"Error analyzing video: {str(e)}"}), 500
+
+@app.route('/analyze_images', methods=['POST'])
+def analyze_image_archive():
+    """Analyze every image of an uploaded zip archive as a background job"""
+    if model is None:
+        return jsonify({"success": False, "message": "Face emotion model is not loaded"}), 503
+    file = request.files.get('images')
+    if file is None or file.filename == '':
+        return jsonify({"success": False, "message": "No zip file provided"}), 400
+    try:
+        workers = request.form.get('workers', app.config['ANALYSIS_WORKERS'], type=int)
+        if workers is None or workers < 1:
+            return jsonify({"success": False, "message": "workers must be a positive number"}), 400
+        upload_path = save_analysis_upload(file)
+        if not zipfile.is_zipfile(upload_path):
+            os.remove(upload_path)
+            return jsonify({"success": False, "message": "Invalid file format. Please upload a zip file."}), 400
+
+        worker_args = analysis_worker_args()
+
+        def task(job):
+            records = analyze_image_zip(upload_path, worker_args, workers, progress=job.set_progress,
+                                        analyzer=local_media_analyzer())
+            return run_analysis_job(job, records, upload_path)
+
+        job = job_manager.submit('image_analysis', task, metadata={"filename": file.filename})
+        return jsonify({
+            "success": True,
+            "job_id": job.id,
+            "status_url": f"/analysis_jobs/{job.id}"
+        }), 202
+    except Exception as e:
+        return jsonify({"success": False, "message": f"Error analyzing images: {str(e)}"}), 500
+
+@app.route('/analysis_jobs/<job_id>')
+def get_analysis_job(job_id):
+    """Get the status and progress of a background job (offline analysis or retraining)"""
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job.to_dict()), 200
+
+@app.route('/analysis_jobs/<job_id>/result')
+def get_analysis_job_result(job_id):
+    """Download the NDJSON result of a completed analysis job"""
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    if job.status != "completed":
+        return jsonify({"error": f"Job is {job.status}", "status": job.status}), 409
+    return send_file(os.path.abspath(analysis_result_path(job.id)), mimetype='application/x-ndjson',
+                     as_attachment=True, download_name=f"{job.id}.ndjson")
 
 # Authentication routes
 @app.route('/api/register', methods=['POST'])
@@ -506,6 +1164,12 @@ def analyze_text():
         # Analyze sentiment
         result = text_analyzer.analyze_sentiment(text)
         return jsonify(result), 200
+    except QueueFull as e:
+        return jsonify({
+            "sentiment": "neutral",
+            "confidence": 0.5,
+            "message": str(e)
+        }), 429, {"Retry-After": "1"}
     except Exception as e:
         return jsonify({
             "sentiment": "neutral",
@@ -538,6 +1202,12 @@ def analyze_voice_emotion():
         # Analyze emotion
         result = emotion_analyzer.analyze_emotion(text)
         return jsonify(result), 200
+    except QueueFull as e:
+        return jsonify({
+            "emotion": "neutral",
+            "confidence": 0.5,
+            "message": str(e)
+        }), 429, {"Retry-After": "1"}
     except Exception as e:
         return jsonify({
             "emotion": "neutral",
@@ -545,6 +1215,104 @@ def analyze_voice_emotion():
             "message": f"Error analyzing voice emotion: {str(e)}"
         }), 500
 
+@app.route('/analyze_text/batch', methods=['POST'])
+def analyze_text_batch_route():
+    """Analyze sentiment of a list of texts in one model call"""
+    global text_analyzer
+    try:
+        if not TEXT_ANALYSIS_AVAILABLE or text_analyzer is None:
+            return jsonify({"results": [], "message": "Text analysis not available"}), 503
+        
+        texts, error = read_text_batch()
+        if error:
+            return jsonify({"results": [], "message": error}), 400
+        
+        empty_result = {"sentiment": "neutral", "confidence": 0.5, "message": "No text provided"}
+        return jsonify(analyze_text_batch(text_analyzer.analyze_sentiment_batch, texts, empty_result)), 200
+    except QueueFull as e:
+        return jsonify({"results": [], "message": str(e)}), 429, {"Retry-After": "1"}
+    except Exception as e:
+        return jsonify({"results": [], "message": f"Error analyzing texts: {str(e)}"}), 500
+
+@app.route('/analyze_voice_emotion/batch', methods=['POST'])
+def analyze_voice_emotion_batch():
+    """Analyze emotion of a list of voice-transcribed texts in one model call"""
+    global emotion_analyzer
+    try:
+        if not TEXT_ANALYSIS_AVAILABLE or emotion_analyzer is None:
+            return jsonify({"results": [], "message": "Emotion analysis not available"}), 503
+        
+        texts, error = read_text_batch()
+        if error:
+            return jsonify({"results": [], "message": error}), 400
+        
+        empty_result = {"emotion": "neutral", "confidence": 0.5, "message": "No text provided"}
+        return jsonify(analyze_text_batch(emotion_analyzer.analyze_emotion_batch, texts, empty_result)), 200
+    except QueueFull as e:
+        return jsonify({"results": [], "message": str(e)}), 429, {"Retry-After": "1"}
+    except Exception as e:
+        return jsonify({"results": [], "message": f"Error analyzing voice emotions: {str(e)}"}), 500
+
+@app.route('/analyze_text/stream', methods=['POST'])
+def analyze_text_stream():
+    """Analyze sentiment sentence by sentence in a long text, streamed back as NDJSON"""
+    if not TEXT_ANALYSIS_AVAILABLE or text_analyzer is None:
+        return jsonify({"success": False, "message": "Text analysis not available"}), 503
+    # Sentences skip the result cache, which they would only flood
+    return stream_document_analysis(unwrapped(text_analyzer).analyze_sentiment_batch, 'sentiment')
+
+@app.route('/analyze_voice_emotion/stream', methods=['POST'])
+def analyze_voice_emotion_stream():
+    """Analyze emotion sentence by sentence in a long transcript, streamed back as NDJSON"""
+    if not TEXT_ANALYSIS_AVAILABLE or emotion_analyzer is None:
+        return jsonify({"success": False, "message": "Emotion analysis not available"}), 503
+    return stream_document_analysis(unwrapped(emotion_analyzer).analyze_emotion_batch, 'emotion')
+
+@app.route('/feedback/voice_emotion', methods=['POST'])
+def voice_emotion_feedback():
+    """Teach the incremental emotion model labeled texts: {"text", "emotion"} or {"items": [...]}"""
+    try:
+        if not TEXT_ANALYSIS_AVAILABLE or emotion_analyzer is None:
+            return jsonify({"success": False, "message": "Emotion analysis not available"}), 503
+        if not emotion_analyzer.incremental:
+            return jsonify({
+                "success": False,
+                "message": "Incremental learning is disabled (set TEXT_INCREMENTAL=1)"
+            }), 409
+        
+        data = request.get_json(silent=True) or {}
+        items = data.get('items', [data])
+        valid = isinstance(items, list) and len(items) > 0 and all(
+            isinstance(item, dict) and isinstance(item.get('text'), str) and item['text']
+            and isinstance(item.get('emotion'), str) for item in items)
+        if not valid:
+            return jsonify({
+                "success": False,
+                "message": "Provide 'text' and 'emotion', or a list of them as 'items'"
+            }), 400
+        
+        start = time.perf_counter()
+        learned = feedback_learner.add(emotion_analyzer, [item['text'] for item in items],
+                                       [item['emotion'] for item in items])
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        
+        # Compact with a full retrain once enough feedback arrived
+        compaction_job = None
+        if feedback_learner.needs_compaction() and (retrain_job is None or retrain_job.finished):
+            compaction_job = submit_emotion_retrain(reason="compaction")
+        
+        return jsonify({
+            "success": True,
+            "received": len(items),
+            "learned": learned,
+            "elapsed_ms": elapsed_ms,
+            "model_version": emotion_analyzer.model_version,
+            "compaction_job_id": compaction_job.id if compaction_job else None,
+            "learning": feedback_learner.get_stats()
+        }), 200
+    except Exception as e:
+        return jsonify({"success": False, "message": f"Error learning from feedback: {str(e)}"}), 500
+
 @app.route('/upload_voice_dataset', methods=['POST'])
 def upload_voice_dataset():
     """Upload and process voice emotion dataset"""
@@ -599,34 +1367,34 @@ def upload_voice_dataset():
                 
                 # Preprocess text data
                 text_analyzer_instance = TextAnalyzer()
-                df['processed_text'] = df['Text'].apply(lambda x: text_analyzer_instance.preprocess_text(str(x)))
+                df['processed_text'] = text_analyzer_instance.preprocessor.preprocess_batch(df['Text'].astype(str))
                 
                 # Save the preprocessed dataset
                 processed_save_path = os.path.join("data", "voice_emotion_dataset_processed.csv")
                 df.to_csv(processed_save_path, index=False)
                 
+                print(f"Processed voice emotion dataset with {processed_rows} rows")
+                
                 # Update the emotion analyzer to include this new dataset
-                global emotion_analyzer
                 if emotion_analyzer is not None:
-                    # Re-train the emotion analyzer with the new dataset
-                    dataset_paths = [
-                        r"C:\Users\knile\Downloads\emotion_sentences\emotion_sentences.csv",
-                        r"c:\Users\knile\OneDrive\Desktop\EmotionSense\data\emotion_sentences.csv",
-                        save_path  # Include the newly uploaded dataset
-                    ]
-                    
-                    print("Re-training emotion analysis model with updated datasets...")
-                    if emotion_analyzer.train_emotion_model(dataset_paths):
-                        print("Emotion analysis model re-trained successfully")
-                    else:
-                        print("Failed to re-train emotion analysis model")
-                
-                print(f"Processed voice emotion dataset with {processed_rows} rows")
+                    # Re-train the emotion analyzer with the new dataset in the
+                    # background; the current model keeps serving until then.
+                    # The rows are not learned incrementally here: the retrain
+                    # fits on this CSV anyway, and rows learned outside
+                    # FeedbackLearner would be dropped by a running compaction
+                    job = submit_emotion_retrain(processed_rows=processed_rows)
+                    return jsonify({
+                        "success": True,
+                        "processed_rows": processed_rows,
+                        "job_id": job.id,
+                        "status_url": f"/analysis_jobs/{job.id}",
+                        "message": f"Successfully processed {processed_rows} rows; the model is being retrained"
+                    }), 202
                 
                 return jsonify({
                     "success": True,
                     "processed_rows": processed_rows,
-                    "message": f"Successfully processed {processed_rows} rows and updated the model"
+                    "message": f"Successfully processed {processed_rows} rows"
                 }), 200
                 
             except Exception as e:
@@ -650,14 +1418,8 @@ def upload_voice_dataset():
         }), 500
 
 if __name__ == '__main__':
-    # Load model
-    load_model()
-    
-    # Load text analyzer
-    load_text_analyzer()
-    
-    # Load emotion analyzer
-    load_emotion_analyzer()
+    # Load the face, text and emotion models
+    create_app()
     
-    # Run the app
+    # Run the development server (production: gunicorn -c gunicorn.conf.py wsgi:app)
     app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
@@ -0,0 +1,118 @@
+"""Compare analyze_sentiment on long texts before and after the shared AnalysisContext
+
+Builds documents of --sentences random sentences from the bundled
+datasets, a lexicon of their words (seeded random polarity, so part of
+the documents falls through to the model) and a sentiment model on the
+sentences, then measures per document:
+  - original: the lexicon preprocessed the text, then the model path
+    preprocessed it again before vectorizing (one text per call);
+  - context: analyze_sentiment on one AnalysisContext per text, whose
+    tokens, preprocessed text and features are computed once;
+and checks that both give the same results. Prints the per-stage time
+breakdown reported to the stage hooks.
+
+Usage: python benchmarks/analysis_context_benchmark.py [--documents N] [--sentences N]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from src.analysis_context import StageStats, add_stage_hook
+from src.sentiment_lexicon import load_lexicon
+from src.text_analysis import TextAnalyzer
+
+DATASETS = [os.path.join(ROOT_DIR, "data", "emotion_sentences.csv"),
+            os.path.join(ROOT_DIR, "data", "voice_emotion_dataset.csv")]
+# Sentiment labels for the model, from the emotion of each sentence
+SENTIMENTS = {'happy': 'positive', 'surprise': 'positive', 'sad': 'negative', 'angry': 'negative',
+              'fear': 'negative', 'disgust': 'negative'}
+
+
+def legacy_sentiment(analyzer, text):
+    """analyze_sentiment as it was before the batch path, preprocessing once per scoring path"""
+    word_sentiment = analyzer.lexicon.sentiment(analyzer.preprocess_text(text).split())
+    if word_sentiment and word_sentiment['confidence'] > 0.6:
+        return {
+            "sentiment": word_sentiment['sentiment'],
+            "confidence": word_sentiment['confidence'],
+            "message": "Analysis completed using sentiment words dictionary"
+        }
+    text_vectorized = analyzer.vectorizer.transform([analyzer.preprocess_text(text)])
+    prediction = analyzer.model.predict(text_vectorized)[0]
+    probabilities = analyzer.model.predict_proba(text_vectorized)[0]
+    return {
+        "sentiment": analyzer.reverse_label_mapping[prediction].lower(),
+        "confidence": float(np.max(probabilities)),
+        "message": "Analysis completed using ML model"
+    }
+
+
+def rate(function, count, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+    return result, count / best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analysis context benchmark")
+    parser.add_argument("--documents", type=int, default=300)
+    parser.add_argument("--sentences", type=int, default=40, help="Sentences per document")
+    args = parser.parse_args()
+
+    frames = []
+    for path in DATASETS:
+        df = pd.read_csv(path)
+        frames.append(pd.DataFrame({'text': df['Text' if 'Text' in df.columns else 'Sentence'].astype(str),
+                                    'emotion': df['Emotion'].astype(str).str.lower()}))
+    sentences = pd.concat(frames, ignore_index=True)
+    rng = random.Random(0)
+    pool = sentences['text'].tolist()
+    documents = [' '.join(rng.choices(pool, k=args.sentences)) for _ in range(args.documents)]
+
+    analyzer = TextAnalyzer(incremental=False)
+    processed = analyzer.preprocessor.preprocess_batch(sentences['text'].tolist())
+    labels = sentences['emotion'].map(SENTIMENTS).fillna('neutral').map(analyzer.label_mapping)
+    analyzer.model.fit(analyzer.vectorizer.fit_transform(processed), labels)
+    analyzer.is_trained = True
+
+    with tempfile.TemporaryDirectory() as directory:
+        csv_path = os.path.join(directory, "sentiment_words.csv")
+        words = sorted({word for text in processed for word in text.split() if not word.startswith('NOT_')})
+        pd.DataFrame([(word, rng.choice(['positive', 'positive', 'negative', 'neutral'])) for word in words],
+                     columns=['word', 'sentiment']).to_csv(csv_path, index=False)
+        analyzer.lexicon = load_lexicon(csv_path, os.path.join(directory, "sentiment_lexicon.npz"),
+                                        analyzer.preprocessor)
+
+        size_mb = sum(len(text.encode('utf-8')) for text in documents) / 1e6
+        print(f"{len(documents)} documents of {args.sentences} sentences ({size_mb * 1e6 / len(documents):.0f} "
+              f"bytes each), {len(analyzer.lexicon)} lexicon entries")
+        legacy, legacy_rate = rate(lambda: [legacy_sentiment(analyzer, text) for text in documents], len(documents))
+        stats = StageStats()
+        add_stage_hook(stats.record)
+        shared, shared_rate = rate(lambda: [analyzer.analyze_sentiment(text) for text in documents], len(documents))
+        model_share = sum(result['message'].endswith('ML model') for result in shared) / len(shared)
+        print(f"original (two preprocessing passes): {legacy_rate:.0f} docs/s")
+        print(f"analysis context: {shared_rate:.0f} docs/s ({shared_rate / legacy_rate:.2f}x), "
+              f"{model_share:.0%} scored by the model, same results {legacy == shared}")
+
+        stages = stats.get_stats()
+        total = sum(stage['total_seconds'] for stage in stages.values())
+        print(f"{'stage':<10} {'mean ms':>8} {'share':>6}")
+        for name, stage in sorted(stages.items(), key=lambda item: -item[1]['total_seconds']):
+            print(f"{name:<10} {stage['mean_ms']:>8.3f} {stage['total_seconds'] / total:>6.1%}")
+
+
+if __name__ == "__main__":
+    main()
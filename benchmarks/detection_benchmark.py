@@ -0,0 +1,93 @@
+"""Accuracy/latency trade-off of the face detection settings
+
+Runs the Haar cascade over a folder of sample frames (or a video) with
+several input scales, with and without ROI search, and compares every
+setting against full resolution full-frame detection.
+
+Usage: python benchmarks/detection_benchmark.py --frames samples/ [--scales 1.0 0.75 0.5 0.33]
+"""
+import argparse
+import os
+import sys
+import time
+
+import cv2
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from frame_sources import load_frames
+from src.face_detection import HAAR_CASCADE_PATH, CascadeFaceDetector, DetectionConfig
+from src.face_tracking import box_iou
+
+
+def count_matches(boxes, reference, threshold=0.5):
+    """Greedy one-to-one matching of boxes against reference boxes"""
+    used = set()
+    matches = 0
+    for box in boxes:
+        best, best_iou = None, threshold
+        for i, ref in enumerate(reference):
+            iou = box_iou(box, ref)
+            if i not in used and iou >= best_iou:
+                best, best_iou = i, iou
+        if best is not None:
+            used.add(best)
+            matches += 1
+    return matches
+
+
+def run_detector(detector, grays):
+    """Return (ms per frame, boxes per frame)"""
+    results = []
+    start = time.perf_counter()
+    for gray in grays:
+        results.append(detector.detect(gray))
+    return (time.perf_counter() - start) * 1000 / len(grays), results
+
+
+def score(results, reference):
+    """Precision and recall of results against the reference detections"""
+    found = sum(len(boxes) for boxes in results)
+    expected = sum(len(boxes) for boxes in reference)
+    matched = sum(count_matches(boxes, ref) for boxes, ref in zip(results, reference))
+    precision = matched / found if found else 1.0
+    recall = matched / expected if expected else 1.0
+    return precision, recall
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark face detection settings")
+    parser.add_argument("--frames", help="Directory of sample frames (sorted by name)")
+    parser.add_argument("--video", help="Video file to read frames from")
+    parser.add_argument("--count", type=int, default=200, help="Maximum number of frames")
+    parser.add_argument("--scales", type=float, nargs="+", default=[1.0, 0.75, 0.5, 0.33])
+    parser.add_argument("--scale-factor", type=float, default=1.1)
+    parser.add_argument("--min-neighbors", type=int, default=5)
+    args = parser.parse_args()
+
+    frames = load_frames(args.video, args.frames, args.count)
+    grays = [cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) for frame in frames]
+    cascade = cv2.CascadeClassifier(HAAR_CASCADE_PATH)
+    height, width = grays[0].shape[:2]
+
+    def make_config(scale, roi):
+        return DetectionConfig(scale_factor=args.scale_factor, min_neighbors=args.min_neighbors,
+                               input_scale=scale, max_width=width,
+                               full_scan_interval=5 if roi else 1)
+
+    reference_ms, reference = run_detector(CascadeFaceDetector(cascade, make_config(1.0, False)), grays)
+    print(f"{len(grays)} frames at {width}x{height}, reference: {reference_ms:.1f} ms/frame, "
+          f"{sum(len(b) for b in reference)} faces")
+    print(f"{'scale':>6} {'roi':>5} {'ms/frame':>9} {'speedup':>8} {'precision':>10} {'recall':>7}")
+    for scale in args.scales:
+        for roi in (False, True):
+            detector = CascadeFaceDetector(cascade, make_config(scale, roi))
+            ms, results = run_detector(detector, grays)
+            precision, recall = score(results, reference)
+            print(f"{scale:>6.2f} {'yes' if roi else 'no':>5} {ms:>9.1f} {reference_ms / ms:>7.1f}x "
+                  f"{precision:>10.3f} {recall:>7.3f}")
+
+
+if __name__ == "__main__":
+    main()
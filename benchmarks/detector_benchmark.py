@@ -0,0 +1,76 @@
+"""Compare the face detectors on speed and agreement with a reference
+
+Runs every available detector (Haar, LBP, DNN SSD, YuNet) over a folder
+of images or a recorded video and reports ms/frame, faces found and
+precision/recall against the reference detector's boxes. Detectors whose
+model files are missing from models/ are skipped.
+
+Usage: python benchmarks/detector_benchmark.py --frames samples/ [--reference yunet]
+       python benchmarks/detector_benchmark.py --video clip.mp4 --detectors haar lbp
+"""
+import argparse
+import os
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from detection_benchmark import score
+from frame_sources import load_frames
+from src.face_detection import FACE_DETECTORS, DetectionConfig, create_face_detector
+
+
+def run_full_frames(detector, frames):
+    """Full-frame detection on every frame; returns (ms per frame, boxes)"""
+    import cv2
+    images = frames if detector.uses_color else [cv2.cvtColor(f, cv2.COLOR_BGR2GRAY) for f in frames]
+    detector.detect(images[0])  # warm up
+    results = []
+    start = time.perf_counter()
+    for image in images:
+        results.append(detector.detect(image, hints=[]))
+    return (time.perf_counter() - start) * 1000 / len(images), results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark face detectors")
+    parser.add_argument("--frames", help="Directory of images")
+    parser.add_argument("--video", help="Recorded video file")
+    parser.add_argument("--count", type=int, default=200, help="Maximum number of frames")
+    parser.add_argument("--detectors", nargs="+", default=FACE_DETECTORS, choices=FACE_DETECTORS)
+    parser.add_argument("--reference", default="haar", choices=FACE_DETECTORS,
+                        help="Detector whose boxes count as ground truth")
+    parser.add_argument("--max-width", type=int, default=640, help="Detection width (see DetectionConfig)")
+    args = parser.parse_args()
+
+    frames_dir = os.path.abspath(args.frames) if args.frames else None
+    video = os.path.abspath(args.video) if args.video else None
+    frames = load_frames(video, frames_dir, args.count)
+    # Detector model files are looked up relative to the project root
+    os.chdir(ROOT_DIR)
+
+    results = {}
+    for name in dict.fromkeys([args.reference] + args.detectors):
+        try:
+            detector = create_face_detector(name, DetectionConfig(max_width=args.max_width))
+        except Exception as e:
+            print(f"{name}: skipped ({e})")
+            continue
+        results[name] = run_full_frames(detector, frames)
+
+    if args.reference not in results:
+        print(f"Reference detector '{args.reference}' is not available")
+        return
+    reference = results[args.reference][1]
+    height, width = frames[0].shape[:2]
+    print(f"{len(frames)} frames at {width}x{height}, reference: {args.reference}")
+    print(f"{'detector':>9} {'ms/frame':>9} {'faces':>6} {'precision':>10} {'recall':>7}")
+    for name, (ms, boxes) in results.items():
+        precision, recall = score(boxes, reference)
+        faces = sum(len(b) for b in boxes)
+        print(f"{name:>9} {ms:>9.1f} {faces:>6} {precision:>10.3f} {recall:>7.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Measure streaming sentence-level analysis of a large text file
+
+Writes a --size-mb text file of random sentences from the bundled
+datasets (mixed sentence ends and paragraph breaks), trains an emotion
+TextAnalyzer on them, then reads the file back in 64 KB chunks and reports
+  - segmentation only (iter_sentences) in MB/s,
+  - segmentation + batched emotion analysis + rolling aggregate
+    (analyze_document, as /analyze_voice_emotion/stream runs it) in MB/s
+    and sentences/s, per batch size,
+  - the peak Python memory of the analysis, which does not grow with
+    the file size.
+
+Usage: python benchmarks/document_stream_benchmark.py [--size-mb 10] [--batch-sizes 64,256,1024]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from src.document_stream import analyze_document, iter_sentences, iter_text_chunks
+from src.text_analysis import TextAnalyzer
+
+DATASET = os.path.join(ROOT_DIR, "data", "voice_emotion_dataset.csv")
+
+
+def write_document(path, sentences, size_bytes, seed=0):
+    rng = random.Random(seed)
+    written = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        while written < size_bytes:
+            paragraph = ' '.join(sentence.rstrip('.!?') + rng.choice(['.', '.', '!', '?'])
+                                 for sentence in rng.choices(sentences, k=rng.randint(3, 12)))
+            f.write(paragraph + '\n\n')
+            written += len(paragraph.encode('utf-8')) + 2
+
+
+def consume(records):
+    count = 0
+    for record in records:
+        count += 1
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Streaming document analysis benchmark")
+    parser.add_argument("--size-mb", type=float, default=10.0)
+    parser.add_argument("--batch-sizes", default="64,256,1024")
+    args = parser.parse_args()
+
+    sentences = pd.read_csv(DATASET)['Text'].astype(str).tolist()
+    analyzer = TextAnalyzer(incremental=False)
+    analyzer.train_emotion_model([DATASET])
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "document.txt")
+        write_document(path, sentences, int(args.size_mb * 1e6))
+        size_mb = os.path.getsize(path) / 1e6
+
+        start = time.perf_counter()
+        with open(path, 'rb') as f:
+            count = sum(1 for _ in iter_sentences(iter_text_chunks(f)))
+        seconds = time.perf_counter() - start
+        print(f"{size_mb:.1f} MB, {count} sentences")
+        print(f"segmentation only: {size_mb / seconds:.1f} MB/s")
+
+        for batch_size in [int(size) for size in args.batch_sizes.split(',')]:
+            start = time.perf_counter()
+            with open(path, 'rb') as f:
+                records = consume(analyze_document(iter_text_chunks(f), analyzer.analyze_emotion_batch, 'emotion',
+                                                   batch_size=batch_size))
+            seconds = time.perf_counter() - start
+            print(f"analysis, batches of {batch_size:>4}: {size_mb / seconds:.2f} MB/s, "
+                  f"{(records - 1) / seconds:.0f} sentences/s")
+
+        tracemalloc.start()
+        with open(path, 'rb') as f:
+            consume(analyze_document(iter_text_chunks(f), analyzer.analyze_emotion_batch, 'emotion'))
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"peak Python memory during analysis: {peak / 1e6:.1f} MB for a {size_mb:.1f} MB file")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Compare per-face and batched face emotion inference
+
+Usage: python benchmarks/face_batch_benchmark.py [--backend keras] [--repeats 20]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from src.face_analysis import preprocess_face, predict_emotions
+from src.inference_backends import BACKENDS, create_backend, get_model_paths
+
+FACES_PER_FRAME = [1, 4, 16, 64]
+
+
+def make_faces(count, rng):
+    """Create random BGR face crops of varying sizes"""
+    faces = []
+    for _ in range(count):
+        size = int(rng.integers(60, 200))
+        faces.append(rng.integers(0, 256, size=(size, size, 3), dtype=np.uint8))
+    return faces
+
+
+def run_per_face(model, faces):
+    """Original path: one model call per face"""
+    for face in faces:
+        predictions = model.predict(preprocess_face(face).astype(np.float32))
+        np.argmax(predictions)
+
+
+def run_batched(model, faces):
+    """Batched path: one model call per frame"""
+    predict_emotions(model, faces)
+
+
+def measure(func, model, faces, repeats):
+    """Return faces per second for func over repeats frames"""
+    func(model, faces)  # warm up
+    start = time.perf_counter()
+    for _ in range(repeats):
+        func(model, faces)
+    elapsed = time.perf_counter() - start
+    return len(faces) * repeats / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark batched face emotion inference")
+    parser.add_argument("--backend", default="keras", choices=sorted(BACKENDS))
+    parser.add_argument("--model", default=None, help="Model artifact (defaults to the backend's model path)")
+    parser.add_argument("--repeats", type=int, default=20, help="Frames to time per configuration")
+    args = parser.parse_args()
+
+    model_path = args.model or os.path.join(ROOT_DIR, get_model_paths(args.backend)[0])
+    model = create_backend(args.backend, model_path)
+    rng = np.random.default_rng(42)
+
+    print(f"{'faces/frame':>12} {'per-face f/s':>14} {'batched f/s':>14} {'speedup':>8}")
+    for count in FACES_PER_FRAME:
+        faces = make_faces(count, rng)
+        per_face = measure(run_per_face, model, faces, args.repeats)
+        batched = measure(run_batched, model, faces, args.repeats)
+        print(f"{count:>12} {per_face:>14.1f} {batched:>14.1f} {batched / per_face:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
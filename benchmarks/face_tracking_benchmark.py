@@ -0,0 +1,67 @@
+"""Compare face tracking against detection and inference on every frame
+
+Usage: python benchmarks/face_tracking_benchmark.py [--video clip.mp4 | --frames dir]
+                                                    [--detect-interval 10] [--inference-interval 5]
+"""
+import argparse
+import os
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from frame_sources import load_frames
+from src.face_analysis import predict_emotions
+from src.face_detection import FACE_DETECTORS, create_face_detector
+from src.face_tracking import FaceTracker
+from src.frame_analysis import FrameAnalyzer
+from src.inference_backends import BACKENDS, create_backend, get_model_paths
+
+
+def run(analyzer, frames):
+    """Return (fps, faces drawn) for analyzing every frame once"""
+    faces_drawn = 0
+    start = time.perf_counter()
+    for frame in frames:
+        _, faces = analyzer.analyze(frame.copy())
+        faces_drawn += len(faces)
+    return len(frames) / (time.perf_counter() - start), faces_drawn
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark face tracking mode")
+    parser.add_argument("--video", help="Video file to read frames from")
+    parser.add_argument("--frames", help="Directory of frame images")
+    parser.add_argument("--count", type=int, default=300, help="Maximum number of frames")
+    parser.add_argument("--backend", default="keras_function", choices=sorted(BACKENDS))
+    parser.add_argument("--detector", default="haar", choices=FACE_DETECTORS)
+    parser.add_argument("--detect-interval", type=int, default=10)
+    parser.add_argument("--inference-interval", type=int, default=5)
+    args = parser.parse_args()
+
+    frames = load_frames(args.video, args.frames, args.count)
+    backend = create_backend(args.backend, os.path.join(ROOT_DIR, get_model_paths(args.backend)[0]))
+
+    def predict_faces(faces):
+        return predict_emotions(backend, faces)
+
+    every_frame = FrameAnalyzer(create_face_detector(args.detector), predict_faces)
+    tracker = FaceTracker(detect_interval=args.detect_interval, inference_interval=args.inference_interval)
+    tracked = FrameAnalyzer(create_face_detector(args.detector), predict_faces, tracker)
+
+    run(every_frame, frames[:5])  # warm up
+    base_fps, base_faces = run(every_frame, frames)
+    tracked_fps, tracked_faces = run(tracked, frames)
+    stats = tracker.get_stats()
+
+    print(f"frames: {len(frames)}")
+    print(f"every frame: {base_fps:7.1f} fps, {base_faces} face results")
+    print(f"tracking:    {tracked_fps:7.1f} fps, {tracked_faces} face results, "
+          f"{stats['detections']} detections, {stats['inferences']} inferences, "
+          f"{tracker.next_id - 1} track ids")
+    print(f"speedup: {tracked_fps / base_fps:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Frame sources shared by the face pipeline benchmarks"""
+import glob
+import os
+
+import cv2
+import numpy as np
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.webp')
+
+
+def iter_video(path, limit=None):
+    """Yield BGR frames from a video file"""
+    capture = cv2.VideoCapture(path)
+    count = 0
+    try:
+        while limit is None or count < limit:
+            success, frame = capture.read()
+            if not success:
+                break
+            count += 1
+            yield frame
+    finally:
+        capture.release()
+
+
+def iter_images(directory, limit=None):
+    """Yield (path, BGR frame) for the images in a directory, sorted by name"""
+    paths = sorted(p for p in glob.glob(os.path.join(directory, '*')) if p.lower().endswith(IMAGE_EXTENSIONS))
+    for path in paths[:limit]:
+        frame = cv2.imread(path)
+        if frame is not None:
+            yield path, frame
+
+
+def draw_synthetic_face(frame, cx, cy, size):
+    """Draw a cartoon face that the Haar cascade recognizes"""
+    cv2.ellipse(frame, (cx, cy), (int(size * 0.8), size), 0, 0, 360, (150, 170, 200), -1)
+    for side in (-1, 1):
+        eye = (cx + side * int(size * 0.35), cy - int(size * 0.2))
+        cv2.ellipse(frame, eye, (int(size * 0.18), int(size * 0.09)), 0, 0, 360, (40, 40, 40), -1)
+        cv2.line(frame, (cx + side * int(size * 0.15), cy - int(size * 0.4)),
+                 (cx + side * int(size * 0.55), cy - int(size * 0.42)), (50, 50, 50), max(2, size // 15))
+    cv2.line(frame, (cx, cy - int(size * 0.1)), (cx, cy + int(size * 0.25)), (110, 120, 150), max(2, size // 20))
+    cv2.ellipse(frame, (cx, cy + int(size * 0.5)), (int(size * 0.3), int(size * 0.08)), 0, 0, 360, (60, 60, 120), -1)
+
+
+def synthetic_frames(count, width=640, height=480, faces=2, seed=0):
+    """Yield frames with cartoon faces drifting across a noisy background
+
+    Useful to time the pipeline without sample footage.
+    """
+    rng = np.random.default_rng(seed)
+    noise = rng.normal(0, 6, size=(height, width, 3))
+    background = np.clip(np.linspace(60, 120, width)[None, :, None] + noise, 0, 255).astype(np.uint8)
+    scale = min(width / 640.0, height / 480.0)
+    starts = [(int(rng.integers(100, max(width - 100, 101))), int(rng.integers(120, max(height - 120, 121))))
+              for _ in range(faces)]
+    for i in range(count):
+        frame = background.copy()
+        for k, (x, y) in enumerate(starts):
+            size = int((70 - 10 * k) * scale)
+            span = max(width - 4 * size, 1)
+            cx = 2 * size + (x + i * 3 * (k + 1)) % span
+            cy = int(y + 20 * np.sin(i / 15.0 + k))
+            draw_synthetic_face(frame, cx, min(max(cy, size + 5), height - size - 5), size)
+        yield cv2.GaussianBlur(frame, (5, 5), 0)
+
+
+def load_frames(video=None, frames_dir=None, count=300):
+    """Load frames from a video, an image folder or the synthetic source"""
+    if video:
+        return list(iter_video(video, count))
+    if frames_dir:
+        return [frame for _, frame in iter_images(frames_dir, count)]
+    return list(synthetic_frames(count))
@@ -0,0 +1,104 @@
+"""Compare incremental updates with full retraining on the voice emotion dataset
+
+Splits data/voice_emotion_dataset.csv by distinct sentence into a held-out
+test set and a training stream. Both models start from the first part of
+the stream; then each of the last --batches batches of --batch-size rows
+is folded in by
+  - full retrain: the current TF-IDF + logistic regression model refitted
+    on every row seen so far (what /upload_voice_dataset does), and
+  - incremental: TextAnalyzer(incremental=True).partial_fit on the batch.
+Reports the time to incorporate each batch and the test accuracy after
+it, plus the accuracy of a compaction (full refit of the incremental
+model) at the end.
+
+Usage: python benchmarks/incremental_learning_benchmark.py [--batch-size 300] [--batches 10] [--dataset PATH]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.metrics import accuracy_score
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from src.text_analysis import TextAnalyzer
+
+
+def split(df, test_fraction=0.2, seed=42):
+    """Held-out rows whose sentences never occur in the training stream"""
+    rng = np.random.default_rng(seed)
+    sentences = df['Text'].unique()
+    test_sentences = set(rng.choice(sentences, int(len(sentences) * test_fraction), replace=False))
+    is_test = df['Text'].isin(test_sentences)
+    stream = df[~is_test].sample(frac=1.0, random_state=seed).reset_index(drop=True)
+    return stream, df[is_test]
+
+
+def full_fit(analyzer, rows):
+    """Preprocess, vectorize and fit on rows like a full retrain; returns seconds"""
+    start = time.perf_counter()
+    processed = analyzer.preprocessor.preprocess_batch(rows['Text'].tolist())
+    labels = rows['Emotion'].str.lower().map(analyzer.emotion_label_mapping)
+    analyzer.model.fit(analyzer.vectorizer.fit_transform(processed), labels)
+    analyzer.is_trained = True
+    return time.perf_counter() - start
+
+
+def accuracy(analyzer, test):
+    predicted = [result['emotion'].lower() for result in analyzer.analyze_emotion_batch(test['Text'].tolist())]
+    expected = [analyzer.emotion_reverse_mapping[label]
+                for label in test['Emotion'].str.lower().map(analyzer.emotion_label_mapping)]
+    return accuracy_score(expected, predicted)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Incremental learning benchmark")
+    parser.add_argument("--dataset", default=os.path.join(ROOT_DIR, "data", "voice_emotion_dataset.csv"))
+    parser.add_argument("--batch-size", type=int, default=300, help="New rows per update")
+    parser.add_argument("--batches", type=int, default=10)
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.dataset)
+    df = df[df['Emotion'].str.lower().isin(TextAnalyzer().emotion_label_mapping)]
+    stream, test = split(df)
+    batch_size = args.batch_size
+    initial = len(stream) - args.batches * batch_size
+    if initial <= 0:
+        parser.error("--batches x --batch-size must be smaller than the training stream")
+
+    full = TextAnalyzer(incremental=False)
+    online = TextAnalyzer(incremental=True)
+    full_fit(full, stream[:initial])
+    full_fit(online, stream[:initial])
+    online._mark_trained()
+    print(f"{len(stream)} training rows ({stream['Text'].nunique()} sentences), {len(test)} test rows "
+          f"({test['Text'].nunique()} sentences); {initial} initial rows, batches of {batch_size}")
+    print(f"{'rows seen':>9} {'full retrain (s)':>17} {'accuracy':>9} {'incremental (ms)':>17} {'accuracy':>9}")
+    print(f"{initial:>9} {'':>17} {accuracy(full, test):>9.4f} {'':>17} {accuracy(online, test):>9.4f}")
+
+    full_seconds, online_seconds = 0.0, 0.0
+    for i in range(args.batches):
+        end = initial + (i + 1) * batch_size
+        batch = stream[end - batch_size:end]
+        seconds = full_fit(full, stream[:end])
+        full_seconds += seconds
+        start = time.perf_counter()
+        online.partial_fit(batch['Text'].tolist(), batch['Emotion'].tolist())
+        online_ms = (time.perf_counter() - start) * 1000
+        online_seconds += online_ms / 1000
+        print(f"{end:>9} {seconds:>17.3f} {accuracy(full, test):>9.4f} {online_ms:>17.1f} "
+              f"{accuracy(online, test):>9.4f}")
+
+    compaction = full_fit(online, stream[:end])
+    print(f"total update time: full retrain {full_seconds:.2f} s, incremental {online_seconds:.3f} s "
+          f"({full_seconds / online_seconds:.0f}x less)")
+    print(f"compaction (full refit of the incremental model): {compaction:.3f} s, "
+          f"accuracy {accuracy(online, test):.4f}")
+
+
+if __name__ == "__main__":
+    main()
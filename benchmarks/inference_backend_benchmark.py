@@ -0,0 +1,57 @@
+"""Compare latency of the face emotion inference backends
+
+Usage: python benchmarks/inference_backend_benchmark.py [--repeats 200]
+
+The 'tflite' backend needs models/emotion_model.tflite, created with
+python convert_model.py.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from src.inference_backends import BACKENDS, create_backend, get_model_paths
+
+BATCH_SIZES = [1, 4, 16, 64]
+
+
+def time_backend(backend, batch, repeats):
+    """Return the median latency in milliseconds for one predict call"""
+    backend.predict(batch)  # warm up
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        backend.predict(batch)
+        timings.append((time.perf_counter() - start) * 1000)
+    return float(np.median(timings))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark face emotion inference backends")
+    parser.add_argument("--backends", nargs="+", default=sorted(BACKENDS), choices=sorted(BACKENDS))
+    parser.add_argument("--repeats", type=int, default=200, help="Calls to time per batch size")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    for name in args.backends:
+        model_path = os.path.join(ROOT_DIR, get_model_paths(name)[0])
+        if not os.path.exists(model_path):
+            print(f"{name}: skipped, {model_path} not found")
+            continue
+        start = time.perf_counter()
+        backend = create_backend(name, model_path)
+        load_ms = (time.perf_counter() - start) * 1000
+        print(f"{name}: loaded in {load_ms:.0f} ms")
+        for batch_size in BATCH_SIZES:
+            batch = rng.random((batch_size, 48, 48, 1), dtype=np.float32)
+            latency = time_backend(backend, batch, args.repeats)
+            print(f"  batch {batch_size:>3}: {latency:8.2f} ms  ({batch_size * 1000 / latency:9.1f} faces/s)")
+
+
+if __name__ == "__main__":
+    main()
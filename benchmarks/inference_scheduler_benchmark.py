@@ -0,0 +1,88 @@
+"""Compare direct and micro-batched emotion analysis under concurrent requests
+
+Trains an emotion TextAnalyzer on the voice emotion dataset, then runs
+--requests single-text calls from N client threads (the way request
+threads of the server call it), for each concurrency level:
+  - direct: every thread calls analyze_emotion itself;
+  - scheduled: the calls go through a MicroBatcher (ScheduledTextAnalyzer)
+    with each --max-wait-ms setting.
+Reports requests/s, p50/p99 latency and the mean batch size.
+
+Usage: python benchmarks/inference_scheduler_benchmark.py [--concurrency 1,8,32,64] [--max-wait-ms 0,5]
+                                                          [--requests 4000]
+"""
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from src.inference_scheduler import MicroBatcher, ScheduledTextAnalyzer, analyzer_batches
+from src.text_analysis import TextAnalyzer
+
+DATASET = os.path.join(ROOT_DIR, "data", "voice_emotion_dataset.csv")
+
+
+def run_clients(analyze, texts, concurrency):
+    """Latencies in ms of analyze(text) for every text, split over concurrency threads, and the wall time"""
+    latencies = []
+    lock = threading.Lock()
+
+    def client(part):
+        local = []
+        for text in part:
+            start = time.perf_counter()
+            analyze(text)
+            local.append((time.perf_counter() - start) * 1000)
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=client, args=(texts[i::concurrency],)) for i in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return np.array(latencies), time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inference scheduler benchmark")
+    parser.add_argument("--concurrency", default="1,8,32,64")
+    parser.add_argument("--max-wait-ms", default="0,5")
+    parser.add_argument("--max-batch-size", type=int, default=64)
+    parser.add_argument("--requests", type=int, default=4000)
+    args = parser.parse_args()
+
+    analyzer = TextAnalyzer(incremental=False)
+    analyzer.train_emotion_model([DATASET])
+    texts = pd.read_csv(DATASET)['Text'].astype(str).tolist()
+    texts = random.Random(0).choices(texts, k=args.requests)
+
+    print(f"{args.requests} single-text requests, max batch size {args.max_batch_size}")
+    print(f"{'clients':>7} {'mode':<16} {'req/s':>8} {'p50 ms':>7} {'p99 ms':>7} {'batch':>6}")
+    for concurrency in [int(count) for count in args.concurrency.split(',')]:
+        latencies, seconds = run_clients(analyzer.analyze_emotion, texts, concurrency)
+        print(f"{concurrency:>7} {'direct':<16} {len(texts) / seconds:>8.0f} {np.percentile(latencies, 50):>7.2f} "
+              f"{np.percentile(latencies, 99):>7.2f} {1:>6.1f}")
+        for max_wait_ms in [float(wait) for wait in args.max_wait_ms.split(',')]:
+            batcher = MicroBatcher('emotion', analyzer_batches('analyze_emotion_batch'),
+                                   max_batch_size=args.max_batch_size, max_wait=max_wait_ms / 1000,
+                                   max_queue=len(texts))
+            scheduled = ScheduledTextAnalyzer(analyzer, batcher, batcher)
+            latencies, seconds = run_clients(scheduled.analyze_emotion, texts, concurrency)
+            stats = batcher.get_stats()
+            print(f"{concurrency:>7} {f'batched {max_wait_ms:g} ms':<16} {len(texts) / seconds:>8.0f} "
+                  f"{np.percentile(latencies, 50):>7.2f} {np.percentile(latencies, 99):>7.2f} "
+                  f"{stats['mean_batch_size']:>6.1f}")
+
+
+if __name__ == "__main__":
+    main()
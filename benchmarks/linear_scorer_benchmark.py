@@ -0,0 +1,133 @@
+"""Check the NumPy LinearScorer against sklearn and compare single-text latency
+
+For each bundled dataset, trains an emotion TextAnalyzer (TF-IDF +
+logistic regression) and a binary model on the same features, plus a
+sentiment TextAnalyzer on emotion_sentences.csv, then
+  - parity: scores every sentence of both datasets with sklearn
+    (vectorizer.transform + predict_proba) and with the LinearScorer,
+    reporting the largest probability difference and label mismatches;
+  - latency: p50/p99 of one text per call, for the model call alone and
+    for a whole analyze_emotion call, with sklearn and with the scorer.
+The script exits with status 1 when any model differs from sklearn by more
+than TOLERANCE or predicts a different label for any sentence, so it can
+run as a parity check (--parity-only skips the latency measurements).
+
+Usage: python benchmarks/linear_scorer_benchmark.py [--requests N] [--parity-only]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LogisticRegression
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from src.linear_scorer import LinearScorer
+from src.text_analysis import TextAnalyzer
+
+DATASETS = [os.path.join(ROOT_DIR, "data", "emotion_sentences.csv"),
+            os.path.join(ROOT_DIR, "data", "voice_emotion_dataset.csv")]
+# Largest probability difference accepted, the same as TextAnalyzer._build_scorer
+TOLERANCE = 1e-9
+
+
+def read_texts(path):
+    df = pd.read_csv(path)
+    return df['Text' if 'Text' in df.columns else 'Sentence'].astype(str).tolist()
+
+
+def parity(vectorizer, model, processed):
+    """Largest absolute probability difference and number of differing labels"""
+    scorer = LinearScorer.from_model(vectorizer, model)
+    expected = model.predict_proba(vectorizer.transform(processed))
+    actual = scorer.predict_proba(scorer.transform(processed))
+    mismatches = int((model.classes_[expected.argmax(axis=1)] != scorer.classes[actual.argmax(axis=1)]).sum())
+    return float(np.abs(expected - actual).max()), mismatches
+
+
+def check_parity(name, vectorizer, model, processed):
+    """Print the parity of one model; returns whether it is within TOLERANCE with no label mismatches"""
+    difference, mismatches = parity(vectorizer, model, processed)
+    passed = difference <= TOLERANCE and mismatches == 0
+    print(f"  parity {name:<20} max probability difference {difference:.1e}, {mismatches} label mismatches"
+          f"{'' if passed else ' FAILED'}")
+    return passed
+
+
+def latencies(function, texts):
+    """p50 and p99 in microseconds of function(text), one call per text"""
+    samples = []
+    for text in texts:
+        start = time.perf_counter()
+        function(text)
+        samples.append((time.perf_counter() - start) * 1e6)
+    return np.percentile(samples, 50), np.percentile(samples, 99)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Linear scorer benchmark")
+    parser.add_argument("--requests", type=int, default=3000, help="Single-text calls per measurement")
+    parser.add_argument("--parity-only", action="store_true", help="Only check parity with sklearn")
+    args = parser.parse_args()
+
+    all_texts = [text for path in DATASETS for text in read_texts(path)]
+    failures = []
+
+    sentiment = TextAnalyzer(incremental=False)
+    if not sentiment.train(DATASETS[:1]) or sentiment.scorer is None:
+        failures.append("sentiment: no LinearScorer for the TF-IDF + logistic regression model")
+    else:
+        processed = sentiment.preprocessor.preprocess_batch(all_texts)
+        print(f"sentiment model: {len(sentiment.model.classes_)} classes, "
+              f"{len(sentiment.vectorizer.vocabulary_)} features, {len(processed)} texts")
+        if not check_parity("sentiment", sentiment.vectorizer, sentiment.model, processed):
+            failures.append("sentiment")
+
+    for path in DATASETS:
+        name = os.path.basename(path)
+        analyzer = TextAnalyzer(incremental=False)
+        if not analyzer.train_emotion_model([path]) or analyzer.scorer is None:
+            failures.append(f"{name}: no LinearScorer for the TF-IDF + logistic regression model")
+            continue
+        processed = analyzer.preprocessor.preprocess_batch(all_texts)
+        print(f"{name}: {len(analyzer.model.classes_)} classes, "
+              f"{len(analyzer.vectorizer.vocabulary_)} features, {len(processed)} texts")
+        if not check_parity("emotion", analyzer.vectorizer, analyzer.model, processed):
+            failures.append(f"{name} emotion")
+        features = analyzer.vectorizer.transform(processed)
+        binary = LogisticRegression(max_iter=1000).fit(features, analyzer.model.predict(features) == 0)
+        if not check_parity("binary", analyzer.vectorizer, binary, processed):
+            failures.append(f"{name} binary")
+        if args.parity_only:
+            continue
+
+        sample = random.Random(0).choices(all_texts, k=args.requests)
+        processed_sample = analyzer.preprocessor.preprocess_batch(sample)
+        scorer = analyzer.scorer
+        model_call = {
+            "sklearn": latencies(lambda text: analyzer.model.predict_proba(analyzer.vectorizer.transform([text])),
+                                 processed_sample),
+            "scorer": latencies(lambda text: scorer.predict_proba(scorer.transform([text])), processed_sample)
+        }
+        analyzer.scorer = None
+        full_call = {"sklearn": latencies(analyzer.analyze_emotion, sample)}
+        analyzer.scorer = scorer
+        full_call["scorer"] = latencies(analyzer.analyze_emotion, sample)
+        for label, results in (("model call", model_call), ("analyze_emotion", full_call)):
+            (sk50, sk99), (sc50, sc99) = results["sklearn"], results["scorer"]
+            print(f"  {label:<16} sklearn p50 {sk50:7.1f} us p99 {sk99:7.1f} us | "
+                  f"scorer p50 {sc50:6.1f} us p99 {sc99:6.1f} us ({sk50 / sc50:.1f}x at p50)")
+
+    if failures:
+        print(f"Parity check failed (tolerance {TOLERANCE:.0e}): {', '.join(failures)}")
+        sys.exit(1)
+    print(f"Parity check passed (tolerance {TOLERANCE:.0e})")
+
+
+if __name__ == "__main__":
+    main()
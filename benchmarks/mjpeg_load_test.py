@@ -0,0 +1,144 @@
+"""Load test the shared MJPEG broadcast with many concurrent viewers
+
+Serves a VideoPipeline fed by a synthetic camera over HTTP, connects 1 to
+50 MJPEG clients from a separate process and reports server CPU usage per
+viewer and the frame rate each viewer receives.
+
+Usage: python benchmarks/mjpeg_load_test.py [--clients 1 5 10 25 50] [--duration 5]
+"""
+import argparse
+import http.client
+import logging
+import multiprocessing
+import os
+import sys
+import threading
+import time
+
+import cv2
+import numpy as np
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from src.video_pipeline import VideoPipeline
+
+CLIENT_COUNTS = [1, 5, 10, 25, 50]
+
+
+class SyntheticCamera:
+    """Camera stand-in producing 640x480 frames at a fixed rate"""
+
+    def __init__(self, fps=30):
+        self.interval = 1.0 / fps
+        self.rng = np.random.default_rng(0)
+        self.background = self.rng.integers(0, 256, size=(480, 640, 3), dtype=np.uint8)
+        self.count = 0
+
+    def read(self):
+        time.sleep(self.interval)
+        self.count += 1
+        frame = self.background.copy()
+        cv2.putText(frame, str(self.count), (50, 240), cv2.FONT_HERSHEY_SIMPLEX, 2, (255, 255, 255), 3)
+        return True, frame
+
+    def isOpened(self):
+        return True
+
+    def release(self):
+        pass
+
+
+def draw_box(frame):
+    """Cheap stand-in for detection so the test measures fan-out cost"""
+    cv2.rectangle(frame, (200, 120), (440, 360), (0, 255, 0), 2)
+    return frame, None
+
+
+def make_app(pipeline):
+    from flask import Flask, Response
+
+    app = Flask(__name__)
+
+    @app.route('/video_feed')
+    def video_feed():
+        def generate():
+            subscription = pipeline.subscribe()
+            try:
+                for frame_view in subscription:
+                    yield frame_view.obj
+            finally:
+                subscription.close()
+        return Response(generate(), mimetype='multipart/x-mixed-replace; boundary=frame')
+
+    return app
+
+
+def read_stream(port, duration, results, index):
+    """Read an MJPEG stream for duration seconds and count frames"""
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+    conn.request("GET", "/video_feed")
+    response = conn.getresponse()
+    frames = 0
+    deadline = time.time() + duration
+    while time.time() < deadline:
+        chunk = response.read1(65536)
+        if not chunk:
+            break
+        frames += chunk.count(b'--frame\r\n')
+    conn.close()
+    results[index] = frames
+
+
+def run_clients(port, clients, duration, queue):
+    """Client process: open the streams from threads and report frame counts"""
+    results = [0] * clients
+    threads = [threading.Thread(target=read_stream, args=(port, duration, results, i)) for i in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    queue.put(results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MJPEG fan-out load test")
+    parser.add_argument("--clients", type=int, nargs="+", default=CLIENT_COUNTS)
+    parser.add_argument("--duration", type=float, default=5.0, help="Seconds to stream per run")
+    parser.add_argument("--port", type=int, default=5055)
+    args = parser.parse_args()
+
+    from werkzeug.serving import make_server
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+
+    pipeline = VideoPipeline(SyntheticCamera(), draw_box)
+    pipeline.start()
+    server = make_server("127.0.0.1", args.port, make_app(pipeline), threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    # Idle baseline: capture and encode with no viewers
+    cpu_start, wall_start = time.process_time(), time.perf_counter()
+    time.sleep(args.duration)
+    idle_cpu = (time.process_time() - cpu_start) / (time.perf_counter() - wall_start)
+    print(f"idle pipeline CPU: {idle_cpu * 100:.1f}% of one core")
+
+    print(f"{'clients':>8} {'server CPU %':>13} {'CPU %/viewer':>13} {'fps/viewer':>11}")
+    for clients in args.clients:
+        queue = multiprocessing.Queue()
+        process = multiprocessing.Process(target=run_clients, args=(args.port, clients, args.duration, queue))
+        cpu_start, wall_start = time.process_time(), time.perf_counter()
+        process.start()
+        results = queue.get()
+        process.join()
+        wall = time.perf_counter() - wall_start
+        cpu = (time.process_time() - cpu_start) / wall
+        per_viewer = max(cpu - idle_cpu, 0.0) / clients
+        fps = sum(results) / clients / args.duration
+        print(f"{clients:>8} {cpu * 100:>13.1f} {per_viewer * 100:>13.2f} {fps:>11.1f}")
+
+    server.shutdown()
+    pipeline.stop()
+
+
+if __name__ == "__main__":
+    main()
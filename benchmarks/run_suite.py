@@ -0,0 +1,362 @@
+"""End-to-end benchmark suite with JSON results and baseline comparison
+
+Runs offline on the bundled data and models, one group per path:
+  - face: preprocess_face and preprocess_faces, Haar detection, face model
+    batches and FrameAnalyzer (detection + batched inference, with and
+    without tracking) on synthetic frames;
+  - text: TextAnalyzer.preprocess_text and single / batch sentiment and
+    emotion throughput on data/emotion_sentences.csv and
+    data/voice_emotion_dataset.csv;
+  - training: fitting the sentiment and emotion models;
+  - cold_start: text models from the on-disk model cache, and importing
+    app.py plus create_app() in a fresh process;
+  - auth: Database.create_user, authenticate_user and get_user_by_id
+    against mongomock (or a local mongod with --mongo-uri).
+Every timing is the median of --repeats runs. The results are written as
+JSON. With --baseline each metric is compared with a saved run, changes
+worse than --threshold (default 0.10, i.e. 10%) are reported as
+regressions and the script exits with status 1. Groups whose model or
+database is not available are listed under "skipped".
+
+Usage: python benchmarks/run_suite.py [--only face,text,training,cold_start,auth] [--output results.json]
+                                      [--baseline baseline.json] [--threshold 0.1] [--repeats 5] [--quick]
+                                      [--mongo-uri mongodb://localhost:27017/]
+       python benchmarks/run_suite.py --compare results.json --baseline baseline.json [--threshold 0.1]
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+
+import cv2
+import numpy as np
+import pandas as pd
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from frame_sources import synthetic_frames
+
+SENTENCES_DATASET = os.path.join(ROOT_DIR, "data", "emotion_sentences.csv")
+VOICE_DATASET = os.path.join(ROOT_DIR, "data", "voice_emotion_dataset.csv")
+GROUPS = ("face", "text", "training", "cold_start", "auth")
+
+# Run in a fresh interpreter: prints the seconds to import app and to run create_app()
+COLD_START_SCRIPT = """
+import sys, time
+start = time.perf_counter()
+if {use_mongomock!r}:
+    import mongomock, pymongo
+    pymongo.MongoClient = mongomock.MongoClient
+sys.path.insert(0, {root!r})
+import app
+imported = time.perf_counter()
+app.create_app()
+print(imported - start, time.perf_counter() - imported)
+"""
+
+
+class Results:
+    """Metrics of one suite run: value, unit and whether lower or higher is better"""
+
+    def __init__(self):
+        self.metrics = {}
+        self.skipped = {}
+
+    def add(self, name, value, unit, better="lower"):
+        self.metrics[name] = {"value": float(value), "unit": unit, "better": better}
+        print(f"  {name:<40} {value:>12.3f} {unit}")
+
+    def skip(self, group, reason):
+        self.skipped[group] = reason
+        print(f"  skipped: {reason}")
+
+
+def median_seconds(function, repeats, warmup=1):
+    for _ in range(warmup):
+        function()
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return float(np.median(times))
+
+
+def dataset_texts(path):
+    df = pd.read_csv(path)
+    return df['Text' if 'Text' in df.columns else 'Sentence'].astype(str).tolist()
+
+
+class Suite:
+    def __init__(self, args):
+        self.args = args
+        self.results = Results()
+        self.repeats = args.repeats
+        self.scale = 0.2 if args.quick else 1.0
+        self._analyzers = None
+
+    def size(self, count):
+        return max(1, int(count * self.scale))
+
+    def analyzers(self):
+        """Sentiment and emotion analyzers trained on the bundled datasets (shared by the groups)"""
+        if self._analyzers is None:
+            from src.text_analysis import TextAnalyzer
+            sentiment = TextAnalyzer(incremental=False)
+            sentiment.train([SENTENCES_DATASET])
+            emotion = TextAnalyzer(incremental=False)
+            emotion.train_emotion_model([SENTENCES_DATASET, VOICE_DATASET])
+            self._analyzers = sentiment, emotion
+        return self._analyzers
+
+    def face(self):
+        from src.face_analysis import predict_emotions, preprocess_face, preprocess_faces
+        from src.face_detection import DetectionConfig, create_face_detector
+        from src.face_tracking import FaceTracker
+        from src.frame_analysis import FrameAnalyzer
+        from src.inference_backends import create_backend, get_model_paths
+
+        results, repeats = self.results, self.repeats
+        rng = np.random.default_rng(0)
+        crops = [rng.integers(0, 256, size=(size, size, 3), dtype=np.uint8)
+                 for size in rng.integers(60, 200, size=self.size(256))]
+        frames = list(synthetic_frames(self.size(60)))
+
+        seconds = median_seconds(lambda: [preprocess_face(crop) for crop in crops], repeats)
+        results.add("face.preprocess_face", seconds / len(crops) * 1e6, "us/face")
+        seconds = median_seconds(lambda: preprocess_faces(crops), repeats)
+        results.add("face.preprocess_faces", seconds / len(crops) * 1e6, "us/face")
+
+        detector = create_face_detector('haar', DetectionConfig())
+        grays = [cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) for frame in frames]
+        seconds = median_seconds(lambda: [detector.detect(gray) for gray in grays], repeats)
+        results.add("face.detect_haar", seconds / len(grays) * 1000, "ms/frame")
+
+        model_paths = [os.path.join(ROOT_DIR, path) for path in get_model_paths('keras')]
+        model_paths = [path for path in model_paths if os.path.exists(path)]
+        if not model_paths:
+            results.skip("face.inference", "no face emotion model in models/")
+            return
+        model = create_backend('keras', model_paths[0])
+        for batch_size in (1, 16):
+            batch = crops[:batch_size]
+            seconds = median_seconds(lambda: predict_emotions(model, batch), repeats)
+            results.add(f"face.predict_batch_{batch_size}", seconds / len(batch) * 1000, "ms/face")
+
+        predict_faces = lambda faces: predict_emotions(model, faces)
+        for name, tracker in (("every_frame", None), ("tracked", FaceTracker())):
+            analyzer = FrameAnalyzer(create_face_detector('haar', DetectionConfig()), predict_faces, tracker)
+            seconds = median_seconds(lambda: [analyzer.analyze(frame.copy()) for frame in frames], repeats)
+            results.add(f"face.frame_{name}", seconds / len(frames) * 1000, "ms/frame")
+
+    def text(self):
+        from src.analysis_context import StageTimer
+
+        results, repeats = self.results, self.repeats
+        sentiment, emotion = self.analyzers()
+        sentences = dataset_texts(SENTENCES_DATASET)
+        voice = dataset_texts(VOICE_DATASET)
+        texts = sentences[:self.size(1000)] + voice[:self.size(1000)]
+
+        seconds = median_seconds(lambda: [sentiment.preprocess_text(text) for text in texts], repeats)
+        results.add("text.preprocess_text", seconds / len(texts) * 1e6, "us/text")
+
+        single = sentences[:self.size(1000)]
+        batch = sentences[:self.size(5000)]
+        seconds = median_seconds(lambda: [sentiment.analyze_sentiment(text) for text in single], repeats)
+        results.add("text.sentiment_single", len(single) / seconds, "texts/s", "higher")
+        seconds = median_seconds(lambda: sentiment.analyze_sentiment_batch(batch, StageTimer(hooks=[])), repeats)
+        results.add("text.sentiment_batch", len(batch) / seconds, "texts/s", "higher")
+
+        single = voice[:self.size(1000)]
+        batch = voice[:self.size(5000)]
+        seconds = median_seconds(lambda: [emotion.analyze_emotion(text) for text in single], repeats)
+        results.add("text.emotion_single", len(single) / seconds, "texts/s", "higher")
+        seconds = median_seconds(lambda: emotion.analyze_emotion_batch(batch, StageTimer(hooks=[])), repeats)
+        results.add("text.emotion_batch", len(batch) / seconds, "texts/s", "higher")
+
+    def training(self):
+        from src.text_analysis import TextAnalyzer
+
+        repeats = min(self.repeats, 3)
+        seconds = median_seconds(lambda: TextAnalyzer(incremental=False).train([SENTENCES_DATASET]), repeats, 0)
+        self.results.add("training.sentiment", seconds, "s")
+        seconds = median_seconds(
+            lambda: TextAnalyzer(incremental=False).train_emotion_model([SENTENCES_DATASET, VOICE_DATASET]),
+            repeats, 0)
+        self.results.add("training.emotion", seconds, "s")
+
+    def cold_start(self):
+        from src.text_analysis import TextAnalyzer
+
+        results = self.results
+        with tempfile.TemporaryDirectory() as cache_dir:
+            tasks = (("sentiment", [SENTENCES_DATASET]), ("emotion", [SENTENCES_DATASET, VOICE_DATASET]))
+            for task, datasets in tasks:
+                cache_path = os.path.join(cache_dir, f"{task}_model.npz")
+                TextAnalyzer().train_cached(datasets, task, cache_path)
+                seconds = median_seconds(lambda: TextAnalyzer().train_cached(datasets, task, cache_path),
+                                         self.repeats, 0)
+                results.add(f"cold_start.{task}_model_from_cache", seconds, "s")
+
+            use_mongomock = self.args.mongo_uri is None
+            if use_mongomock and not module_available("mongomock"):
+                results.skip("cold_start.app", "mongomock is not installed and no --mongo-uri was given")
+                return
+            env = dict(os.environ, TEXT_MODEL_CACHE_DIR=cache_dir,
+                       EMOTION_FEEDBACK_PATH=os.path.join(cache_dir, "feedback.csv"),
+                       ANALYSIS_DIR=os.path.join(cache_dir, "analysis"))
+            if not use_mongomock:
+                env["MONGODB_URI"] = self.args.mongo_uri
+            script = COLD_START_SCRIPT.format(use_mongomock=use_mongomock, root=ROOT_DIR)
+            runs = []
+            for _ in range(1 if self.args.quick else min(self.repeats, 3)):
+                output = subprocess.run([sys.executable, "-c", script], cwd=ROOT_DIR, env=env, check=True,
+                                        stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True).stdout
+                runs.append([float(value) for value in output.strip().splitlines()[-1].split()])
+            import_seconds, create_seconds = np.median(runs, axis=0)
+            results.add("cold_start.import_app", import_seconds, "s")
+            results.add("cold_start.create_app", create_seconds, "s")
+
+    def auth(self):
+        results = self.results
+        if self.args.mongo_uri is not None:
+            os.environ["MONGODB_URI"] = self.args.mongo_uri
+        elif module_available("mongomock"):
+            # In-memory stand-in for MongoDB; must be in place before src.database connects
+            import mongomock
+            import pymongo
+            pymongo.MongoClient = mongomock.MongoClient
+        else:
+            results.skip("auth", "mongomock is not installed and no --mongo-uri was given")
+            return
+        from src.database import Database
+
+        database = Database()
+        prefix = f"bench_{uuid.uuid4().hex[:8]}"
+        users = [(f"{prefix}_{i}", f"{prefix}_{i}@example.com", f"password-{i}") for i in range(self.size(10))]
+        try:
+            create_times, login_times, user_ids = [], [], []
+            for username, email, password in users:
+                start = time.perf_counter()
+                created = database.create_user(username, email, password)
+                create_times.append(time.perf_counter() - start)
+                if not created['success']:
+                    raise RuntimeError(created['message'])
+                user_ids.append(created['user']['_id'])
+            for _, email, password in users:
+                start = time.perf_counter()
+                if not database.authenticate_user(email, password)['success']:
+                    raise RuntimeError(f"Could not authenticate {email}")
+                login_times.append(time.perf_counter() - start)
+            results.add("auth.create_user", np.median(create_times) * 1000, "ms")
+            results.add("auth.authenticate_user", np.median(login_times) * 1000, "ms")
+            lookups = user_ids * max(1, self.size(200) // len(user_ids))
+            seconds = median_seconds(lambda: [database.get_user_by_id(user_id) for user_id in lookups], self.repeats)
+            results.add("auth.get_user_by_id", seconds / len(lookups) * 1000, "ms")
+        finally:
+            database.users.delete_many({'username': {'$regex': f"^{prefix}_"}})
+
+
+def module_available(name):
+    try:
+        __import__(name)
+        return True
+    except ImportError:
+        return False
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT_DIR, stdout=subprocess.PIPE,
+                              stderr=subprocess.DEVNULL, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current, baseline, threshold):
+    """Print every metric against the baseline; returns the names of the regressions"""
+    regressions = []
+    print(f"{'metric':<40} {'baseline':>12} {'current':>12} {'change':>8}  status")
+    for name, metric in sorted(current["results"].items()):
+        base = baseline["results"].get(name)
+        if base is None or base["value"] == 0:
+            print(f"{name:<40} {'-':>12} {metric['value']:>12.3f} {'-':>8}  new")
+            continue
+        change = (metric["value"] - base["value"]) / base["value"]
+        worse = change if metric["better"] == "lower" else -change
+        if worse > threshold:
+            status = "REGRESSION"
+            regressions.append(name)
+        elif worse < -threshold:
+            status = "improved"
+        else:
+            status = "ok"
+        print(f"{name:<40} {base['value']:>12.3f} {metric['value']:>12.3f} {change:>+8.1%}  {status}")
+    for name in sorted(set(baseline["results"]) - set(current["results"])):
+        print(f"{name:<40} {baseline['results'][name]['value']:>12.3f} {'-':>12} {'-':>8}  missing")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end benchmark suite")
+    parser.add_argument("--only", default=",".join(GROUPS), help="Comma separated groups to run")
+    parser.add_argument("--output", default=None, help="Write the results to this JSON file")
+    parser.add_argument("--baseline", default=None, help="Saved results to compare with")
+    parser.add_argument("--compare", default=None, help="Compare these saved results instead of running")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Relative slowdown reported as a regression")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--quick", action="store_true", help="Smaller inputs and fewer repeats")
+    parser.add_argument("--mongo-uri", default=None, help="Use this MongoDB instead of mongomock")
+    args = parser.parse_args()
+
+    if args.compare:
+        if not args.baseline:
+            parser.error("--compare needs --baseline")
+        with open(args.compare) as f:
+            current = json.load(f)
+    else:
+        groups = [group for group in args.only.split(",") if group]
+        unknown = set(groups) - set(GROUPS)
+        if unknown:
+            parser.error(f"unknown groups: {', '.join(sorted(unknown))}")
+        if args.quick:
+            args.repeats = min(args.repeats, 2)
+        suite = Suite(args)
+        for group in groups:
+            print(f"[{group}]")
+            getattr(suite, group)()
+        current = {
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "git_commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "settings": {"groups": groups, "repeats": args.repeats, "quick": args.quick,
+                         "mongo": "mongodb" if args.mongo_uri else "mongomock"},
+            "results": suite.results.metrics,
+            "skipped": suite.results.skipped
+        }
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump(current, f, indent=2)
+            print(f"Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(current, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s) beyond {args.threshold:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
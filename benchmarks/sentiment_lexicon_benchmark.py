@@ -0,0 +1,144 @@
+"""Compare the compiled sentiment lexicon with the original dict implementation
+
+Builds a 10k-entry lexicon CSV (words of the bundled sentences plus
+filler words, seeded random polarity), then measures:
+  - load time: the original pd.read_csv + dict on every TextAnalyzer(),
+    compiling the index once, loading the index, and the shared instance
+    later analyzers get;
+  - lookup throughput over the preprocessed bundled sentences, checking
+    that both give the same results;
+  - the lexicon + model preprocessing path per text: the original
+    preprocessed twice, the lexicon now reuses the model's tokens;
+  - the same lookups with 1,000 weighted multi-word phrases added.
+
+Usage: python benchmarks/sentiment_lexicon_benchmark.py [--entries N] [--texts N]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from src.sentiment_lexicon import SentimentLexicon, compile_lexicon, load_lexicon
+from src.text_preprocessing import TextPreprocessor
+
+DATASETS = [os.path.join(ROOT_DIR, "data", "emotion_sentences.csv"),
+            os.path.join(ROOT_DIR, "data", "voice_emotion_dataset.csv")]
+
+
+def legacy_load(path):
+    """TextAnalyzer.load_sentiment_words as it was before the compiled lexicon"""
+    df = pd.read_csv(path)
+    return dict(zip(df['word'], df['sentiment']))
+
+
+def legacy_sentiment(sentiment_words, processed_text):
+    """The original dictionary scoring of preprocessed text"""
+    sentiment_scores = {'positive': 0, 'negative': 0, 'neutral': 0}
+    for word in processed_text.split():
+        if word.startswith('NOT_'):
+            base_word = word[4:]
+            if base_word in sentiment_words:
+                original_sentiment = sentiment_words[base_word]
+                if original_sentiment == 'positive':
+                    sentiment_scores['negative'] += 1
+                elif original_sentiment == 'negative':
+                    sentiment_scores['positive'] += 1
+                else:
+                    sentiment_scores['neutral'] += 1
+        elif word in sentiment_words:
+            sentiment_scores[sentiment_words[word]] += 1
+    total_words = sum(sentiment_scores.values())
+    if total_words == 0:
+        return None
+    dominant_sentiment = max(sentiment_scores, key=sentiment_scores.get)
+    return {'sentiment': dominant_sentiment, 'confidence': sentiment_scores[dominant_sentiment] / total_words}
+
+
+def build_lexicon(path, texts, preprocessor, entries, phrases=0, seed=0):
+    rng = random.Random(seed)
+    words = sorted({word for text in preprocessor.preprocess_batch(texts) for word in text.split()
+                    if not word.startswith('NOT_')})
+    while len(words) < entries:
+        words.append(''.join(rng.choices('abcdefghijklmnopqrstuvwxyz', k=rng.randint(4, 10))))
+    rows = [(word, rng.choice(['positive', 'negative', 'neutral']), 1.0) for word in words[:entries]]
+    vocabulary = words[:200]
+    for _ in range(phrases):
+        phrase = ' '.join(rng.sample(vocabulary, rng.randint(2, 3)))
+        rows.append((phrase, rng.choice(['positive', 'negative']), round(rng.uniform(1.5, 3.0), 1)))
+    pd.DataFrame(rows, columns=['word', 'sentiment', 'weight']).to_csv(path, index=False)
+
+
+def rate(function, count, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+    return result, count / best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sentiment lexicon benchmark")
+    parser.add_argument("--entries", type=int, default=10000)
+    parser.add_argument("--texts", type=int, default=20000)
+    args = parser.parse_args()
+
+    texts = []
+    for path in DATASETS:
+        df = pd.read_csv(path)
+        texts.extend(df['Text' if 'Text' in df.columns else 'Sentence'].astype(str))
+    texts = random.Random(1).sample(texts, min(args.texts, len(texts)))
+    preprocessor = TextPreprocessor()
+    processed = preprocessor.preprocess_batch(texts)
+    tokens = [text.split() for text in processed]
+    token_count = sum(len(t) for t in tokens)
+
+    with tempfile.TemporaryDirectory() as directory:
+        csv_path = os.path.join(directory, "sentiment_words.csv")
+        index_path = os.path.join(directory, "sentiment_lexicon.npz")
+        build_lexicon(csv_path, texts, preprocessor, args.entries)
+
+        print(f"{args.entries} entries, {len(texts)} texts, {token_count} tokens")
+        _, legacy_loads = rate(lambda: legacy_load(csv_path), 1)
+        start = time.perf_counter()
+        compile_lexicon(csv_path, index_path, preprocessor)
+        compile_ms = (time.perf_counter() - start) * 1000
+        _, index_loads = rate(lambda: SentimentLexicon.load(index_path), 1)
+        load_lexicon(csv_path, index_path, preprocessor)
+        _, shared_loads = rate(lambda: load_lexicon(csv_path, index_path, preprocessor), 1)
+        print(f"load: original {1000 / legacy_loads:.1f} ms per analyzer; compile once {compile_ms:.0f} ms, "
+              f"index load {1000 / index_loads:.1f} ms, shared instance {1000 / shared_loads:.2f} ms "
+              f"({os.path.getsize(index_path) / 1024:.0f} KB index)")
+
+        sentiment_words = legacy_load(csv_path)
+        lexicon = SentimentLexicon.load(index_path)
+        legacy, legacy_rate = rate(lambda: [legacy_sentiment(sentiment_words, text) for text in processed], len(texts))
+        compiled, compiled_rate = rate(lambda: [lexicon.sentiment(t) for t in tokens], len(texts))
+        print(f"lookup: original {legacy_rate:.0f} texts/s, compiled {compiled_rate:.0f} texts/s "
+              f"({compiled_rate * token_count / len(texts) / 1e6:.1f}M tokens/s), same results {legacy == compiled}")
+
+        sample = texts[:2000]
+        _, legacy_path = rate(lambda: [(legacy_sentiment(sentiment_words, preprocessor.preprocess(text)),
+                                        preprocessor.preprocess(text)) for text in sample], len(sample))
+        _, shared_path = rate(lambda: [lexicon.sentiment(preprocessor.preprocess(text).split()) for text in sample],
+                              len(sample))
+        print(f"lexicon + model preprocessing: original {legacy_path:.0f} texts/s (two passes), "
+              f"shared tokens {shared_path:.0f} texts/s")
+
+        build_lexicon(csv_path, texts, preprocessor, args.entries, phrases=1000)
+        compile_lexicon(csv_path, index_path, preprocessor)
+        lexicon = SentimentLexicon.load(index_path)
+        results, phrase_rate = rate(lambda: [lexicon.sentiment(t) for t in tokens], len(texts))
+        changed = sum(a != b for a, b in zip(results, compiled))
+        print(f"with 1000 weighted phrases: {phrase_rate:.0f} texts/s, {changed} results changed by phrases/weights")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""Throughput of the gunicorn serving mode at different worker counts
+
+For each worker count, starts `gunicorn -c gunicorn.conf.py wsgi:app` on a
+local port (models preloaded in the master, compute threads capped per
+worker), waits for /health, then sends --requests POSTs to --endpoint
+from --concurrency keep-alive client threads, using sentences from the
+bundled datasets. Reports requests/s, p50/p99 latency, the startup time
+and the proportional set size (PSS) of the master plus workers, which
+shows how much memory the workers share.
+
+The text result cache is disabled (TEXT_CACHE_SIZE=0) so every request
+runs the model. The app needs its MongoDB (MONGODB_URI) as usual.
+
+Usage: python benchmarks/serving_benchmark.py [--workers 1,2,4,8] [--requests 2000] [--concurrency 16]
+                                              [--endpoint /analyze_text]
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import signal
+import subprocess
+import sys
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATASETS = [os.path.join(ROOT_DIR, "data", "emotion_sentences.csv"),
+            os.path.join(ROOT_DIR, "data", "voice_emotion_dataset.csv")]
+
+
+def wait_until_ready(port, process, timeout):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"gunicorn exited with code {process.returncode}")
+        try:
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=2)
+            connection.request("GET", "/health")
+            if connection.getresponse().status == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError("gunicorn did not become ready")
+
+
+def total_pss_mb(pid):
+    """PSS of a process and its children in MB, or None where /proc is not available"""
+    pids = [pid]
+    try:
+        for task in os.listdir(f"/proc/{pid}/task"):
+            with open(f"/proc/{pid}/task/{task}/children") as f:
+                pids.extend(int(child) for child in f.read().split())
+        total = 0
+        for process_id in pids:
+            with open(f"/proc/{process_id}/smaps_rollup") as f:
+                for line in f:
+                    if line.startswith("Pss:"):
+                        total += int(line.split()[1])
+        return total / 1024
+    except OSError:
+        return None
+
+
+def run_load(port, endpoint, texts, requests, concurrency):
+    """Latencies in seconds of requests POSTs, and the wall time they took"""
+    latencies = []
+    messages = set()
+    lock = threading.Lock()
+    counter = iter(range(requests))
+
+    def client():
+        connection = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+        local, local_messages = [], set()
+        for i in counter:
+            body = json.dumps({"text": texts[i % len(texts)]})
+            start = time.perf_counter()
+            connection.request("POST", endpoint, body, {"Content-Type": "application/json"})
+            response = connection.getresponse()
+            payload = json.loads(response.read())
+            local.append(time.perf_counter() - start)
+            local_messages.add(payload.get("message"))
+        connection.close()
+        with lock:
+            latencies.extend(local)
+            messages.update(local_messages)
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, time.perf_counter() - start, messages
+
+
+def main():
+    parser = argparse.ArgumentParser(description="gunicorn serving benchmark")
+    parser.add_argument("--workers", default="1,2,4,8")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--endpoint", default="/analyze_text")
+    parser.add_argument("--port", type=int, default=5055)
+    parser.add_argument("--startup-timeout", type=float, default=600)
+    args = parser.parse_args()
+
+    texts = []
+    for path in DATASETS:
+        df = pd.read_csv(path)
+        texts.extend(df['Text' if 'Text' in df.columns else 'Sentence'].astype(str))
+    random.Random(0).shuffle(texts)
+
+    print(f"{os.cpu_count()} CPUs, {args.requests} requests to {args.endpoint}, concurrency {args.concurrency}")
+    print(f"{'workers':>7} {'threads':>7} {'startup s':>9} {'req/s':>8} {'p50 ms':>7} {'p99 ms':>7} {'PSS MB':>7}")
+    for workers in [int(count) for count in args.workers.split(',')]:
+        env = dict(os.environ, SERVE_WORKERS=str(workers), SERVE_BIND=f"127.0.0.1:{args.port}", TEXT_CACHE_SIZE="0")
+        start = time.perf_counter()
+        process = subprocess.Popen([sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "wsgi:app"],
+                                   cwd=ROOT_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            wait_until_ready(args.port, process, args.startup_timeout)
+            # Every worker answers before the clock starts
+            run_load(args.port, args.endpoint, texts, workers * 20, min(args.concurrency, workers * 2))
+            startup = time.perf_counter() - start
+            latencies, seconds, messages = run_load(args.port, args.endpoint, texts, args.requests,
+                                                    args.concurrency)
+            pss = total_pss_mb(process.pid)
+        finally:
+            process.send_signal(signal.SIGTERM)
+            process.wait(timeout=60)
+        latencies = np.array(latencies) * 1000
+        threads = env.get('SERVE_COMPUTE_THREADS') or max(1, (os.cpu_count() or 1) // workers)
+        print(f"{workers:>7} {threads:>7} {startup:>9.1f} {len(latencies) / seconds:>8.0f} "
+              f"{np.percentile(latencies, 50):>7.1f} {np.percentile(latencies, 99):>7.1f} "
+              f"{'n/a' if pss is None else f'{pss:.0f}':>7}")
+        if len(messages) == 1 and "not trained" in str(next(iter(messages))):
+            print(f"  note: {args.endpoint} answered '{next(iter(messages))}' - the model has no training data")
+
+
+if __name__ == "__main__":
+    main()
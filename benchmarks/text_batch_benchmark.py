@@ -0,0 +1,76 @@
+"""Compare per-text analysis with the batch text analysis API
+
+Trains (or loads from a temporary cache) the sentiment and emotion models,
+then analyzes a batch of sentences from the bundled CSVs two ways: one
+text at a time like the original endpoints (transform a 1-element list,
+then predict and predict_proba) and with analyze_*_batch. Reports
+texts/sec, the speedup and whether both give the same labels.
+
+Usage: python benchmarks/text_batch_benchmark.py [--batch-size N] [--repeat N]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from src.text_analysis import TextAnalyzer
+
+SENTIMENT_DATASETS = [os.path.join(ROOT_DIR, "data", "emotion_sentences.csv")]
+EMOTION_DATASETS = [os.path.join(ROOT_DIR, "data", "emotion_sentences.csv"),
+                    os.path.join(ROOT_DIR, "data", "voice_emotion_dataset.csv")]
+
+
+def per_text(analyzer, text, labels):
+    """The original single-text model path"""
+    text_vectorized = analyzer.vectorizer.transform([analyzer.preprocess_text(text)])
+    prediction = analyzer.model.predict(text_vectorized)[0]
+    probabilities = analyzer.model.predict_proba(text_vectorized)[0]
+    return labels[prediction].lower(), float(np.max(probabilities))
+
+
+def rate(function, count, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+    return result, count / best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch text analysis benchmark")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    sentences = pd.read_csv(EMOTION_DATASETS[1])['Text'].astype(str)
+    texts = sentences.sample(args.batch_size, replace=len(sentences) < args.batch_size,
+                             random_state=0).tolist()
+
+    print(f"{'model':>10} {'texts':>6} {'per text/s':>11} {'batch/s':>10} {'speedup':>8} {'same labels':>12}")
+    with tempfile.TemporaryDirectory() as cache_dir:
+        for task, datasets in (('sentiment', SENTIMENT_DATASETS), ('emotion', EMOTION_DATASETS)):
+            analyzer = TextAnalyzer()
+            analyzer.train_cached(datasets, task, os.path.join(cache_dir, f"{task}_model.npz"))
+            if task == 'sentiment':
+                labels, key, batch = analyzer.reverse_label_mapping, 'sentiment', analyzer.analyze_sentiment_batch
+            else:
+                labels, key, batch = analyzer.emotion_reverse_mapping, 'emotion', analyzer.analyze_emotion_batch
+
+            single, single_rate = rate(lambda: [per_text(analyzer, text, labels) for text in texts],
+                                       len(texts), args.repeat)
+            batched, batch_rate = rate(lambda: batch(texts), len(texts), args.repeat)
+            same = [label for label, _ in single] == [result[key].lower() for result in batched]
+            print(f"{task:>10} {len(texts):>6} {single_rate:>11.0f} {batch_rate:>10.0f} "
+                  f"{batch_rate / single_rate:>7.1f}x {str(same):>12}")
+
+
+if __name__ == "__main__":
+    main()
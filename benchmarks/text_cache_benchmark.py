@@ -0,0 +1,77 @@
+"""Measure the text result cache on a Zipfian request stream
+
+Draws requests from the distinct sentences of the bundled CSVs with
+Zipf-distributed popularity (a few phrases are very frequent, most are
+rare), then serves them one by one with the plain TextAnalyzer and with
+CachedTextAnalyzer at several cache sizes. Reports requests/sec, hit rate,
+evictions and whether the cached results match the uncached ones.
+
+Usage: python benchmarks/text_cache_benchmark.py [--requests N] [--zipf-s S] [--sizes 100 1000 10000]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from src.result_cache import CachedTextAnalyzer, ResultCache
+from src.text_analysis import TextAnalyzer
+
+DATASETS = [os.path.join(ROOT_DIR, "data", "emotion_sentences.csv"),
+            os.path.join(ROOT_DIR, "data", "voice_emotion_dataset.csv")]
+
+
+def zipf_requests(texts, count, s, seed=0):
+    """count texts drawn with probability proportional to 1 / rank**s"""
+    rng = np.random.default_rng(seed)
+    weights = 1.0 / np.arange(1, len(texts) + 1) ** s
+    order = rng.permutation(len(texts))
+    picks = rng.choice(len(texts), size=count, p=weights / weights.sum())
+    return [texts[order[i]] for i in picks]
+
+
+def serve(analyzer, requests):
+    start = time.perf_counter()
+    results = [analyzer.analyze_emotion(text) for text in requests]
+    return results, len(requests) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Text result cache benchmark")
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--zipf-s", type=float, default=1.1)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    args = parser.parse_args()
+
+    texts = []
+    for path in DATASETS:
+        df = pd.read_csv(path)
+        texts.extend(df['Text' if 'Text' in df.columns else 'Sentence'].astype(str))
+    texts = list(dict.fromkeys(texts))
+    requests = zipf_requests(texts, args.requests, args.zipf_s)
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        analyzer = TextAnalyzer()
+        analyzer.train_cached(DATASETS, 'emotion', os.path.join(cache_dir, "emotion_model.npz"))
+
+    print(f"{len(requests)} requests over {len(texts)} distinct texts "
+          f"({len(set(requests))} requested), zipf s={args.zipf_s}")
+    baseline, baseline_rate = serve(analyzer, requests)
+    print(f"{'cache size':>10} {'req/s':>9} {'speedup':>8} {'hit rate':>9} {'evictions':>10} {'same':>6}")
+    print(f"{'none':>10} {baseline_rate:>9.0f} {1.0:>7.1f}x {'-':>9} {'-':>10} {'-':>6}")
+    for size in args.sizes:
+        cache = ResultCache(max_size=size, ttl=3600)
+        results, rate = serve(CachedTextAnalyzer(analyzer, cache), requests)
+        stats = cache.get_stats()
+        print(f"{size:>10} {rate:>9.0f} {rate / baseline_rate:>7.1f}x {stats['hit_rate']:>9.1%} "
+              f"{stats['evictions']:>10} {str(results == baseline):>6}")
+
+
+if __name__ == "__main__":
+    main()
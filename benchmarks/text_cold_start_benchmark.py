@@ -0,0 +1,67 @@
+"""Measure text model startup with and without the on-disk model cache
+
+Trains the sentiment and emotion models from the CSVs in data/ with an
+empty cache (the old behaviour on every boot), then starts again with the
+cache written by the first run, and checks both give the same predictions.
+
+Usage: python benchmarks/text_cold_start_benchmark.py [--sentiment-datasets ...] [--emotion-datasets ...]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from src.text_analysis import TextAnalyzer
+
+SAMPLE_TEXTS = [
+    "I am so happy with how everything turned out today",
+    "This is not good at all, I am really upset",
+    "I can't believe this just happened!",
+    "The meeting is at three o'clock",
+    "I'm scared of what might happen next"
+]
+
+
+def start(task, datasets, cache_path):
+    """Build an analyzer like get_*_analyzer() does; returns (analyzer, seconds)"""
+    begin = time.perf_counter()
+    analyzer = TextAnalyzer()
+    if not analyzer.train_cached(datasets, task, cache_path):
+        raise RuntimeError(f"Could not train the {task} model")
+    return analyzer, time.perf_counter() - begin
+
+
+def probabilities(analyzer, texts):
+    features = analyzer.vectorizer.transform([analyzer.preprocess_text(text) for text in texts])
+    return analyzer.model.predict_proba(features)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Text model cold start benchmark")
+    parser.add_argument("--sentiment-datasets", nargs="+",
+                        default=[os.path.join(ROOT_DIR, "data", "emotion_sentences.csv")])
+    parser.add_argument("--emotion-datasets", nargs="+",
+                        default=[os.path.join(ROOT_DIR, "data", "emotion_sentences.csv"),
+                                 os.path.join(ROOT_DIR, "data", "voice_emotion_dataset.csv")])
+    args = parser.parse_args()
+    datasets = {'sentiment': args.sentiment_datasets, 'emotion': args.emotion_datasets}
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        print(f"{'model':>10} {'no cache (s)':>13} {'cached (ms)':>12} {'speedup':>8} {'same output':>12}")
+        for task in ('sentiment', 'emotion'):
+            cache_path = os.path.join(cache_dir, f"{task}_model.npz")
+            trained, cold = start(task, datasets[task], cache_path)
+            cached, warm = start(task, datasets[task], cache_path)
+            same = np.allclose(probabilities(trained, SAMPLE_TEXTS), probabilities(cached, SAMPLE_TEXTS))
+            print(f"{task:>10} {cold:>13.2f} {warm * 1000:>12.1f} {cold / warm:>7.0f}x {str(same):>12}")
+            print(f"{'':>10} artifact size: {os.path.getsize(cache_path) / 1024:.0f} KB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""Compare TextPreprocessor with the original per-sentence preprocess_text
+
+Runs the original implementation (word_tokenize per sentence and the
+stopword set rebuilt on every call), TextPreprocessor.preprocess and
+TextPreprocessor.preprocess_batch over the bundled CSVs, checks that all
+three give identical output and reports sentences/sec. Then checks the
+regex tokenizer against word_tokenize, and the output against the original
+function, on EDGE_CASES and on --random random strings of letters and
+sentence punctuation. Exits with status 1 on any difference.
+
+Usage: python benchmarks/text_preprocessing_benchmark.py [--limit N] [--random N] [--seed S] [csv ...]
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+import pandas as pd
+from nltk.corpus import stopwords
+from nltk.tokenize import word_tokenize
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from src.text_preprocessing import NEGATION_WORDS, TextPreprocessor, _SIMPLE_TEXT
+
+DEFAULT_DATASETS = [
+    os.path.join(ROOT_DIR, "data", "emotion_sentences.csv"),
+    os.path.join(ROOT_DIR, "data", "voice_emotion_dataset.csv")
+]
+# Inputs where the regex tokenizer once disagreed with word_tokenize
+EDGE_CASES = [
+    "!no :,x",
+    "...not it's' ",
+    "not it's'",
+    "no,,x",
+    "no :: x",
+    "never:,ok",
+    "no... x",
+    "no.. x",
+    "it's' x",
+    "i can't, won't; shan't!"
+]
+# Characters of the random strings: mostly what the regex tokenizer handles
+RANDOM_ALPHABET = "abcdeinostx '’,.:;!?-"
+
+
+def legacy_preprocess_text(text, negation_words=NEGATION_WORDS):
+    """TextAnalyzer.preprocess_text as it was before TextPreprocessor"""
+    text = text.lower()
+    tokens = word_tokenize(text)
+    processed_tokens = []
+    negate = False
+    for token in tokens:
+        if token in negation_words:
+            negate = True
+            processed_tokens.append(token)
+        elif negate and token.isalpha():
+            processed_tokens.append(f"NOT_{token}")
+            negate = False
+        else:
+            processed_tokens.append(token)
+            if token not in [',', '.', '!', '?', ';', ':']:
+                negate = False
+    text = ' '.join(processed_tokens)
+    text = re.sub(r'[^a-zA-Z\s_]', ' ', text)
+    text = re.sub(r'\s+', ' ', text).strip()
+    words = text.split()
+    stop_words = set(stopwords.words('english'))
+    words = [word for word in words if word not in stop_words or word.startswith('NOT_')]
+    return ' '.join(words)
+
+
+def load_texts(path):
+    df = pd.read_csv(path)
+    column = next(name for name in ('Sentence', 'sentence', 'Text') if name in df.columns)
+    return df[column].astype(str)
+
+
+def timed(function, texts):
+    start = time.perf_counter()
+    result = function(texts)
+    return result, len(texts) / (time.perf_counter() - start)
+
+
+def differences(preprocessor, texts):
+    """Texts whose tokens differ from word_tokenize or whose output differs from the original function"""
+    return [text for text in texts
+            if preprocessor.tokenize(text.lower()) != word_tokenize(text.lower())
+            or preprocessor.preprocess(text) != legacy_preprocess_text(text)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Text preprocessing micro-benchmark")
+    parser.add_argument("datasets", nargs="*", default=DEFAULT_DATASETS)
+    parser.add_argument("--limit", type=int, default=None, help="Rows per dataset for the original function")
+    parser.add_argument("--random", type=int, default=20000, help="Random strings to check")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    failures = []
+
+    print(f"{'dataset':>28} {'rows':>6} {'regex path':>10} {'original/s':>11} "
+          f"{'preprocess/s':>13} {'batch/s':>10} {'identical':>10}")
+    for path in args.datasets:
+        texts = load_texts(path)
+        sample = texts[:args.limit] if args.limit else texts
+        preprocessor = TextPreprocessor()
+        preprocessor.stop_words  # load outside the timed region
+
+        legacy, legacy_rate = timed(lambda items: [legacy_preprocess_text(t) for t in items], sample)
+        single, single_rate = timed(lambda items: [preprocessor.preprocess(t) for t in items], sample)
+        batch, batch_rate = timed(preprocessor.preprocess_batch, sample)
+        identical = legacy == single == batch.tolist()
+        simple = sample.str.lower().map(lambda t: _SIMPLE_TEXT.fullmatch(t) is not None).mean()
+        print(f"{os.path.basename(path):>28} {len(sample):>6} {simple:>10.1%} {legacy_rate:>11.0f} "
+              f"{single_rate:>13.0f} {batch_rate:>10.0f} {str(identical):>10}")
+        if not identical:
+            failures.extend(text for text, old, new in zip(sample, legacy, single) if old != new)
+
+    rng = random.Random(args.seed)
+    random_texts = [''.join(rng.choice(RANDOM_ALPHABET) for _ in range(rng.randint(1, 16)))
+                    for _ in range(args.random)]
+    preprocessor = TextPreprocessor()
+    for name, texts in (("edge cases", EDGE_CASES), ("random strings", random_texts)):
+        different = differences(preprocessor, texts)
+        print(f"{name}: {len(texts)} texts, {len(different)} differ from word_tokenize / the original")
+        failures.extend(different)
+
+    if failures:
+        for text in failures[:20]:
+            print(f"  {text!r}: {word_tokenize(text.lower())} vs {preprocessor.tokenize(text.lower())}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Measure parallel preprocessing and featurization of the training data
+
+Builds a larger corpus from the bundled emotion CSVs (each sentence is
+repeated with numbered variations so that every copy is a distinct text),
+then trains the emotion model with 1..N worker processes for both the
+'tfidf' and 'hashing' featurizers. Prints the time per training stage,
+the speedup of preprocess+featurize over one worker, and whether the
+fitted coefficients match the single-worker run.
+
+Usage: python benchmarks/training_pipeline_benchmark.py [--copies N] [--workers 1 2 4] [--featurizers tfidf hashing]
+"""
+import argparse
+import os
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from src.text_analysis import TextAnalyzer
+
+DEFAULT_DATASETS = [
+    os.path.join(ROOT_DIR, "data", "emotion_sentences.csv"),
+    os.path.join(ROOT_DIR, "data", "voice_emotion_dataset.csv")
+]
+FILLERS = ["really", "today", "again", "honestly", "right now", "at home", "at work", "this week"]
+
+
+def build_corpus(datasets, copies, directory):
+    """Write copies of each dataset with varied sentences; returns the new paths"""
+    paths = []
+    for path in datasets:
+        df = pd.read_csv(path)
+        column = 'Text' if 'Text' in df.columns else 'Sentence'
+        frames = [df]
+        for copy in range(1, copies):
+            varied = df.copy()
+            filler = FILLERS[copy % len(FILLERS)]
+            varied[column] = varied[column].astype(str) + f" {filler} {copy}"
+            frames.append(varied)
+        out_path = os.path.join(directory, os.path.basename(path))
+        pd.concat(frames, ignore_index=True).to_csv(out_path, index=False)
+        paths.append(out_path)
+    return paths
+
+
+def train(datasets, featurizer, workers):
+    analyzer = TextAnalyzer(featurizer=featurizer, training_workers=workers)
+    analyzer.training_pipeline.min_parallel_texts = 0
+    analyzer.preprocessor.stop_words  # load outside the timed region
+    if not analyzer.train_emotion_model(datasets):
+        raise RuntimeError("Training failed")
+    return analyzer.training_pipeline.timings, analyzer.model.coef_
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Training pipeline benchmark")
+    parser.add_argument("--datasets", nargs="+", default=DEFAULT_DATASETS)
+    parser.add_argument("--copies", type=int, default=10, help="Variations of every sentence in the corpus")
+    parser.add_argument("--workers", type=int, nargs="+",
+                        default=sorted({1, 2, os.cpu_count() or 1}))
+    parser.add_argument("--featurizers", nargs="+", default=["tfidf", "hashing"])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        datasets = build_corpus(args.datasets, args.copies, directory)
+        rows = sum(len(pd.read_csv(path)) for path in datasets)
+        print(f"corpus: {rows} rows, {os.cpu_count()} CPUs")
+        print(f"{'featurizer':>10} {'workers':>8} {'load':>7} {'preproc':>8} {'featurize':>10} "
+              f"{'fit':>7} {'speedup':>8} {'same coef':>10}")
+        for featurizer in args.featurizers:
+            baseline = None
+            for workers in args.workers:
+                timings, coef = train(datasets, featurizer, workers)
+                parallel_part = timings['preprocess'] + timings['featurize']
+                if baseline is None:
+                    baseline = (parallel_part, coef)
+                same = np.allclose(coef, baseline[1])
+                print(f"{featurizer:>10} {workers:>8} {timings['load']:>7.2f} {timings['preprocess']:>8.2f} "
+                      f"{timings['featurize']:>10.2f} {timings['fit']:>7.2f} "
+                      f"{baseline[0] / parallel_part:>7.2f}x {str(same):>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+import argparse
+import os
+
+
+def convert_to_tflite(model_path, output_path, quantize=False):
+    """Convert the Keras face emotion model to a TFLite flatbuffer"""
+    import tensorflow as tf
+
+    model = tf.keras.models.load_model(model_path, compile=False)
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    if quantize:
+        # Dynamic range quantization: int8 weights, float activations
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    tflite_model = converter.convert()
+
+    output_dir = os.path.dirname(output_path)
+    if output_dir and not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+    with open(output_path, "wb") as f:
+        f.write(tflite_model)
+    return len(tflite_model)
+
+
+def main():
+    """Export models/emotion_model.h5 for the 'tflite' inference backend"""
+    parser = argparse.ArgumentParser(description="Convert the face emotion model to TFLite")
+    parser.add_argument("--input", default=os.path.join("models", "emotion_model.h5"), help="Keras model to convert")
+    parser.add_argument("--output", default=os.path.join("models", "emotion_model.tflite"), help="Where to write the TFLite model")
+    parser.add_argument("--quantize", action="store_true", help="Apply dynamic range quantization")
+    args = parser.parse_args()
+
+    print(f"Converting {args.input} to TFLite...")
+    size = convert_to_tflite(args.input, args.output, quantize=args.quantize)
+    print(f"✅ TFLite model saved to {args.output} ({size / 1024:.1f} KB)")
+    print("Set INFERENCE_BACKEND=tflite to use it")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""gunicorn settings for serving the API: gunicorn -c gunicorn.conf.py wsgi:app
+
+The master process imports wsgi.py once (preload_app), which loads the
+text models; the workers are forked from it and share those arrays
+copy-on-write. Each worker's BLAS/OpenMP/TensorFlow thread pools are
+capped so that workers x threads does not exceed the CPU count.
+"""
+import gc
+import os
+
+from src.serving import limit_threads, worker_threads
+
+bind = os.environ.get('SERVE_BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('SERVE_WORKERS', 2))
+# Request threads per worker; the compute threads are capped separately
+worker_class = 'gthread'
+threads = int(os.environ.get('SERVE_WORKER_THREADS', 2))
+preload_app = True
+timeout = int(os.environ.get('SERVE_TIMEOUT', 120))
+
+# Compute threads per worker (BLAS, OpenMP, TensorFlow, TFLite)
+compute_threads = int(os.environ.get('SERVE_COMPUTE_THREADS', worker_threads(workers)))
+limit_threads(compute_threads)
+
+# The face model runtimes start thread pools that do not survive a fork,
+# so each worker loads its own face model (init_worker). The TFLite
+# interpreter maps the model file, so its weights are still shared
+# between workers through the page cache.
+os.environ.setdefault('FACE_MODEL_PRELOAD', '0')
+
+
+def when_ready(server):
+    # Keep the preloaded objects out of the garbage collector, which would
+    # otherwise write to (and so copy) their pages in every worker
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    import app
+    app.init_worker(compute_threads)
@@ -0,0 +1,131 @@
+import threading
+import time
+
+# Called as hook(stage, seconds) once per analysis call for every stage it ran
+STAGE_HOOKS = []
+
+
+def add_stage_hook(hook):
+    """Register a hook that receives the time spent per text analysis stage"""
+    STAGE_HOOKS.append(hook)
+
+
+class StageTimer:
+    """Time spent per stage of one analysis call
+
+    Stages may nest (computing features first computes the tokens); each
+    stage is charged only its own time, excluding the stages inside it.
+    """
+
+    def __init__(self, hooks=None):
+        self.hooks = STAGE_HOOKS if hooks is None else hooks
+        self.timings = {}
+        self._nested = 0.0
+
+    def run(self, stage, function, *args):
+        """Call function(*args) as part of stage"""
+        outer_nested = self._nested
+        self._nested = 0.0
+        start = time.perf_counter()
+        try:
+            return function(*args)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.timings[stage] = self.timings.get(stage, 0.0) + elapsed - self._nested
+            self._nested = outer_nested + elapsed
+
+    def report(self):
+        """Pass the timings to the hooks"""
+        for stage, seconds in self.timings.items():
+            for hook in self.hooks:
+                hook(stage, seconds)
+
+
+class StageStats:
+    """Aggregates stage timings from a hook: calls, total and maximum seconds per stage"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.stages = {}
+
+    def record(self, stage, seconds):
+        with self.lock:
+            stats = self.stages.setdefault(stage, {"calls": 0, "total_seconds": 0.0, "max_seconds": 0.0})
+            stats["calls"] += 1
+            stats["total_seconds"] += seconds
+            stats["max_seconds"] = max(stats["max_seconds"], seconds)
+
+    def get_stats(self):
+        with self.lock:
+            return {stage: dict(stats, mean_ms=stats["total_seconds"] / stats["calls"] * 1000)
+                    for stage, stats in self.stages.items()}
+
+
+class AnalysisContext:
+    """The intermediate forms of one text, computed on first use and shared by all scoring stages
+
+    tokens -> negation_tokens -> processed_text / words -> features; each
+    is computed once, the first time a stage asks for it, and timed under
+    the stage of the same name ('tokenize', 'negation', 'clean',
+    'featurize').
+    """
+
+    def __init__(self, text, preprocessor, vectorizer, timer=None):
+        self.text = text
+        self.preprocessor = preprocessor
+        self.vectorizer = vectorizer
+        self.timer = timer or StageTimer()
+        self._tokens = None
+        self._negation_tokens = None
+        self._processed_text = None
+        self._words = None
+        self._features = None
+
+    @property
+    def tokens(self):
+        """Tokens of the lowercased text"""
+        if self._tokens is None:
+            self._tokens = self.timer.run('tokenize', self.preprocessor.tokenize, self.text.lower())
+        return self._tokens
+
+    @property
+    def negation_tokens(self):
+        """Tokens with the word after a negation prefixed with NOT_"""
+        if self._negation_tokens is None:
+            self._negation_tokens = self.timer.run('negation', self.preprocessor.mark_negations, self.tokens)
+        return self._negation_tokens
+
+    @property
+    def processed_text(self):
+        """The preprocessed text the model and the lexicon see"""
+        if self._processed_text is None:
+            self._processed_text = self.timer.run('clean', self.preprocessor.clean, self.negation_tokens)
+        return self._processed_text
+
+    @property
+    def words(self):
+        if self._words is None:
+            self._words = self.processed_text.split()
+        return self._words
+
+    @property
+    def features(self):
+        """Sparse feature row of the processed text"""
+        if self._features is None:
+            AnalysisContext.featurize([self])
+        matrix, row = self._features
+        return matrix[row]
+
+    @staticmethod
+    def featurize(contexts):
+        """Feature matrix of contexts (one row each), vectorized in one call
+
+        Each context keeps its row, so later stages reuse it. All contexts
+        must share the vectorizer and timer.
+        """
+        first = contexts[0]
+        matrix = first.timer.run('featurize', first.vectorizer.transform,
+                                 [context.processed_text for context in contexts])
+        for row, context in enumerate(contexts):
+            context._features = (matrix, row)
+        return matrix
@@ -1,8 +1,27 @@
 import os
-from pymongo import MongoClient
+from pymongo import MongoClient, monitoring
 from bson.objectid import ObjectId
 import bcrypt
 from datetime import datetime
+from src.metrics import ENABLED as METRICS_ENABLED, histogram
+from src.structured_log import RateLimitedLogger
+
+logger = RateLimitedLogger('database')
+
+MONGO_COMMAND_SECONDS = histogram('mongodb_command_duration_seconds', 'Time per MongoDB command',
+                                  ['command', 'outcome'])
+
+class CommandTimer(monitoring.CommandListener):
+    """Record the duration of every MongoDB command the client runs"""
+    
+    def started(self, event):
+        pass
+    
+    def succeeded(self, event):
+        MONGO_COMMAND_SECONDS.observe(event.duration_micros / 1e6, event.command_name, 'success')
+    
+    def failed(self, event):
+        MONGO_COMMAND_SECONDS.observe(event.duration_micros / 1e6, event.command_name, 'failure')
 
 class Database:
     def __init__(self):
@@ -10,8 +29,13 @@ class Database:
         # For MongoDB Atlas, use your cluster connection string
         # Example: mongodb+srv://<username>:<password>@cluster0.mongodb.net/EmotionSense
         self.connection_string = os.environ.get('MONGODB_URI', 'mongodb://localhost:27017/')
+        self.connect()
+    
+    def connect(self):
+        """Open the MongoDB client; called again by each server worker after a fork"""
+        listeners = [CommandTimer()] if METRICS_ENABLED else []
         try:
-            self.client = MongoClient(self.connection_string)
+            self.client = MongoClient(self.connection_string, event_listeners=listeners)
             # Test the connection
             self.client.admin.command('ping')
             print("MongoDB connection successful")
@@ -19,7 +43,7 @@ class Database:
             print(f"MongoDB connection failed: {e}")
             print("Please ensure MongoDB is running locally or set MONGODB_URI environment variable for MongoDB Atlas")
             # Fallback to local connection
-            self.client = MongoClient('mongodb://localhost:27017/')
+            self.client = MongoClient('mongodb://localhost:27017/', event_listeners=listeners)
         
         self.db = self.client['EmotionSense']
         self.users = self.db['users']
@@ -111,7 +135,7 @@ class Database:
             result = self.sessions.insert_one(session)
             return str(result.inserted_id)
         except Exception as e:
-            print(f'Error creating session: {str(e)}')
+            logger.error('session_create_failed', error=str(e))
             return None
     
     def validate_session(self, session_id):
@@ -122,7 +146,7 @@ class Database:
                 return True
             return False
         except Exception as e:
-            print(f'Error validating session: {str(e)}')
+            logger.error('session_validate_failed', error=str(e))
             return False
     
     def delete_session(self, session_id):
@@ -131,7 +155,7 @@ class Database:
             self.sessions.delete_one({'_id': ObjectId(session_id)})
             return True
         except Exception as e:
-            print(f'Error deleting session: {str(e)}')
+            logger.error('session_delete_failed', error=str(e))
             return False
     
     def update_user_profile(self, user_id, updates):
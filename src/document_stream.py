@@ -0,0 +1,158 @@
+import codecs
+import re
+from collections import deque
+
+# Sentence ends: terminal punctuation (and closing quotes or brackets)
+# followed by whitespace, or a line break
+SENTENCE_END = re.compile(r'[.!?]+["\'”’)\]]*\s+|\n\s*')
+# Longer sentences are cut at whitespace so no feature vector gets huge
+MAX_SENTENCE_CHARS = 1000
+# Sentences per analyzer call
+BATCH_SIZE = 256
+# Sentences in the rolling aggregate
+WINDOW = 20
+
+
+def iter_text_chunks(stream, chunk_size=64 * 1024, encoding='utf-8'):
+    """Yield decoded text from a binary file-like object, chunk_size bytes at a time"""
+    decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+    while True:
+        data = stream.read(chunk_size)
+        if not data:
+            break
+        text = decoder.decode(data)
+        if text:
+            yield text
+    text = decoder.decode(b'', final=True)
+    if text:
+        yield text
+
+
+def _pieces(text, start, end, max_chars):
+    """(start, end) spans of text[start:end] of at most max_chars, cut at whitespace where possible
+
+    Spans start at a non-space character, so the cuts do not depend on
+    how the text was split into chunks.
+    """
+    while start < end and text[start].isspace():
+        start += 1
+    while end - start > max_chars:
+        cut = text.rfind(' ', start + 1, start + max_chars)
+        if cut == -1:
+            cut = start + max_chars
+        yield start, cut
+        start = cut
+        while start < end and text[start].isspace():
+            start += 1
+    yield start, end
+
+
+def iter_sentences(chunks, max_chars=MAX_SENTENCE_CHARS):
+    """Yield (offset, sentence) for the sentences of a stream of text chunks
+
+    Only the text after the last complete sentence is kept between
+    chunks (at most max_chars of it), so memory does not grow with the
+    input. offset is the character position of the sentence in the
+    whole input.
+    """
+    buffer = ''
+    # Position of buffer[0] in the input
+    offset = 0
+    for chunk in chunks:
+        buffer += chunk
+        spans = []
+        start = 0
+        for match in SENTENCE_END.finditer(buffer):
+            spans.extend(_pieces(buffer, start, match.end(), max_chars))
+            start = match.end()
+        # The text after the last sentence end continues in the next chunk
+        tail = list(_pieces(buffer, start, len(buffer), max_chars))
+        spans.extend(tail[:-1])
+        for span_start, span_end in spans:
+            sentence = buffer[span_start:span_end].rstrip()
+            if sentence:
+                yield offset + span_start, sentence
+        start = tail[-1][0]
+        buffer = buffer[start:]
+        offset += start
+    sentence = buffer.rstrip()
+    if sentence:
+        yield offset, sentence
+
+
+def _shares(weights):
+    total = sum(weights.values())
+    return {label: weight / total for label, weight in weights.items()} if total > 0 else {}
+
+
+def analyze_document(chunks, analyze_batch, label_key, batch_size=BATCH_SIZE, window=WINDOW,
+                     max_chars=MAX_SENTENCE_CHARS):
+    """Yield a record per sentence of a text stream, then a summary record
+
+    Sentences are scored batch_size at a time with analyze_batch (an
+    analyzer's analyze_sentiment_batch or analyze_emotion_batch), whose
+    results carry the label under label_key. Each sentence record has
+    the label and confidence of the sentence and a rolling aggregate:
+    the confidence-weighted share of each label over the last window
+    sentences, and the dominant one. The summary gives the same over the
+    whole document.
+    """
+    recent = deque()
+    # Summed confidence and number of sentences per label in recent
+    rolling = {}
+    rolling_counts = {}
+    totals = {}
+    count = 0
+    end = 0
+
+    def score(batch):
+        nonlocal count, end
+        results = analyze_batch([sentence for _, sentence in batch])
+        for (start, sentence), result in zip(batch, results):
+            label, confidence = result[label_key], result['confidence']
+            totals[label] = totals.get(label, 0.0) + confidence
+            recent.append((label, confidence))
+            rolling[label] = rolling.get(label, 0.0) + confidence
+            rolling_counts[label] = rolling_counts.get(label, 0) + 1
+            if len(recent) > window:
+                old_label, old_confidence = recent.popleft()
+                rolling_counts[old_label] -= 1
+                if rolling_counts[old_label]:
+                    rolling[old_label] -= old_confidence
+                else:
+                    del rolling[old_label], rolling_counts[old_label]
+            record = {
+                "type": "sentence",
+                "index": count,
+                "start": start,
+                "end": start + len(sentence),
+                "text": sentence,
+                label_key: label,
+                "confidence": confidence,
+                "rolling": {
+                    label_key: max(rolling, key=rolling.get),
+                    "scores": _shares(rolling)
+                }
+            }
+            if result.get('message', '').startswith('Error'):
+                record["message"] = result['message']
+            count += 1
+            end = start + len(sentence)
+            yield record
+
+    batch = []
+    for sentence in iter_sentences(chunks, max_chars):
+        batch.append(sentence)
+        if len(batch) >= batch_size:
+            yield from score(batch)
+            batch = []
+    if batch:
+        yield from score(batch)
+
+    yield {
+        "type": "summary",
+        "sentences": count,
+        "characters": end,
+        label_key: max(totals, key=totals.get) if totals else None,
+        "scores": _shares(totals)
+    }
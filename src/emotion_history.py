@@ -0,0 +1,136 @@
+import threading
+import time
+
+import numpy as np
+
+
+class EmotionHistoryStore:
+    """Per-track emotion history kept in preallocated ring buffers
+
+    Every track gets a slot in fixed (max_tracks, size, num_classes)
+    arrays holding its last `size` probability vectors, plus an
+    exponential moving average. Pushing a prediction only copies into the
+    arrays, so the frame loop does not allocate per face; JSON friendly
+    summaries are built only when a client asks for them. When all slots
+    are taken, the track updated least recently is evicted.
+    """
+
+    def __init__(self, max_tracks=16, size=30, num_classes=7, alpha=0.3):
+        self.max_tracks = max_tracks
+        self.size = size
+        self.alpha = alpha
+        self.probabilities = np.zeros((max_tracks, size, num_classes), dtype=np.float32)
+        self.timestamps = np.zeros((max_tracks, size), dtype=np.float64)
+        self.ema = np.zeros((max_tracks, num_classes), dtype=np.float32)
+        self.counts = np.zeros(max_tracks, dtype=np.int64)
+        self.heads = np.zeros(max_tracks, dtype=np.int64)
+        self.updated_at = np.zeros(max_tracks, dtype=np.float64)
+        self.boxes = np.zeros((max_tracks, 4), dtype=np.int32)
+        self._scratch = np.zeros(num_classes, dtype=np.float32)
+        self.slots = {}
+        self.free_slots = list(range(max_tracks - 1, -1, -1))
+        self.last_track = None
+        self.lock = threading.Lock()
+
+    def _slot_for(self, track_id):
+        slot = self.slots.get(track_id)
+        if slot is not None:
+            return slot
+        if self.free_slots:
+            slot = self.free_slots.pop()
+        else:
+            # Evict the least recently updated track
+            slot = int(np.argmin(self.updated_at))
+            for old_id, old_slot in list(self.slots.items()):
+                if old_slot == slot:
+                    del self.slots[old_id]
+                    break
+        self.counts[slot] = 0
+        self.heads[slot] = 0
+        self.slots[track_id] = slot
+        return slot
+
+    def push(self, track_id, probabilities, box=None, timestamp=None):
+        """Append one probability vector to a track's history"""
+        if timestamp is None:
+            timestamp = time.time()
+        with self.lock:
+            slot = self._slot_for(track_id)
+            head = self.heads[slot]
+            np.copyto(self.probabilities[slot, head], probabilities, casting='unsafe')
+            self.timestamps[slot, head] = timestamp
+            self.heads[slot] = (head + 1) % self.size
+            ema = self.ema[slot]
+            if self.counts[slot] == 0:
+                np.copyto(ema, self.probabilities[slot, head])
+            else:
+                # ema += alpha * (p - ema), without temporaries
+                np.subtract(self.probabilities[slot, head], ema, out=self._scratch)
+                self._scratch *= self.alpha
+                ema += self._scratch
+            if self.counts[slot] < self.size:
+                self.counts[slot] += 1
+            if box is not None:
+                self.boxes[slot] = box
+            self.updated_at[slot] = timestamp
+            self.last_track = track_id
+
+    def retain(self, track_ids):
+        """Free the slots of tracks that are no longer followed"""
+        with self.lock:
+            for track_id in list(self.slots):
+                if track_id not in track_ids:
+                    self.free_slots.append(self.slots.pop(track_id))
+                    if self.last_track == track_id:
+                        self.last_track = None
+
+    def clear(self):
+        with self.lock:
+            self.free_slots.extend(self.slots.values())
+            self.slots.clear()
+            self.last_track = None
+
+    def _ordered(self, slot, window):
+        """Return the newest `window` rows of a slot, oldest first"""
+        count = int(min(self.counts[slot], window))
+        head = int(self.heads[slot])
+        indices = (np.arange(head - count, head)) % self.size
+        return self.probabilities[slot, indices], self.timestamps[slot, indices]
+
+    def summary(self, track_id, history_window=10, majority_window=10):
+        """Smoothed result and recent history of a track as plain Python"""
+        with self.lock:
+            slot = self.slots.get(track_id)
+            if slot is None or self.counts[slot] == 0:
+                return None
+            smoothed = self.ema[slot].copy()
+            recent, timestamps = self._ordered(slot, max(history_window, majority_window))
+            votes = np.bincount(np.argmax(recent[-majority_window:], axis=1), minlength=smoothed.shape[0])
+            latest = recent[-1].copy()
+            # recent[-0:] would be the whole buffer
+            start = len(recent) - max(history_window, 0)
+            history = recent[start:].copy()
+            history_times = timestamps[start:].copy()
+            box = self.boxes[slot].copy()
+            updated_at = float(self.updated_at[slot])
+        return {
+            "id": track_id,
+            "box": [int(v) for v in box],
+            "smoothed": smoothed,
+            "latest": latest,
+            "majority_index": int(np.argmax(votes)),
+            "history": history,
+            "history_timestamps": history_times,
+            "updated_at": updated_at
+        }
+
+    def summaries(self, history_window=10, majority_window=10):
+        """Summaries of every followed track, most recently updated first"""
+        with self.lock:
+            track_ids = sorted(self.slots, key=lambda t: -self.updated_at[self.slots[t]])
+        results = []
+        for track_id in track_ids:
+            summary = self.summary(track_id, history_window, majority_window)
+            if summary is not None:
+                results.append(summary)
+        return results
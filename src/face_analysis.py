@@ -0,0 +1,99 @@
+import time
+
+import cv2
+import numpy as np
+
+from src.metrics import FRAME_STAGE_SECONDS, observe_inference
+from src.structured_log import RateLimitedLogger
+
+logger = RateLimitedLogger('face_analysis')
+
+# Emotion labels (should match the order used during training)
+EMOTIONS = ['angry', 'disgust', 'fear', 'happy', 'neutral', 'sad', 'surprise']
+
+# For display purposes, we'll capitalize the first letter
+DISPLAY_EMOTIONS = ['Angry', 'Disgust', 'Fear', 'Happy', 'Neutral', 'Sad', 'Surprise']
+
+# Input size expected by the face emotion model
+FACE_SIZE = 48
+
+
+def _face_to_gray(face):
+    """Convert a face crop to a single channel image"""
+    if face.ndim == 3:
+        return cv2.cvtColor(face, cv2.COLOR_BGR2GRAY)
+    return face
+
+
+def preprocess_face(face):
+    """Preprocess the face image for emotion detection"""
+    try:
+        # Convert to grayscale
+        gray = _face_to_gray(face)
+        # Resize to 48x48
+        resized = cv2.resize(gray, (FACE_SIZE, FACE_SIZE))
+        # Normalize pixel values
+        normalized = resized / 255.0
+        # Reshape for model input
+        reshaped = normalized.reshape(1, FACE_SIZE, FACE_SIZE, 1)
+        return reshaped
+    except Exception as e:
+        logger.error("face_preprocessing_failed", error=str(e))
+        # Return a default array if preprocessing fails
+        return np.zeros((1, FACE_SIZE, FACE_SIZE, 1))
+
+
+def preprocess_faces(faces, out=None):
+    """Preprocess a list of face crops into one (N, 48, 48, 1) batch
+
+    Faces that fail to preprocess are left as zeros so the batch keeps
+    one row per input face. An existing float32 buffer with at least
+    len(faces) rows can be passed as out to avoid reallocating.
+    """
+    count = len(faces)
+    if out is None or out.shape[0] < count:
+        out = np.empty((count, FACE_SIZE, FACE_SIZE, 1), dtype=np.float32)
+    batch = out[:count]
+    for i, face in enumerate(faces):
+        try:
+            gray = _face_to_gray(face)
+            resized = cv2.resize(gray, (FACE_SIZE, FACE_SIZE))
+            np.multiply(resized, 1.0 / 255.0, out=batch[i, :, :, 0], casting='unsafe')
+        except Exception as e:
+            logger.error("face_preprocessing_failed", error=str(e))
+            batch[i] = 0.0
+    return batch
+
+
+def predict_batch(model, batch):
+    """Run a single inference call over a preprocessed batch
+
+    model is an inference backend from src.inference_backends.
+    """
+    if len(batch) == 0:
+        return np.zeros((0, len(DISPLAY_EMOTIONS)), dtype=np.float32)
+    start = time.perf_counter()
+    predictions = np.asarray(model.predict(batch))
+    elapsed = time.perf_counter() - start
+    FRAME_STAGE_SECONDS.observe(elapsed, "predict")
+    observe_inference("face", len(batch), elapsed)
+    return predictions
+
+
+def predict_emotions(model, faces):
+    """Predict emotions for every face crop with one model call
+
+    Returns a list of (emotion, confidence, probabilities) tuples in the
+    same order as faces.
+    """
+    if not faces:
+        return []
+    start = time.perf_counter()
+    batch = preprocess_faces(faces)
+    FRAME_STAGE_SECONDS.observe(time.perf_counter() - start, "preprocess")
+    predictions = predict_batch(model, batch)
+    indices = np.argmax(predictions, axis=1)
+    results = []
+    for row, emotion_idx in zip(predictions, indices):
+        results.append((DISPLAY_EMOTIONS[emotion_idx], float(row[emotion_idx]), row))
+    return results
@@ -0,0 +1,287 @@
+import os
+import threading
+
+import cv2
+import numpy as np
+
+from src.face_tracking import box_iou
+
+HAAR_CASCADE_PATH = cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
+
+# Local model files for the other detectors (not bundled, see README)
+LBP_CASCADE_PATHS = [
+    os.path.join("models", "lbpcascade_frontalface_improved.xml"),
+    os.path.join(cv2.data.haarcascades, "..", "lbpcascades", "lbpcascade_frontalface_improved.xml")
+]
+SSD_PROTOTXT_PATH = os.path.join("models", "deploy.prototxt")
+SSD_WEIGHTS_PATH = os.path.join("models", "res10_300x300_ssd_iter_140000.caffemodel")
+YUNET_MODEL_PATH = os.path.join("models", "face_detection_yunet_2023mar.onnx")
+
+
+class DetectionConfig:
+    """Runtime tunable face detection settings
+
+    scale_factor, min_neighbors and min_size are passed to
+    detectMultiScale (min_size in full resolution pixels). Detection runs
+    on a copy of the frame resized by input_scale, further reduced so it
+    is at most max_width pixels wide. Between full scans, which happen
+    every full_scan_interval frames, only regions around the previous
+    faces (grown by roi_margin of their size) are searched. Frames are
+    counted whether detection runs on them or not: with a FaceTracker that
+    detects every detect_interval frames, a detection at least
+    full_scan_interval frames after the last full scan is a full scan, so
+    new faces are found within max(detect_interval, full_scan_interval)
+    frames. score_threshold only applies to the DNN detectors.
+    """
+    FIELDS = {
+        'scale_factor': float,
+        'min_neighbors': int,
+        'min_size': int,
+        'input_scale': float,
+        'max_width': int,
+        'roi_margin': float,
+        'full_scan_interval': int,
+        'score_threshold': float
+    }
+
+    def __init__(self, scale_factor=1.1, min_neighbors=5, min_size=30, input_scale=1.0,
+                 max_width=640, roi_margin=0.5, full_scan_interval=5, score_threshold=0.6):
+        self.lock = threading.Lock()
+        self.scale_factor = scale_factor
+        self.min_neighbors = min_neighbors
+        self.min_size = min_size
+        self.input_scale = input_scale
+        self.max_width = max_width
+        self.roi_margin = roi_margin
+        self.full_scan_interval = full_scan_interval
+        self.score_threshold = score_threshold
+
+    def update(self, values):
+        """Validate and apply new settings; raises ValueError on bad input"""
+        parsed = {}
+        for name, value in values.items():
+            if name not in self.FIELDS:
+                raise ValueError(f"Unknown detection setting '{name}'")
+            try:
+                if self.FIELDS[name] is int:
+                    # int() would silently truncate 29.9 or 0.5
+                    number = float(value)
+                    if not number.is_integer():
+                        raise ValueError
+                    parsed[name] = int(number)
+                else:
+                    parsed[name] = self.FIELDS[name](value)
+            except (TypeError, ValueError):
+                raise ValueError(f"Invalid value for '{name}': {value!r}")
+        if parsed.get('scale_factor', self.scale_factor) <= 1.0:
+            raise ValueError("scale_factor must be greater than 1.0")
+        if not 0.0 < parsed.get('input_scale', self.input_scale) <= 1.0:
+            raise ValueError("input_scale must be in (0, 1]")
+        for name in ('min_neighbors', 'min_size', 'max_width', 'full_scan_interval'):
+            if parsed.get(name, getattr(self, name)) < (0 if name == 'min_neighbors' else 1):
+                raise ValueError(f"{name} is out of range")
+        if parsed.get('roi_margin', self.roi_margin) < 0:
+            raise ValueError("roi_margin must not be negative")
+        if not 0.0 <= parsed.get('score_threshold', self.score_threshold) <= 1.0:
+            raise ValueError("score_threshold must be in [0, 1]")
+        with self.lock:
+            for name, value in parsed.items():
+                setattr(self, name, value)
+
+    @classmethod
+    def from_env(cls, environ):
+        """Build a config from FACE_DETECTION_* environment variables"""
+        config = cls()
+        values = {}
+        for name in cls.FIELDS:
+            key = f"FACE_DETECTION_{name.upper()}"
+            if key in environ:
+                values[name] = environ[key]
+        config.update(values)
+        return config
+
+    def to_dict(self):
+        with self.lock:
+            return {name: getattr(self, name) for name in self.FIELDS}
+
+
+class FaceDetector:
+    """Base class for face detectors
+
+    Subclasses implement detect_image(), which finds faces in one image.
+    This class adds the shared downscaling and ROI search, and always
+    returns (x, y, w, h) tuples in full resolution coordinates.
+    """
+    name = None
+    # Whether detect() wants the BGR frame rather than the grayscale one
+    uses_color = False
+
+    def __init__(self, config=None):
+        self.config = config or DetectionConfig()
+        self.previous_boxes = []
+        self.calls = 0
+        self.last_full_scan = None
+
+    def detect_image(self, image, settings, min_size, max_size):
+        """Return boxes found in image, in image coordinates"""
+        raise NotImplementedError
+
+    def reset(self):
+        """Forget the faces found so far; the next call does a full scan"""
+        self.previous_boxes = []
+        self.calls = 0
+        self.last_full_scan = None
+
+    def _detect_scaled(self, image, scale, settings, min_size=None, max_size=None):
+        """Detect on image resized by scale and map boxes back"""
+        if scale < 1.0:
+            small = cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        else:
+            small = image
+        min_size = max(int((min_size or settings['min_size']) * scale), 1)
+        max_size = int(max_size * scale) if max_size else 0
+        boxes = self.detect_image(small, settings, min_size, max_size)
+        return [tuple(int(round(v / scale)) for v in box) for box in boxes]
+
+    def _detect_rois(self, image, hints, scale, settings):
+        """Search only around the hinted boxes, for faces of similar size"""
+        height, width = image.shape[:2]
+        found = []
+        for x, y, w, h in hints:
+            margin_x, margin_y = w * settings['roi_margin'], h * settings['roi_margin']
+            x0, y0 = int(max(x - margin_x, 0)), int(max(y - margin_y, 0))
+            x1, y1 = int(min(x + w + margin_x, width)), int(min(y + h + margin_y, height))
+            if x1 - x0 < settings['min_size'] or y1 - y0 < settings['min_size']:
+                continue
+            min_size = max(settings['min_size'], int(min(w, h) * 0.6))
+            max_size = int(max(w, h) * 1.6)
+            for bx, by, bw, bh in self._detect_scaled(image[y0:y1, x0:x1], scale, settings, min_size, max_size):
+                box = (bx + x0, by + y0, bw, bh)
+                if all(box_iou(box, other) < 0.5 for other in found):
+                    found.append(box)
+        return found
+
+    def detect(self, image, hints=None, frame_index=None):
+        """Detect faces in a frame (grayscale or BGR, see uses_color)
+
+        hints are boxes where faces are expected (e.g. current tracks);
+        the faces found by the previous call are used when omitted.
+        frame_index is the number of the frame in the video, for callers
+        that skip frames; without it every call counts as one frame.
+        """
+        settings = self.config.to_dict()
+        width = image.shape[1]
+        scale = min(settings['input_scale'], settings['max_width'] / float(width), 1.0)
+        if hints is None:
+            hints = self.previous_boxes
+        if frame_index is None:
+            frame_index = self.calls
+
+        full_scan = (not hints or self.last_full_scan is None
+                     or frame_index - self.last_full_scan >= settings['full_scan_interval'])
+        self.calls += 1
+        if full_scan:
+            self.last_full_scan = frame_index
+            boxes = self._detect_scaled(image, scale, settings)
+        else:
+            boxes = self._detect_rois(image, hints, scale, settings)
+        self.previous_boxes = boxes
+        return boxes
+
+
+def _filter_sizes(boxes, min_size, max_size):
+    """Drop boxes outside the [min_size, max_size] range (0 = no maximum)"""
+    return [box for box in boxes
+            if min(box[2], box[3]) >= min_size and (not max_size or max(box[2], box[3]) <= max_size)]
+
+
+class CascadeFaceDetector(FaceDetector):
+    """OpenCV cascade classifier (Haar or LBP)"""
+
+    def __init__(self, cascade, config=None, name='haar'):
+        super().__init__(config)
+        self.cascade = cascade
+        self.name = name
+
+    def detect_image(self, image, settings, min_size, max_size):
+        if image.ndim == 3:
+            image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        return self.cascade.detectMultiScale(image, scaleFactor=settings['scale_factor'],
+                                             minNeighbors=settings['min_neighbors'],
+                                             minSize=(min_size, min_size),
+                                             maxSize=(max_size, max_size))
+
+
+class SSDFaceDetector(FaceDetector):
+    """OpenCV DNN ResNet-10 SSD face detector (Caffe model)"""
+    name = 'ssd'
+    uses_color = True
+    INPUT_SIZE = (300, 300)
+    MEAN = (104.0, 177.0, 123.0)
+
+    def __init__(self, prototxt_path, weights_path, config=None):
+        super().__init__(config)
+        self.net = cv2.dnn.readNetFromCaffe(prototxt_path, weights_path)
+
+    def detect_image(self, image, settings, min_size, max_size):
+        if image.ndim == 2:
+            image = cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+        height, width = image.shape[:2]
+        blob = cv2.dnn.blobFromImage(cv2.resize(image, self.INPUT_SIZE), 1.0, self.INPUT_SIZE, self.MEAN)
+        self.net.setInput(blob)
+        detections = self.net.forward()[0, 0]
+        detections = detections[detections[:, 2] >= settings['score_threshold']]
+        boxes = []
+        for x0, y0, x1, y1 in np.clip(detections[:, 3:7], 0.0, 1.0) * [width, height, width, height]:
+            boxes.append((int(x0), int(y0), int(x1 - x0), int(y1 - y0)))
+        return _filter_sizes(boxes, min_size, max_size)
+
+
+class YuNetFaceDetector(FaceDetector):
+    """OpenCV YuNet face detector (cv2.FaceDetectorYN, ONNX model)"""
+    name = 'yunet'
+    uses_color = True
+
+    def __init__(self, model_path, config=None):
+        super().__init__(config)
+        settings = self.config.to_dict()
+        self.model = cv2.FaceDetectorYN.create(model_path, "", (320, 320), settings['score_threshold'], 0.3, 5000)
+        self.input_size = (320, 320)
+
+    def detect_image(self, image, settings, min_size, max_size):
+        if image.ndim == 2:
+            image = cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+        height, width = image.shape[:2]
+        if (width, height) != self.input_size:
+            self.model.setInputSize((width, height))
+            self.input_size = (width, height)
+        self.model.setScoreThreshold(settings['score_threshold'])
+        _, faces = self.model.detect(image)
+        if faces is None:
+            return []
+        boxes = [tuple(int(v) for v in face[:4]) for face in faces]
+        return _filter_sizes(boxes, min_size, max_size)
+
+
+FACE_DETECTORS = ['haar', 'lbp', 'ssd', 'yunet']
+
+
+def create_face_detector(name, config=None):
+    """Create a face detector by name, loading its model from local files"""
+    if name == 'haar':
+        return CascadeFaceDetector(cv2.CascadeClassifier(HAAR_CASCADE_PATH), config)
+    if name == 'lbp':
+        for path in LBP_CASCADE_PATHS:
+            if os.path.exists(path):
+                return CascadeFaceDetector(cv2.CascadeClassifier(path), config, name='lbp')
+        raise FileNotFoundError(f"LBP cascade not found, expected one of {LBP_CASCADE_PATHS}")
+    if name == 'ssd':
+        for path in (SSD_PROTOTXT_PATH, SSD_WEIGHTS_PATH):
+            if not os.path.exists(path):
+                raise FileNotFoundError(f"SSD face detector file not found: {path}")
+        return SSDFaceDetector(SSD_PROTOTXT_PATH, SSD_WEIGHTS_PATH, config)
+    if name == 'yunet':
+        if not os.path.exists(YUNET_MODEL_PATH):
+            raise FileNotFoundError(f"YuNet model not found: {YUNET_MODEL_PATH}")
+        return YuNetFaceDetector(YUNET_MODEL_PATH, config)
+    raise ValueError(f"Unknown face detector '{name}'. Available: {FACE_DETECTORS}")
@@ -0,0 +1,184 @@
+import cv2
+import numpy as np
+
+
+def box_iou(a, b):
+    """Intersection over union of two (x, y, w, h) boxes"""
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    ix = max(0.0, min(ax + aw, bx + bw) - max(ax, bx))
+    iy = max(0.0, min(ay + ah, by + bh) - max(ay, by))
+    intersection = ix * iy
+    union = aw * ah + bw * bh - intersection
+    return intersection / union if union > 0 else 0.0
+
+
+class Track:
+    """A face followed across frames with a stable ID"""
+
+    def __init__(self, track_id, box):
+        self.id = track_id
+        self.box = np.array(box, dtype=np.float32)
+        self.emotion = None
+        self.confidence = 0.0
+        self.probabilities = None
+        self.last_inference = None
+        self.thumbnail = None
+        self.misses = 0
+        self.flow_confidence = 1.0
+
+    def int_box(self):
+        x, y, w, h = self.box
+        return int(round(x)), int(round(y)), int(round(w)), int(round(h))
+
+
+class FaceTracker:
+    """Propagate face boxes between detections and throttle inference
+
+    Full detection runs every detect_interval frames, or immediately when
+    optical flow loses a track. In between, boxes are moved with sparse
+    Lucas-Kanade flow on a downscaled grayscale frame. A track asks for
+    emotion inference every inference_interval frames, or earlier when its
+    face crop changes by more than change_threshold (mean absolute pixel
+    difference of a 16x16 thumbnail).
+    """
+
+    def __init__(self, detect_interval=10, inference_interval=5, change_threshold=12.0,
+                 iou_threshold=0.3, flow_scale=0.5, min_flow_confidence=0.5, max_misses=2):
+        if detect_interval < 1:
+            raise ValueError("detect_interval must be at least 1")
+        if inference_interval < 1:
+            raise ValueError("inference_interval must be at least 1")
+        self.detect_interval = detect_interval
+        self.inference_interval = inference_interval
+        self.change_threshold = change_threshold
+        self.iou_threshold = iou_threshold
+        self.flow_scale = flow_scale
+        self.min_flow_confidence = min_flow_confidence
+        self.max_misses = max_misses
+        self.tracks = []
+        self.next_id = 1
+        self.frame_index = 0
+        self.prev_small = None
+        self.stats = {"frames": 0, "detections": 0, "inferences": 0}
+
+    def _downscale(self, gray):
+        if self.flow_scale == 1.0:
+            return gray
+        return cv2.resize(gray, None, fx=self.flow_scale, fy=self.flow_scale, interpolation=cv2.INTER_AREA)
+
+    def _match_detections(self, boxes):
+        """Match detected boxes to existing tracks by IoU, greedily"""
+        pairs = []
+        for t, track in enumerate(self.tracks):
+            for d, box in enumerate(boxes):
+                iou = box_iou(track.box, box)
+                if iou >= self.iou_threshold:
+                    pairs.append((iou, t, d))
+        pairs.sort(reverse=True)
+        matched_tracks, matched_boxes = set(), set()
+        for _, t, d in pairs:
+            if t in matched_tracks or d in matched_boxes:
+                continue
+            matched_tracks.add(t)
+            matched_boxes.add(d)
+            track = self.tracks[t]
+            track.box = np.array(boxes[d], dtype=np.float32)
+            track.misses = 0
+            track.flow_confidence = 1.0
+
+        survivors = []
+        for t, track in enumerate(self.tracks):
+            if t not in matched_tracks:
+                track.misses += 1
+                if track.misses > self.max_misses:
+                    continue
+            survivors.append(track)
+        for d, box in enumerate(boxes):
+            if d not in matched_boxes:
+                survivors.append(Track(self.next_id, box))
+                self.next_id += 1
+        self.tracks = survivors
+
+    def _propagate(self, small):
+        """Shift every track box by the median optical flow inside it"""
+        scale = self.flow_scale
+        for track in self.tracks:
+            x, y, w, h = track.box * scale
+            mask = np.zeros_like(small)
+            mask[int(max(y, 0)):int(y + h), int(max(x, 0)):int(x + w)] = 255
+            points = cv2.goodFeaturesToTrack(self.prev_small, maxCorners=30, qualityLevel=0.01,
+                                             minDistance=3, mask=mask)
+            if points is None:
+                track.flow_confidence = 0.0
+                continue
+            moved, status, _ = cv2.calcOpticalFlowPyrLK(self.prev_small, small, points, None,
+                                                        winSize=(15, 15), maxLevel=2)
+            good = status.reshape(-1) == 1
+            track.flow_confidence = float(good.mean()) if len(good) else 0.0
+            if not good.any():
+                continue
+            shift = np.median(moved[good] - points[good], axis=0).reshape(-1) / scale
+            track.box[0] += shift[0]
+            track.box[1] += shift[1]
+
+    def update(self, gray, detect_faces):
+        """Advance the tracker by one frame
+
+        gray is the full resolution grayscale frame and detect_faces a
+        callable returning (x, y, w, h) boxes for it. Returns
+        (tracks, detected) where detected tells whether full detection ran.
+        """
+        self.frame_index += 1
+        self.stats["frames"] += 1
+        small = self._downscale(gray)
+
+        detected = False
+        if self.prev_small is None or not self.tracks or self.frame_index % self.detect_interval == 0:
+            detected = True
+        else:
+            self._propagate(small)
+            if any(track.flow_confidence < self.min_flow_confidence for track in self.tracks):
+                detected = True
+
+        if detected:
+            boxes = [tuple(float(v) for v in box) for box in detect_faces(gray)]
+            self.stats["detections"] += 1
+            self._match_detections(boxes)
+
+        # Keep boxes inside the frame
+        height, width = gray.shape[:2]
+        for track in self.tracks:
+            track.box[0] = np.clip(track.box[0], 0, max(width - track.box[2], 0))
+            track.box[1] = np.clip(track.box[1], 0, max(height - track.box[3], 0))
+
+        self.prev_small = small
+        return self.tracks, detected
+
+    def needs_inference(self, track, face_gray):
+        """Decide whether a track's emotion should be recomputed this frame"""
+        thumbnail = cv2.resize(face_gray, (16, 16), interpolation=cv2.INTER_AREA).astype(np.int16)
+        if track.last_inference is None or self.frame_index - track.last_inference >= self.inference_interval:
+            return True, thumbnail
+        if track.thumbnail is not None and np.abs(thumbnail - track.thumbnail).mean() > self.change_threshold:
+            return True, thumbnail
+        return False, thumbnail
+
+    def record_inference(self, track, thumbnail, emotion, confidence, probabilities=None):
+        """Store the emotion predicted for a track on this frame"""
+        track.emotion = emotion
+        track.confidence = confidence
+        track.probabilities = probabilities
+        track.thumbnail = thumbnail
+        track.last_inference = self.frame_index
+        self.stats["inferences"] += 1
+
+    def get_stats(self):
+        frames = max(self.stats["frames"], 1)
+        return {
+            "frames": self.stats["frames"],
+            "detections": self.stats["detections"],
+            "inferences": self.stats["inferences"],
+            "detection_rate": self.stats["detections"] / frames,
+            "active_tracks": len(self.tracks)
+        }
@@ -0,0 +1,113 @@
+import time
+from collections import namedtuple
+
+import cv2
+
+from src.metrics import FRAME_STAGE_SECONDS
+
+# One analyzed face; id is the track id, or the detection index without tracking
+FaceResult = namedtuple('FaceResult', ['id', 'box', 'emotion', 'confidence'])
+
+
+class FrameAnalyzer:
+    """Detect faces in video frames, predict their emotions and draw them
+
+    face_detector is a FaceDetector from src.face_detection.
+    predict_faces takes a list of BGR face crops and returns one
+    (emotion, confidence, probabilities) tuple per crop. When a
+    FaceTracker is given, detection and inference only run when the
+    tracker asks for them; otherwise both run on every frame. Predicted
+    probabilities are pushed into an optional EmotionHistoryStore.
+    """
+
+    def __init__(self, face_detector, predict_faces, tracker=None, history=None):
+        self.face_detector = face_detector
+        self.predict_faces = predict_faces
+        self.tracker = tracker
+        self.history = history
+        self._frame = None
+
+    def _record(self, track_id, box, probabilities):
+        if self.history is not None and probabilities is not None:
+            self.history.push(track_id, probabilities, box)
+
+    def detect_faces(self, gray):
+        """Detect faces, searching around the current tracks when tracking"""
+        hints, frame_index = None, None
+        if self.tracker is not None:
+            # The tracker skips frames; the detector's full scan interval counts all of them
+            hints = [track.box for track in self.tracker.tracks]
+            frame_index = self.tracker.frame_index
+        image = self._frame if self.face_detector.uses_color else gray
+        start = time.perf_counter()
+        boxes = self.face_detector.detect(image, hints, frame_index)
+        FRAME_STAGE_SECONDS.observe(time.perf_counter() - start, "detect")
+        return boxes
+
+    def analyze(self, frame):
+        """Analyze a BGR frame in place
+
+        Returns (frame, faces) where faces is a list of FaceResult for
+        every visible face.
+        """
+        # Convert to grayscale for face detection
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        self._frame = frame
+        if self.tracker is None:
+            faces = self._analyze_every_frame(frame, gray)
+        else:
+            faces = self._analyze_tracked(frame, gray)
+
+        for face in faces:
+            x, y, w, h = face.box
+            # Draw rectangle around face
+            cv2.rectangle(frame, (x, y), (x+w, y+h), (0, 255, 0), 2)
+            # Display emotion and confidence
+            text = f"{face.emotion}: {face.confidence:.2f}"
+            if self.tracker is not None:
+                text = f"#{face.id} {text}"
+            cv2.putText(frame, text, (x, y-10), cv2.FONT_HERSHEY_SIMPLEX, 0.9, (0, 255, 0), 2)
+        self._frame = None
+        return frame, faces
+
+    def _analyze_every_frame(self, frame, gray):
+        boxes = [tuple(int(v) for v in box) for box in self.detect_faces(gray)]
+        # Extract all face regions and detect their emotions in one batch
+        face_images = [frame[y:y+h, x:x+w] for (x, y, w, h) in boxes]
+        results = self.predict_faces(face_images) if face_images else []
+        faces = []
+        for index, (box, (emotion, confidence, probabilities)) in enumerate(zip(boxes, results)):
+            self._record(index, box, probabilities)
+            faces.append(FaceResult(index, box, emotion, confidence))
+        if self.history is not None:
+            self.history.retain(range(len(faces)))
+        return faces
+
+    def _analyze_tracked(self, frame, gray):
+        tracks, _ = self.tracker.update(gray, self.detect_faces)
+        if self.history is not None:
+            self.history.retain({track.id for track in tracks})
+        visible = [track for track in tracks if track.misses == 0]
+
+        # Only faces that moved or changed noticeably go through the model
+        pending, face_images = [], []
+        for track in visible:
+            x, y, w, h = track.int_box()
+            if w <= 0 or h <= 0:
+                continue
+            needed, thumbnail = self.tracker.needs_inference(track, gray[y:y+h, x:x+w])
+            if needed:
+                pending.append((track, thumbnail))
+                face_images.append(frame[y:y+h, x:x+w])
+        if face_images:
+            results = self.predict_faces(face_images)
+            for (track, thumbnail), (emotion, confidence, probabilities) in zip(pending, results):
+                self.tracker.record_inference(track, thumbnail, emotion, confidence, probabilities)
+                self._record(track.id, track.int_box(), probabilities)
+
+        faces = []
+        for track in visible:
+            if track.emotion is None:
+                continue
+            faces.append(FaceResult(track.id, track.int_box(), track.emotion, track.confidence))
+        return faces
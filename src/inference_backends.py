@@ -0,0 +1,139 @@
+import os
+import numpy as np
+
+# Default locations of the face emotion model artifacts
+KERAS_MODEL_PATHS = [
+    os.path.join("models", "emotion_model.h5"),
+    os.path.join("model.h5"),
+    os.path.join("models", "emotion_model.keras")
+]
+TFLITE_MODEL_PATHS = [
+    os.path.join("models", "emotion_model.tflite")
+]
+
+
+class InferenceBackend:
+    """Base class for face emotion model runtimes
+
+    Every backend takes a float32 batch of shape (N, 48, 48, 1) and
+    returns an (N, 7) array of emotion probabilities.
+    """
+    name = None
+
+    def __init__(self, model_path):
+        self.model_path = model_path
+        self.input_shape = None
+        self.output_shape = None
+
+    def predict(self, batch):
+        raise NotImplementedError
+
+
+class KerasPredictBackend(InferenceBackend):
+    """Runs the Keras model through Model.predict"""
+    name = 'keras'
+
+    def __init__(self, model_path):
+        super().__init__(model_path)
+        import tensorflow as tf
+        self.model = tf.keras.models.load_model(model_path, compile=False)
+        self.input_shape = self.model.input_shape
+        self.output_shape = self.model.output_shape
+
+    def predict(self, batch):
+        return np.asarray(self.model.predict(batch, batch_size=len(batch), verbose=0))
+
+
+class KerasFunctionBackend(InferenceBackend):
+    """Calls the Keras model directly inside a traced tf.function
+
+    Skips the data adapter and callback machinery of Model.predict, which
+    dominates the cost of small batches.
+    """
+    name = 'keras_function'
+
+    def __init__(self, model_path):
+        super().__init__(model_path)
+        import tensorflow as tf
+        self.model = tf.keras.models.load_model(model_path, compile=False)
+        self.input_shape = self.model.input_shape
+        self.output_shape = self.model.output_shape
+        # A fixed signature with a dynamic batch dimension traces only once
+        signature = [tf.TensorSpec((None,) + tuple(self.input_shape[1:]), tf.float32)]
+        self._call = tf.function(lambda x: self.model(x, training=False), input_signature=signature)
+
+    def predict(self, batch):
+        return self._call(np.asarray(batch, dtype=np.float32)).numpy()
+
+
+def _load_tflite_interpreter(model_path, num_threads=None):
+    """Create a TFLite interpreter, preferring the standalone runtime"""
+    try:
+        from tflite_runtime.interpreter import Interpreter
+    except ImportError:
+        try:
+            from ai_edge_litert.interpreter import Interpreter
+        except ImportError:
+            import tensorflow as tf
+            Interpreter = tf.lite.Interpreter
+    return Interpreter(model_path=model_path, num_threads=num_threads)
+
+
+class TFLiteBackend(InferenceBackend):
+    """Runs an exported .tflite model, without importing TensorFlow when
+    the tflite-runtime package is installed"""
+    name = 'tflite'
+
+    def __init__(self, model_path, num_threads=None):
+        super().__init__(model_path)
+        self.interpreter = _load_tflite_interpreter(model_path, num_threads=num_threads)
+        self.interpreter.allocate_tensors()
+        self._input = self.interpreter.get_input_details()[0]
+        self._output = self.interpreter.get_output_details()[0]
+        self.input_shape = tuple(int(d) for d in self._input['shape'])
+        self.output_shape = tuple(int(d) for d in self._output['shape'])
+        self._batch_size = self.input_shape[0]
+
+    def _resize(self, batch_size):
+        """Resize the input tensor when the batch size changes"""
+        if batch_size == self._batch_size:
+            return
+        shape = [batch_size] + list(self.input_shape[1:])
+        self.interpreter.resize_tensor_input(self._input['index'], shape)
+        self.interpreter.allocate_tensors()
+        self._batch_size = batch_size
+
+    def predict(self, batch):
+        batch = np.ascontiguousarray(batch, dtype=np.float32)
+        self._resize(len(batch))
+        self.interpreter.set_tensor(self._input['index'], batch)
+        self.interpreter.invoke()
+        return self.interpreter.get_tensor(self._output['index']).copy()
+
+
+BACKENDS = {
+    KerasPredictBackend.name: KerasPredictBackend,
+    KerasFunctionBackend.name: KerasFunctionBackend,
+    TFLiteBackend.name: TFLiteBackend
+}
+
+
+def get_model_paths(backend_name):
+    """Return the candidate model artifacts for a backend"""
+    if backend_name == TFLiteBackend.name:
+        return TFLITE_MODEL_PATHS
+    return KERAS_MODEL_PATHS
+
+
+def create_backend(backend_name, model_path, num_threads=None):
+    """Create an inference backend by name
+
+    num_threads caps the interpreter threads of the TFLite backend; the
+    TensorFlow backends take theirs from TF_NUM_INTRAOP_THREADS and
+    TF_NUM_INTEROP_THREADS.
+    """
+    if backend_name not in BACKENDS:
+        raise ValueError(f"Unknown inference backend '{backend_name}'. Available: {sorted(BACKENDS)}")
+    if backend_name == TFLiteBackend.name:
+        return TFLiteBackend(model_path, num_threads=num_threads)
+    return BACKENDS[backend_name](model_path)
@@ -0,0 +1,189 @@
+import collections
+import os
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+from src.profiling import profiling_this_thread
+
+
+class QueueFull(Exception):
+    """Raised when a MicroBatcher has no room for more items"""
+
+
+class MicroBatcher:
+    """Collect items submitted from many threads into batches for one model call
+
+    A worker thread takes the oldest waiting item, waits until max_batch_size
+    items are queued or max_wait seconds passed since that item arrived, and
+    calls run_batch(items), which returns one result per item. Each
+    submitted item gets a Future of its result. With max_wait 0 the worker
+    takes whatever queued up while the previous call ran. When max_queue
+    items are waiting, submit() raises QueueFull instead of queuing more.
+    """
+
+    def __init__(self, name, run_batch, max_batch_size=64, max_wait=0.005, max_queue=1024, recent=1000):
+        self.name = name
+        self.run_batch = run_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.max_queue = max_queue
+        self.condition = threading.Condition()
+        # (enqueue time, item, future)
+        self.queue = collections.deque()
+        self.thread = None
+        self.pid = None
+        self.submitted = 0
+        self.rejected = 0
+        self.batches = 0
+        self.errors = 0
+        self.max_depth = 0
+        self.batch_sizes = {}
+        self.total_wait = 0.0
+        # Queue waits of the most recent items, for percentiles
+        self.waits = collections.deque(maxlen=recent)
+
+    def _ensure_worker(self):
+        # Started on first use, and again in a process forked after that,
+        # which inherits the queue but not the thread
+        if self.thread is None or self.pid != os.getpid():
+            self.pid = os.getpid()
+            self.thread = threading.Thread(target=self._work, name=f"batcher-{self.name}", daemon=True)
+            self.thread.start()
+
+    def submit_many(self, items):
+        """Queue items; returns a Future per item. Raises QueueFull, queuing none of them, when they do not fit"""
+        futures = [Future() for _ in items]
+        now = time.perf_counter()
+        with self.condition:
+            if len(self.queue) + len(items) > self.max_queue:
+                self.rejected += len(items)
+                raise QueueFull(f"{self.name} inference queue is full ({len(self.queue)} waiting)")
+            self._ensure_worker()
+            self.queue.extend((now, item, future) for item, future in zip(items, futures))
+            self.submitted += len(items)
+            self.max_depth = max(self.max_depth, len(self.queue))
+            self.condition.notify()
+        return futures
+
+    def submit(self, item):
+        return self.submit_many([item])[0]
+
+    def run(self, items, timeout=None):
+        """Results of items, computed in the batches of the worker thread"""
+        return [future.result(timeout) for future in self.submit_many(items)]
+
+    def _next_batch(self):
+        with self.condition:
+            while not self.queue:
+                self.condition.wait()
+            deadline = self.queue[0][0] + self.max_wait
+            while len(self.queue) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                self.condition.wait(remaining)
+            size = min(len(self.queue), self.max_batch_size)
+            return [self.queue.popleft() for _ in range(size)]
+
+    def _work(self):
+        while True:
+            batch = self._next_batch()
+            start = time.perf_counter()
+            try:
+                results = self.run_batch([item for _, item, _ in batch])
+                if len(results) != len(batch):
+                    raise RuntimeError(f"{self.name} batch returned {len(results)} results for {len(batch)} items")
+            except Exception as e:
+                results = None
+                error = e
+            with self.condition:
+                self.batches += 1
+                bucket = 1 << (len(batch) - 1).bit_length()
+                self.batch_sizes[bucket] = self.batch_sizes.get(bucket, 0) + 1
+                for enqueued, _, _ in batch:
+                    self.total_wait += start - enqueued
+                    self.waits.append(start - enqueued)
+                if results is None:
+                    self.errors += 1
+            for i, (_, _, future) in enumerate(batch):
+                if results is None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(results[i])
+
+    def get_stats(self):
+        """Queue depth, batch size histogram (power-of-two buckets) and queue wait times"""
+        with self.condition:
+            waits = np.array(self.waits) * 1000
+            processed = self.submitted - len(self.queue)
+            return {
+                "queue_depth": len(self.queue),
+                "max_queue_depth": self.max_depth,
+                "max_queue": self.max_queue,
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait * 1000,
+                "submitted": self.submitted,
+                "rejected": self.rejected,
+                "batches": self.batches,
+                "errors": self.errors,
+                "mean_batch_size": processed / self.batches if self.batches else 0.0,
+                "batch_sizes": {f"<={size}": count for size, count in sorted(self.batch_sizes.items())},
+                "mean_wait_ms": self.total_wait * 1000 / processed if processed else 0.0,
+                "p50_wait_ms": float(np.percentile(waits, 50)) if len(waits) else 0.0,
+                "p99_wait_ms": float(np.percentile(waits, 99)) if len(waits) else 0.0
+            }
+
+
+def analyzer_batches(method):
+    """run_batch for (analyzer, text) items: one call of analyzer.<method> per distinct analyzer"""
+    def run_batch(items):
+        groups = {}
+        for i, (analyzer, _) in enumerate(items):
+            groups.setdefault(id(analyzer), (analyzer, []))[1].append(i)
+        results = [None] * len(items)
+        for analyzer, indices in groups.values():
+            texts = [items[i][1] for i in indices]
+            for i, result in zip(indices, getattr(analyzer, method)(texts)):
+                results[i] = result
+        return results
+    return run_batch
+
+
+class ScheduledTextAnalyzer:
+    """Send a TextAnalyzer's sentiment and emotion calls through shared MicroBatchers
+
+    Concurrent requests are then scored together. The batchers are shared
+    by all analyzers (items carry their analyzer), so one that replaces
+    another after a retrain keeps the same queue. Calls with more texts
+    than a batch holds are already batched and go straight to the
+    analyzer, and so do the calls of a profiled request, so that its
+    profile shows the model instead of the wait for the worker thread.
+    Everything else is delegated to the wrapped analyzer.
+    """
+
+    def __init__(self, analyzer, sentiment_batcher, emotion_batcher):
+        self.analyzer = analyzer
+        self.sentiment_batcher = sentiment_batcher
+        self.emotion_batcher = emotion_batcher
+
+    def __getattr__(self, name):
+        return getattr(self.analyzer, name)
+
+    def analyze_sentiment(self, text):
+        return self.analyze_sentiment_batch([text])[0]
+
+    def analyze_sentiment_batch(self, texts):
+        if len(texts) > self.sentiment_batcher.max_batch_size or profiling_this_thread():
+            return self.analyzer.analyze_sentiment_batch(texts)
+        return self.sentiment_batcher.run([(self.analyzer, text) for text in texts])
+
+    def analyze_emotion(self, text):
+        return self.analyze_emotion_batch([text])[0]
+
+    def analyze_emotion_batch(self, texts):
+        if len(texts) > self.emotion_batcher.max_batch_size or profiling_this_thread():
+            return self.analyzer.analyze_emotion_batch(texts)
+        return self.emotion_batcher.run([(self.analyzer, text) for text in texts])
@@ -0,0 +1,107 @@
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from src.structured_log import RateLimitedLogger
+
+# Every failed job is logged
+logger = RateLimitedLogger('jobs', interval=0)
+
+
+class Job:
+    """A background task with progress reporting"""
+
+    def __init__(self, kind, metadata=None):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.status = "queued"
+        self.progress = 0.0
+        self.message = None
+        self.result = None
+        self.error = None
+        self.metadata = dict(metadata or {})
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+
+    def set_progress(self, progress, message=None):
+        """Called by the task to report progress in [0, 1]"""
+        self.progress = min(max(float(progress), 0.0), 1.0)
+        if message is not None:
+            self.message = message
+
+    @property
+    def finished(self):
+        return self.status in ("completed", "failed")
+
+    def to_dict(self):
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "progress": self.progress,
+            "message": self.message,
+            "result": self.result,
+            "error": self.error,
+            "metadata": self.metadata,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at
+        }
+
+
+class JobManager:
+    """Run tasks on background threads and keep their status for polling
+
+    A task is called as task(job, *args) and may report progress with
+    job.set_progress(). Its return value must be JSON serializable and
+    becomes job.result. Only the newest max_finished finished jobs are
+    kept.
+    """
+
+    def __init__(self, max_workers=2, max_finished=100):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self.max_finished = max_finished
+        self.jobs = {}
+        self.lock = threading.Lock()
+
+    def submit(self, kind, task, *args, metadata=None):
+        job = Job(kind, metadata)
+        with self.lock:
+            self.jobs[job.id] = job
+            self._prune()
+        self.executor.submit(self._run, job, task, args)
+        return job
+
+    def _run(self, job, task, args):
+        job.status = "running"
+        job.started_at = time.time()
+        try:
+            job.result = task(job, *args)
+            job.progress = 1.0
+            job.status = "completed"
+        except Exception as e:
+            logger.error("job_failed", job_id=job.id, kind=job.kind, error=str(e), traceback=traceback.format_exc())
+            job.error = str(e)
+            job.status = "failed"
+        finally:
+            job.finished_at = time.time()
+
+    def _prune(self):
+        finished = sorted((job for job in self.jobs.values() if job.finished), key=lambda job: job.finished_at)
+        for job in finished[:max(len(finished) - self.max_finished, 0)]:
+            del self.jobs[job.id]
+
+    def get(self, job_id):
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def list(self, kind=None):
+        with self.lock:
+            jobs = [job for job in self.jobs.values() if kind is None or job.kind == kind]
+        return sorted(jobs, key=lambda job: job.created_at, reverse=True)
+
+    def shutdown(self, wait=False):
+        self.executor.shutdown(wait=wait)
@@ -0,0 +1,120 @@
+import re
+
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+
+
+class LinearScorer:
+    """TF-IDF + logistic regression scoring on plain NumPy arrays
+
+    Holds what a fitted TfidfVectorizer and LogisticRegression need to
+    score a text (vocabulary, IDF weights, coefficients and intercepts)
+    and computes the word n-grams, the normalized TF-IDF vector and the
+    class probabilities itself. For one text that is a few dictionary
+    lookups and a small dot product, without the input validation and
+    sparse matrix construction of the sklearn calls.
+    """
+
+    def __init__(self, vocabulary, idf, coef, intercept, classes, ngram_range=(1, 1), stop_words=None,
+                 token_pattern=r"(?u)\b\w\w+\b", lowercase=True, sublinear_tf=False, norm='l2', multinomial=True):
+        self.vocabulary = vocabulary
+        self.idf = np.asarray(idf, dtype=np.float64)
+        self.coef = np.asarray(coef, dtype=np.float64)
+        self.intercept = np.asarray(intercept, dtype=np.float64)
+        self.classes = np.asarray(classes)
+        self.ngram_range = tuple(ngram_range)
+        self.stop_words = frozenset(stop_words or ())
+        self.token_pattern = re.compile(token_pattern)
+        self.lowercase = lowercase
+        self.sublinear_tf = sublinear_tf
+        self.norm = norm
+        self.multinomial = multinomial
+
+    @classmethod
+    def from_model(cls, vectorizer, model):
+        """Export a fitted TfidfVectorizer and LogisticRegression
+
+        Raises ValueError for other featurizers or models, and for
+        vectorizer settings the scorer does not reproduce (custom
+        analyzers, tokenizers or preprocessors, accent stripping).
+        """
+        if not isinstance(vectorizer, TfidfVectorizer) or not isinstance(model, LogisticRegression):
+            raise ValueError("LinearScorer needs a TfidfVectorizer and a LogisticRegression")
+        if not hasattr(vectorizer, 'vocabulary_') or not hasattr(model, 'coef_'):
+            raise ValueError("LinearScorer needs a fitted vectorizer and model")
+        if (vectorizer.analyzer != 'word' or vectorizer.tokenizer is not None or vectorizer.preprocessor is not None
+                or vectorizer.strip_accents is not None or vectorizer.binary or not vectorizer.use_idf
+                or re.compile(vectorizer.token_pattern).groups > 1):
+            raise ValueError("Unsupported TfidfVectorizer settings for LinearScorer")
+        multi_class = getattr(model, 'multi_class', 'auto')
+        multinomial = multi_class == 'multinomial' or (multi_class in ('auto', 'deprecated')
+                                                       and model.solver != 'liblinear')
+        return cls(dict(vectorizer.vocabulary_), vectorizer.idf_, model.coef_, model.intercept_, model.classes_,
+                   ngram_range=vectorizer.ngram_range, stop_words=vectorizer.get_stop_words(),
+                   token_pattern=vectorizer.token_pattern, lowercase=vectorizer.lowercase,
+                   sublinear_tf=vectorizer.sublinear_tf, norm=vectorizer.norm, multinomial=multinomial)
+
+    def ngrams(self, text):
+        """The word n-grams of text, as TfidfVectorizer's analyzer produces them"""
+        if self.lowercase:
+            text = text.lower()
+        tokens = self.token_pattern.findall(text)
+        if self.stop_words:
+            tokens = [token for token in tokens if token not in self.stop_words]
+        min_n, max_n = self.ngram_range
+        if max_n == 1:
+            return tokens
+        grams = list(tokens) if min_n == 1 else []
+        for n in range(max(min_n, 2), min(max_n, len(tokens)) + 1):
+            grams.extend(' '.join(tokens[i:i + n]) for i in range(len(tokens) - n + 1))
+        return grams
+
+    def features(self, text):
+        """(columns, values) of the TF-IDF vector of text"""
+        counts = {}
+        vocabulary = self.vocabulary
+        for gram in self.ngrams(text):
+            column = vocabulary.get(gram)
+            if column is not None:
+                counts[column] = counts.get(column, 0) + 1
+        columns = np.fromiter(counts.keys(), dtype=np.intp, count=len(counts))
+        values = np.fromiter(counts.values(), dtype=np.float64, count=len(counts))
+        if self.sublinear_tf:
+            values = np.log(values) + 1
+        values *= self.idf[columns]
+        if self.norm == 'l2':
+            length = np.sqrt(values @ values)
+        elif self.norm == 'l1':
+            length = np.abs(values).sum()
+        else:
+            length = 0.0
+        if length > 0:
+            values /= length
+        return columns, values
+
+    def transform(self, texts):
+        return [self.features(text) for text in texts]
+
+    def decision_function(self, features):
+        """Class scores (one row per (columns, values) pair), like LogisticRegression.decision_function"""
+        coef = self.coef
+        scores = np.empty((len(features), coef.shape[0]))
+        for row, (columns, values) in enumerate(features):
+            scores[row] = coef[:, columns] @ values
+        return scores + self.intercept
+
+    def predict_proba(self, features):
+        """Class probabilities in the order of classes, like LogisticRegression.predict_proba"""
+        scores = self.decision_function(features)
+        if scores.shape[1] == 1:
+            # Binary model: one score for the second class
+            positive = 1.0 / (1.0 + np.exp(-scores[:, 0]))
+            return np.column_stack([1.0 - positive, positive])
+        if not self.multinomial:
+            # One-vs-rest: independent sigmoids, normalized
+            probabilities = 1.0 / (1.0 + np.exp(-scores))
+            return probabilities / probabilities.sum(axis=1, keepdims=True)
+        scores -= scores.max(axis=1, keepdims=True)
+        np.exp(scores, out=scores)
+        return scores / scores.sum(axis=1, keepdims=True)
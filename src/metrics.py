@@ -0,0 +1,184 @@
+import bisect
+import os
+import sys
+import threading
+import time
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# METRICS_ENABLED=0 turns every histogram into a no-op and disables /metrics
+ENABLED = os.environ.get('METRICS_ENABLED', '1') == '1'
+
+# Upper bounds (le) of the histogram buckets: seconds, and items per model call
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BATCH_SIZE_BUCKETS = tuple(2 ** i for i in range(13))
+
+PROCESS_START_TIME = time.time()
+
+
+def format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value))
+
+
+def format_labels(labels):
+    """Render a sequence of (name, value) pairs as a Prometheus label set"""
+    if not labels:
+        return ''
+    pairs = []
+    for name, value in labels:
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        pairs.append(f'{name}="{value}"')
+    return '{' + ','.join(pairs) + '}'
+
+
+def render_family(name, kind, help_text, samples):
+    """Text exposition lines of one metric; samples are (suffix, labels, value)"""
+    lines = [f'# HELP {name} {help_text}', f'# TYPE {name} {kind}']
+    for suffix, labels, value in samples:
+        lines.append(f'{name}{suffix}{format_labels(labels)} {format_value(value)}')
+    return lines
+
+
+class Histogram:
+    """Cumulative bucket counts, sum and count of observed values per label set"""
+
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self.lock = threading.Lock()
+        # label values -> [count per bucket (the last one is +Inf), sum]
+        self.series = {}
+
+    def observe(self, value, *labelvalues):
+        """Record value for the given label values, in the order of labelnames"""
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            series = self.series.get(labelvalues)
+            if series is None:
+                series = self.series[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def samples(self):
+        with self.lock:
+            series = [(labelvalues, list(counts), total) for labelvalues, (counts, total) in self.series.items()]
+        for labelvalues, counts, total in sorted(series):
+            labels = list(zip(self.labelnames, labelvalues))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                yield '_bucket', labels + [('le', format_value(bound))], cumulative
+            yield '_sum', labels, total
+            yield '_count', labels, cumulative
+
+
+class NullHistogram:
+    """Stands in for every histogram when metrics are disabled"""
+
+    def observe(self, value, *labelvalues):
+        pass
+
+
+class Registry:
+    """Histograms updated in place plus collectors that report existing counters at scrape time
+
+    A collector is a function returning a list of (name, kind, help,
+    samples) families, where samples is a list of (labels dict, value).
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histograms = {}
+        self.collectors = []
+
+    def histogram(self, name, help_text, labelnames=(), buckets=LATENCY_BUCKETS):
+        """The histogram called name, created on first use"""
+        with self.lock:
+            if name not in self.histograms:
+                self.histograms[name] = Histogram(name, help_text, labelnames, buckets)
+            return self.histograms[name]
+
+    def add_collector(self, collect):
+        self.collectors.append(collect)
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format"""
+        lines = []
+        for histogram in list(self.histograms.values()):
+            lines.extend(render_family(histogram.name, histogram.kind, histogram.help_text, histogram.samples()))
+        for collect in list(self.collectors):
+            for name, kind, help_text, samples in collect():
+                lines.extend(render_family(name, kind, help_text,
+                                           [('', sorted(labels.items()), value) for labels, value in samples]))
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+NULL_HISTOGRAM = NullHistogram()
+
+
+def histogram(name, help_text, labelnames=(), buckets=LATENCY_BUCKETS):
+    """A histogram of the default registry, or a no-op one when metrics are disabled"""
+    if not ENABLED:
+        return NULL_HISTOGRAM
+    return REGISTRY.histogram(name, help_text, labelnames, buckets)
+
+
+def add_collector(collect):
+    if ENABLED:
+        REGISTRY.add_collector(collect)
+
+
+def process_rss_bytes():
+    """Resident set size of this process, or None where /proc is not available"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def collect_process():
+    families = []
+    rss = process_rss_bytes()
+    if rss is not None:
+        families.append(('process_resident_memory_bytes', 'gauge', 'Resident memory size in bytes', [({}, rss)]))
+    if resource is not None:
+        # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        peak = peak if sys.platform == 'darwin' else peak * 1024
+        families.append(('process_max_resident_memory_bytes', 'gauge', 'Peak resident memory size in bytes',
+                         [({}, peak)]))
+    times = os.times()
+    families.append(('process_cpu_seconds_total', 'counter', 'User and system CPU time in seconds',
+                     [({}, times.user + times.system)]))
+    families.append(('process_start_time_seconds', 'gauge', 'Start time of the process since the epoch',
+                     [({}, PROCESS_START_TIME)]))
+    families.append(('process_threads', 'gauge', 'Python threads', [({}, threading.active_count())]))
+    return families
+
+
+add_collector(collect_process)
+
+# Shared by the video pipeline, the frame analyzer and the face model
+FRAME_STAGE_SECONDS = histogram('frame_stage_duration_seconds',
+                                'Time per frame spent in each stage (read, detect, preprocess, predict, encode)',
+                                ['stage'])
+# Every model call, whichever path (scheduler, batch endpoint, stream) made it
+MODEL_BATCH_SIZE = histogram('model_batch_size', 'Items scored per model call', ['model'], BATCH_SIZE_BUCKETS)
+MODEL_INFERENCE_SECONDS = histogram('model_inference_duration_seconds', 'Time per model call', ['model'])
+
+
+def observe_inference(model, batch_size, seconds):
+    """Record one call of model (sentiment, emotion or face) over batch_size items"""
+    MODEL_BATCH_SIZE.observe(batch_size, model)
+    MODEL_INFERENCE_SECONDS.observe(seconds, model)
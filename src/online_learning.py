@@ -0,0 +1,82 @@
+import os
+import shutil
+import threading
+import time
+
+import pandas as pd
+
+
+class FeedbackLearner:
+    """Fold labeled feedback into an incremental analyzer and decide when to compact
+
+    Every feedback row is appended to a Text,Emotion CSV (so full retrains
+    include it) and learned right away with partial_fit. Incremental
+    updates drift from what a full retrain would give, so once
+    compact_after_rows rows arrived, or compact_interval seconds passed
+    with new rows, needs_compaction() asks for a full refit. A compaction
+    trains on a snapshot of the CSV; rows that arrive while it runs are
+    replayed into the new analyzer before it is installed.
+    """
+
+    def __init__(self, feedback_path, compact_after_rows=5000, compact_interval=3600):
+        self.feedback_path = feedback_path
+        self.compact_after_rows = compact_after_rows
+        self.compact_interval = compact_interval
+        self.lock = threading.Lock()
+        # Rows learned incrementally since the last compaction snapshot
+        self.pending = []
+        self.last_compaction = time.time()
+        self.compactions = 0
+
+    def add(self, analyzer, texts, emotions):
+        """Store and learn labeled rows; returns the number of rows the model learned"""
+        rows = list(zip(texts, emotions))
+        with self.lock:
+            directory = os.path.dirname(self.feedback_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            pd.DataFrame(rows, columns=['Text', 'Emotion']).to_csv(
+                self.feedback_path, mode='a', index=False, header=not os.path.exists(self.feedback_path))
+            learned = analyzer.partial_fit(texts, emotions)
+            self.pending.extend(rows)
+        return learned
+
+    def needs_compaction(self):
+        with self.lock:
+            if not self.pending:
+                return False
+            return (len(self.pending) >= self.compact_after_rows
+                    or time.time() - self.last_compaction >= self.compact_interval)
+
+    def snapshot(self, path):
+        """Copy the feedback rows received so far to path for a compaction
+
+        Returns a marker for install(), or None when there is no feedback yet.
+        """
+        with self.lock:
+            if not os.path.exists(self.feedback_path):
+                return None
+            shutil.copyfile(self.feedback_path, path)
+            return len(self.pending)
+
+    def install(self, analyzer, marker, swap):
+        """Replay rows received after the snapshot into analyzer, then call swap(analyzer)"""
+        with self.lock:
+            newer = self.pending[marker or 0:]
+            if newer:
+                texts, emotions = zip(*newer)
+                analyzer.partial_fit(list(texts), list(emotions))
+            self.pending = list(newer)
+            self.last_compaction = time.time()
+            self.compactions += 1
+            swap(analyzer)
+
+    def get_stats(self):
+        with self.lock:
+            return {
+                "pending_rows": len(self.pending),
+                "seconds_since_compaction": time.time() - self.last_compaction,
+                "compactions": self.compactions,
+                "compact_after_rows": self.compact_after_rows,
+                "compact_interval": self.compact_interval
+            }
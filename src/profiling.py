@@ -0,0 +1,121 @@
+import cProfile
+import collections
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+import uuid
+
+# Functions listed in the text summary of a request profile
+SUMMARY_LIMIT = 60
+
+# The request profile running on this thread, if any
+_state = threading.local()
+# cProfile instances must not overlap (Python 3.12+ refuses a second one)
+_request_lock = threading.Lock()
+
+
+def profiling_this_thread():
+    """Whether the current thread is serving a profiled request"""
+    return getattr(_state, 'profile', None) is not None
+
+
+def new_profile_id():
+    return uuid.uuid4().hex
+
+
+class RequestProfile:
+    """cProfile of one request
+
+    stop() writes <id>.prof (pstats, for snakeviz or pstats.Stats) and
+    <id>.txt, the functions with the highest cumulative time, to directory.
+    Only one request is profiled at a time; start() returns False while
+    another one is.
+    """
+
+    def __init__(self, directory, label):
+        self.id = new_profile_id()
+        self.directory = directory
+        self.label = label
+        self.profiler = cProfile.Profile()
+        self.seconds = None
+        self._start = None
+
+    def start(self):
+        if not _request_lock.acquire(blocking=False):
+            return False
+        _state.profile = self
+        self._start = time.perf_counter()
+        self.profiler.enable()
+        return True
+
+    def stop(self):
+        self.profiler.disable()
+        self.seconds = time.perf_counter() - self._start
+        _state.profile = None
+        _request_lock.release()
+        os.makedirs(self.directory, exist_ok=True)
+        self.profiler.dump_stats(os.path.join(self.directory, f"{self.id}.prof"))
+        summary = io.StringIO()
+        summary.write(f"{self.label}: {self.seconds * 1000:.1f} ms\n\n")
+        pstats.Stats(self.profiler, stream=summary).sort_stats('cumulative').print_stats(SUMMARY_LIMIT)
+        with open(os.path.join(self.directory, f"{self.id}.txt"), 'w') as f:
+            f.write(summary.getvalue())
+
+
+def frame_name(code):
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """Sample the Python stacks of running threads every interval seconds
+
+    Only threads whose name starts with one of thread_prefixes are sampled
+    (all threads when it is None). The stacks are counted in the folded
+    format read by flamegraph.pl and speedscope: one line per distinct
+    stack, the thread name and then the frames from the root, separated by
+    ';', followed by the number of samples.
+    """
+
+    def __init__(self, interval=0.005, thread_prefixes=None):
+        self.interval = interval
+        self.thread_prefixes = tuple(thread_prefixes) if thread_prefixes is not None else None
+        self.stacks = collections.Counter()
+        self.samples = 0
+
+    def sample(self):
+        own = threading.get_ident()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            name = names.get(ident, str(ident))
+            if ident == own or (self.thread_prefixes is not None and not name.startswith(self.thread_prefixes)):
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(frame_name(frame.f_code))
+                frame = frame.f_back
+            stack.append(name)
+            self.stacks[';'.join(reversed(stack))] += 1
+        self.samples += 1
+
+    def run(self, seconds, progress=None):
+        """Sample for seconds; progress(fraction) is called about once a second"""
+        start = time.perf_counter()
+        deadline = start + seconds
+        next_report = start + 1.0
+        while True:
+            now = time.perf_counter()
+            if now >= deadline:
+                break
+            self.sample()
+            if progress is not None and now >= next_report:
+                progress((now - start) / seconds)
+                next_report = now + 1.0
+            time.sleep(self.interval)
+
+    def write_folded(self, path):
+        with open(path, 'w') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
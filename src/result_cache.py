@@ -0,0 +1,187 @@
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from src.structured_log import RateLimitedLogger
+
+# A MongoDB outage fails the shared lookup of every request
+logger = RateLimitedLogger('result_cache')
+
+
+def normalize_text(text):
+    """Cache key form of a text: lowercase with whitespace runs collapsed
+
+    TextAnalyzer lowercases before tokenizing and the tokenizer splits on
+    any whitespace, so texts with the same key get the same results.
+    """
+    return ' '.join(text.lower().split())
+
+
+class MongoResultStore:
+    """Shared second-level store for ResultCache, so worker processes share results
+
+    Entries live in a MongoDB collection and are removed by a TTL index
+    once they expire.
+    """
+
+    def __init__(self, collection, ttl):
+        self.collection = collection
+        self.ttl = ttl
+        try:
+            self.collection.create_index('expires_at', expireAfterSeconds=0)
+        except Exception as e:
+            logger.warning("ttl_index_failed", error=str(e))
+
+    def get(self, key):
+        document = self.collection.find_one({'_id': key}, {'value': 1, 'expires_at': 1})
+        # The TTL monitor runs about once a minute, so check expiry here too
+        if document is None or document['expires_at'] <= datetime.utcnow():
+            return None
+        return document['value']
+
+    def set(self, key, value):
+        expires_at = datetime.utcnow() + timedelta(seconds=self.ttl)
+        self.collection.replace_one({'_id': key}, {'value': value, 'expires_at': expires_at}, upsert=True)
+
+
+class ResultCache:
+    """Thread-safe LRU cache with a time-to-live for analysis results
+
+    Holds at most max_size entries, each for at most ttl seconds. With a
+    shared store (e.g. MongoResultStore), local misses are looked up there
+    and new results are written to both. Keys are strings, values are
+    JSON-serializable dicts; copies are returned so callers may modify them.
+    """
+
+    def __init__(self, max_size=10000, ttl=3600, shared=None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.shared = shared
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.shared_errors = 0
+
+    def get(self, key):
+        """Cached value for key, or None"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return dict(entry[1])
+                del self._entries[key]
+                self.expirations += 1
+
+        value = None
+        if self.shared is not None:
+            try:
+                value = self.shared.get(key)
+            except Exception as e:
+                self.shared_errors += 1
+                logger.error("shared_lookup_failed", error=str(e))
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.shared_hits += 1
+            self._store(key, value, now)
+        return dict(value)
+
+    def set(self, key, value):
+        with self._lock:
+            self._store(key, dict(value), time.monotonic())
+        if self.shared is not None:
+            try:
+                self.shared.set(key, value)
+            except Exception as e:
+                self.shared_errors += 1
+                logger.error("shared_update_failed", error=str(e))
+
+    def _store(self, key, value, now):
+        self._entries[key] = (now + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        """Drop all local entries (shared entries are keyed by model version and expire)"""
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self):
+        with self._lock:
+            lookups = self.hits + self.shared_hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl": self.ttl,
+                "shared": self.shared is not None,
+                "hits": self.hits,
+                "shared_hits": self.shared_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "shared_errors": self.shared_errors,
+                "hit_rate": (self.hits + self.shared_hits) / lookups if lookups else 0.0
+            }
+
+
+class CachedTextAnalyzer:
+    """Serve TextAnalyzer results from a ResultCache
+
+    Results are keyed on the task, the analyzer's model_version and the
+    normalized text, so a retrained model never returns results of the
+    previous one. Everything else is delegated to the wrapped analyzer.
+    """
+
+    def __init__(self, analyzer, cache):
+        self.analyzer = analyzer
+        self.cache = cache
+
+    def __getattr__(self, name):
+        return getattr(self.analyzer, name)
+
+    def _key(self, task, text):
+        return f"{task}:{self.analyzer.model_version}:{normalize_text(text)}"
+
+    def _analyze(self, task, analyze_batch, texts):
+        keys = [self._key(task, text) for text in texts]
+        results = [self.cache.get(key) for key in keys]
+        missing = {}
+        for i, result in enumerate(results):
+            if result is None:
+                missing.setdefault(keys[i], []).append(i)
+        if missing:
+            # Analyze each distinct missing text once
+            first = [indices[0] for indices in missing.values()]
+            for key, result in zip(missing, analyze_batch([texts[i] for i in first])):
+                if not result.get('message', '').startswith('Error'):
+                    self.cache.set(key, result)
+                for i in missing[key]:
+                    results[i] = dict(result)
+        return results
+
+    def analyze_sentiment(self, text):
+        return self.analyze_sentiment_batch([text])[0]
+
+    def analyze_sentiment_batch(self, texts):
+        return self._analyze('sentiment', self.analyzer.analyze_sentiment_batch, texts)
+
+    def analyze_emotion(self, text):
+        return self.analyze_emotion_batch([text])[0]
+
+    def analyze_emotion_batch(self, texts):
+        return self._analyze('emotion', self.analyzer.analyze_emotion_batch, texts)
+
+    def invalidate(self):
+        """Drop cached results, e.g. after the wrapped analyzer was retrained"""
+        self.cache.clear()
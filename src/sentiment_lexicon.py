@@ -0,0 +1,168 @@
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from src.text_model_cache import dataset_fingerprint
+
+POLARITIES = ('negative', 'neutral', 'positive')
+# Score order; ties go to the first sentiment
+SCORE_ORDER = ('positive', 'negative', 'neutral')
+FLIPPED = {'positive': 'negative', 'negative': 'positive', 'neutral': 'neutral'}
+
+
+def lexicon_config(preprocessor):
+    """Preprocessing settings that change how lexicon entries are compiled"""
+    return {
+        "negation_words": sorted(preprocessor.negation_words),
+        "stopwords": sorted(preprocessor.stop_words)
+    }
+
+
+def compile_lexicon(csv_path, index_path, preprocessor):
+    """Build the on-disk index of a lexicon CSV
+
+    The CSV needs 'word' and 'sentiment' (positive/negative/neutral)
+    columns and may have a 'weight' column (intensity, default 1). Entries
+    are preprocessed like the analyzed text so that they match its tokens:
+    multi-word entries become phrases, "not good" becomes NOT_good, and
+    entries that are only stopwords are dropped (stopwords inside a phrase
+    are ignored, as in the text). The index holds the terms
+    as a sorted array with aligned polarity and weight arrays.
+    """
+    df = pd.read_csv(csv_path)
+    if 'weight' in df.columns:
+        weights = pd.to_numeric(df['weight'], errors='coerce').fillna(1.0)
+    else:
+        weights = [1.0] * len(df)
+    entries = {}
+    for word, sentiment, weight in zip(df['word'].astype(str), df['sentiment'].astype(str).str.lower(), weights):
+        term = preprocessor.preprocess(word)
+        if term and sentiment in POLARITIES:
+            entries[term] = (POLARITIES.index(sentiment), float(weight))
+
+    terms = sorted(entries)
+    directory = os.path.dirname(index_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = index_path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        np.savez(f, source=np.array(dataset_fingerprint([csv_path], lexicon_config(preprocessor))),
+                 terms=np.array(terms, dtype=str),
+                 polarity=np.array([entries[term][0] for term in terms], dtype=np.int8),
+                 weight=np.array([entries[term][1] for term in terms], dtype=np.float32))
+    os.replace(tmp_path, index_path)
+
+
+class SentimentLexicon:
+    """Weighted word and phrase sentiment scoring over preprocessed tokens
+
+    Tokens are scored left to right, taking the longest phrase that starts
+    at each token. A NOT_ token matches an explicit NOT_ entry, or else
+    the entry of its base word with positive and negative swapped.
+    """
+
+    def __init__(self, terms, polarity, weight, source=None):
+        self.entries = {term: (POLARITIES[p], float(w))
+                        for term, p, w in zip(terms.tolist(), polarity.tolist(), weight.tolist())}
+        self.source = source
+        # Longest phrase starting with each first token
+        self.phrase_lengths = {}
+        for term in self.entries:
+            words = term.split(' ')
+            if len(words) > 1:
+                self.phrase_lengths[words[0]] = max(self.phrase_lengths.get(words[0], 1), len(words))
+
+    def __len__(self):
+        return len(self.entries)
+
+    @classmethod
+    def load(cls, index_path):
+        with np.load(index_path, allow_pickle=False) as data:
+            return cls(data['terms'], data['polarity'], data['weight'], str(data['source']))
+
+    def _match(self, tokens, i):
+        """(sentiment, weight, tokens used) of the entry starting at tokens[i], or None"""
+        entries = self.entries
+        token = tokens[i]
+        negated = token.startswith('NOT_')
+        base = token[4:] if negated else None
+        longest = max(self.phrase_lengths.get(token, 1), self.phrase_lengths.get(base, 1) if negated else 1)
+        for size in range(min(longest, len(tokens) - i), 0, -1):
+            rest = tokens[i + 1:i + size]
+            entry = entries.get(' '.join([token, *rest]) if rest else token)
+            if entry is not None:
+                return entry[0], entry[1], size
+            if negated:
+                entry = entries.get(' '.join([base, *rest]) if rest else base)
+                if entry is not None:
+                    return FLIPPED[entry[0]], entry[1], size
+        return None
+
+    def score(self, tokens):
+        """Summed weight per sentiment of the entries found in tokens"""
+        entries = self.entries
+        phrase_lengths = self.phrase_lengths
+        scores = dict.fromkeys(SCORE_ORDER, 0.0)
+        skip_to = 0
+        for i, token in enumerate(tokens):
+            if i < skip_to:
+                # Part of a phrase already scored
+                continue
+            if token in phrase_lengths or token.startswith('NOT_'):
+                match = self._match(tokens, i)
+                if match is not None:
+                    scores[match[0]] += match[1]
+                    skip_to = i + match[2]
+            else:
+                # Plain word that starts no phrase: a single lookup
+                entry = entries.get(token)
+                if entry is not None:
+                    scores[entry[0]] += entry[1]
+        return scores
+
+    def sentiment(self, tokens):
+        """Dominant sentiment of tokens and its share of the total weight, or None without matches"""
+        scores = self.score(tokens)
+        total = sum(scores.values())
+        if total <= 0:
+            return None
+        dominant = max(scores, key=scores.get)
+        return {
+            'sentiment': dominant,
+            'confidence': scores[dominant] / total
+        }
+
+
+def _index_source(index_path):
+    with np.load(index_path, allow_pickle=False) as data:
+        return str(data['source'])
+
+
+# Loaded lexicons, shared by all analyzers of the process
+_lexicons = {}
+_lexicons_lock = threading.Lock()
+
+
+def load_lexicon(csv_path, index_path, preprocessor):
+    """The lexicon of csv_path, compiling index_path first when it is missing or out of date
+
+    Without the CSV an existing index is used as is. Returns None when
+    neither exists.
+    """
+    with _lexicons_lock:
+        if os.path.exists(csv_path):
+            source = dataset_fingerprint([csv_path], lexicon_config(preprocessor))
+            lexicon = _lexicons.get(index_path)
+            if lexicon is not None and lexicon.source == source:
+                return lexicon
+            if not os.path.exists(index_path) or _index_source(index_path) != source:
+                print(f"Compiling sentiment lexicon {csv_path} to {index_path}")
+                compile_lexicon(csv_path, index_path, preprocessor)
+        elif not os.path.exists(index_path):
+            return None
+        elif index_path in _lexicons:
+            return _lexicons[index_path]
+        _lexicons[index_path] = SentimentLexicon.load(index_path)
+        return _lexicons[index_path]
@@ -0,0 +1,28 @@
+import os
+
+# Thread pool sizes read by the BLAS/OpenMP libraries behind NumPy and
+# scikit-learn and by TensorFlow, when they are first loaded
+THREAD_VARIABLES = ('OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS', 'NUMEXPR_NUM_THREADS',
+                    'VECLIB_MAXIMUM_THREADS', 'TF_NUM_INTRAOP_THREADS', 'INFERENCE_THREADS')
+
+
+def worker_threads(workers):
+    """Compute threads per worker that keep workers x threads within the CPU count"""
+    return max(1, (os.cpu_count() or 1) // max(1, workers))
+
+
+def limit_threads(threads):
+    """Cap the compute thread pools of this process and the workers it forks
+
+    Must run before NumPy, scikit-learn or TensorFlow are imported.
+    Variables that are already set are left alone.
+    """
+    for name in THREAD_VARIABLES:
+        os.environ.setdefault(name, str(threads))
+    os.environ.setdefault('TF_NUM_INTEROP_THREADS', '1')
+
+
+def limit_loaded_threads(threads):
+    """Cap the thread pools of the native libraries that are already loaded"""
+    from threadpoolctl import threadpool_limits
+    threadpool_limits(threads)
@@ -0,0 +1,50 @@
+import json
+import os
+import sys
+import threading
+import time
+
+# Seconds between two lines of the same event from a RateLimitedLogger
+LOG_INTERVAL = float(os.environ.get('LOG_RATE_LIMIT_SECONDS', 10))
+
+
+class RateLimitedLogger:
+    """JSON log lines for hot loops, at most one per event every interval seconds
+
+    Each line holds the time, level, logger name, event and any extra
+    fields. Repeats of an event within interval seconds are dropped and
+    counted, and the next line of that event reports them as "suppressed",
+    so a failing camera or model logs once instead of on every frame.
+    """
+
+    def __init__(self, name, interval=None):
+        self.name = name
+        self.interval = LOG_INTERVAL if interval is None else interval
+        self.lock = threading.Lock()
+        # event -> (time of its last line, lines suppressed since)
+        self.events = {}
+
+    def log(self, level, event, **fields):
+        """Write the line unless event was logged less than interval seconds ago; returns whether it was"""
+        now = time.monotonic()
+        with self.lock:
+            last, suppressed = self.events.get(event, (None, 0))
+            if last is not None and now - last < self.interval:
+                self.events[event] = (last, suppressed + 1)
+                return False
+            self.events[event] = (now, 0)
+        record = {"ts": round(time.time(), 3), "level": level, "logger": self.name, "event": event}
+        record.update(fields)
+        if suppressed:
+            record["suppressed"] = suppressed
+        print(json.dumps(record, default=str), file=sys.stdout, flush=True)
+        return True
+
+    def info(self, event, **fields):
+        return self.log("info", event, **fields)
+
+    def warning(self, event, **fields):
+        return self.log("warning", event, **fields)
+
+    def error(self, event, **fields):
+        return self.log("error", event, **fields)
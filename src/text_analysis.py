@@ -2,13 +2,45 @@ import pandas as pd
 import numpy as np
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.model_selection import train_test_split
-from sklearn.linear_model import LogisticRegression
+from sklearn.linear_model import LogisticRegression, SGDClassifier
 from sklearn.metrics import accuracy_score, classification_report
-import re
 import nltk
 from nltk.corpus import stopwords
-from nltk.tokenize import word_tokenize
 import os
+import time
+import copy
+import multiprocessing
+import threading
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from src.text_preprocessing import TextPreprocessor
+from src.sentiment_lexicon import load_lexicon
+from src.analysis_context import AnalysisContext, StageTimer
+from src.linear_scorer import LinearScorer
+from src.metrics import observe_inference
+from src.text_model_cache import dataset_fingerprint, load_text_model, model_digest, save_text_model
+from src.training_pipeline import TrainingPipeline, make_hashing_vectorizer, make_online_vectorizer
+
+# Trained models are cached here, keyed by a hash of their datasets and settings
+TEXT_MODEL_CACHE_DIR = os.environ.get('TEXT_MODEL_CACHE_DIR', os.path.join("models", "text"))
+# Text features: 'tfidf' (fitted vocabulary) or 'hashing' (hashed n-grams, featurized in parallel)
+TEXT_FEATURIZER = os.environ.get('TEXT_FEATURIZER', 'tfidf')
+# Processes used to preprocess and featurize large training sets
+TEXT_TRAINING_WORKERS = int(os.environ.get('TEXT_TRAINING_WORKERS', os.cpu_count() or 1))
+# Sentiment words lexicon ('word', 'sentiment' and optional 'weight' columns;
+# multi-word phrases allowed), compiled to an index on first use
+SENTIMENT_WORDS_PATH = os.environ.get('SENTIMENT_WORDS_PATH', r"C:\Users\knile\Downloads\sentiment_words_10000.csv")
+SENTIMENT_LEXICON_INDEX = os.path.join(TEXT_MODEL_CACHE_DIR, "sentiment_lexicon.npz")
+# Incremental mode: stateless hashed features and an SGD model that new labeled
+# rows can be folded into with partial_fit, without retraining
+TEXT_INCREMENTAL = os.environ.get('TEXT_INCREMENTAL', '0') == '1'
+# Labeled rows received through /feedback/voice_emotion (incremental mode)
+EMOTION_FEEDBACK_PATH = os.environ.get('EMOTION_FEEDBACK_PATH', os.path.join("data", "voice_emotion_feedback.csv"))
+# Score TF-IDF + logistic regression models with the NumPy LinearScorer instead of
+# sklearn for calls of up to TEXT_SCORER_MAX_BATCH texts (larger batches are
+# faster as one sparse matrix product)
+TEXT_FAST_SCORER = os.environ.get('TEXT_FAST_SCORER', '1') == '1'
+TEXT_SCORER_MAX_BATCH = int(os.environ.get('TEXT_SCORER_MAX_BATCH', 64))
 
 # Download required NLTK data
 try:
@@ -18,10 +50,27 @@ except:
     pass
 
 class TextAnalyzer:
-    def __init__(self, model_path=None):
-        self.vectorizer = TfidfVectorizer(max_features=5000, stop_words='english', ngram_range=(1, 2))
-        self.model = LogisticRegression(random_state=42, max_iter=1000)
+    def __init__(self, model_path=None, featurizer=None, training_workers=None, incremental=None):
+        self.incremental = TEXT_INCREMENTAL if incremental is None else incremental
+        if self.incremental:
+            self.featurizer = 'online'
+            self.vectorizer = make_online_vectorizer()
+            self.model = SGDClassifier(loss='log_loss', alpha=1e-5, random_state=42)
+        else:
+            self.featurizer = featurizer or TEXT_FEATURIZER
+            if self.featurizer == 'hashing':
+                self.vectorizer = make_hashing_vectorizer()
+            else:
+                self.vectorizer = TfidfVectorizer(max_features=5000, stop_words='english', ngram_range=(1, 2))
+            self.model = LogisticRegression(random_state=42, max_iter=1000)
+        # Serializes partial_fit updates
+        self.update_lock = threading.Lock()
         self.is_trained = False
+        # Identifies the fitted model; changes whenever it is retrained or reloaded
+        self.model_version = None
+        # NumPy copy of the fitted model for small calls, or None
+        self.scorer = None
+        self.training_accuracy = None
         self.label_mapping = {'negative': 0, 'neutral': 1, 'positive': 2}
         self.reverse_label_mapping = {0: 'negative', 1: 'neutral', 2: 'positive'}
         # For emotion detection (face emotions)
@@ -38,105 +87,58 @@ class TextAnalyzer:
         }
         # Define negation words
         self.negation_words = {'not', 'no', 'never', 'nothing', 'nowhere', 'noone', 'none', 'nor', 'neither', 'n\'t'}
-        # Load sentiment words dictionary
-        self.sentiment_words = {}
+        self.preprocessor = TextPreprocessor(self.negation_words)
+        self.training_pipeline = TrainingPipeline(self.negation_words, workers=training_workers or TEXT_TRAINING_WORKERS)
+        # Load sentiment words lexicon
+        self.lexicon = None
         self.load_sentiment_words()
         
     def load_sentiment_words(self):
-        """Load sentiment words dictionary for enhanced analysis"""
+        """Load the sentiment words lexicon (compiled once, shared by all analyzers)"""
         try:
-            sentiment_words_path = r"C:\Users\knile\Downloads\sentiment_words_10000.csv"
-            if os.path.exists(sentiment_words_path):
-                df = pd.read_csv(sentiment_words_path)
-                # Convert to dictionary for faster lookup
-                self.sentiment_words = dict(zip(df['word'], df['sentiment']))
-                print(f"Loaded {len(self.sentiment_words)} sentiment words")
+            self.lexicon = load_lexicon(SENTIMENT_WORDS_PATH, SENTIMENT_LEXICON_INDEX, self.preprocessor)
+            if self.lexicon is not None:
+                print(f"Loaded {len(self.lexicon)} sentiment lexicon entries")
             else:
-                print(f"Sentiment words file not found at {sentiment_words_path}")
+                print(f"Sentiment words file not found at {SENTIMENT_WORDS_PATH}")
         except Exception as e:
             print(f"Error loading sentiment words: {e}")
-            self.sentiment_words = {}
+            self.lexicon = None
     
     def preprocess_text(self, text):
         """Preprocess text for analysis"""
-        # Convert to lowercase
-        text = text.lower()
-        # Handle negations by adding NOT_ prefix to words following negation words
-        # First, tokenize to preserve word boundaries
-        tokens = word_tokenize(text)
-        processed_tokens = []
-        negate = False
-        for token in tokens:
-            # Check if token is a negation word
-            if token in self.negation_words:
-                negate = True
-                processed_tokens.append(token)
-            elif negate and token.isalpha():  # Only negate actual words, not punctuation
-                processed_tokens.append(f"NOT_{token}")
-                negate = False  # Reset after negating one word
-            else:
-                processed_tokens.append(token)
-                if token not in [',', '.', '!', '?', ';', ':']:  # Reset negate after punctuation
-                    negate = False
-        
-        # Join tokens and then remove special characters and digits
-        text = ' '.join(processed_tokens)
-        text = re.sub(r'[^a-zA-Z\s_]', ' ', text)  # Replace special chars with spaces, but keep underscores
-        text = re.sub(r'\s+', ' ', text).strip()  # Normalize whitespace
-        
-        # Remove stopwords (but keep NOT_ prefixed words)
-        words = text.split()
-        stop_words = set(stopwords.words('english'))
-        words = [word for word in words if word not in stop_words or word.startswith('NOT_')]
-        
-        # Join words back to text
-        return ' '.join(words)
+        # Lowercase, tokenize, prefix the word after a negation with NOT_,
+        # strip non-letters and remove stopwords (see TextPreprocessor)
+        return self.preprocessor.preprocess(text)
     
     def get_sentiment_from_words(self, text):
-        """Get sentiment based on sentiment words dictionary"""
-        if not self.sentiment_words:
+        """Get sentiment based on sentiment words lexicon"""
+        if self.lexicon is None:
             return None
             
         # Preprocess the text first to handle negations
-        processed_text = self.preprocess_text(text)
-        words = processed_text.split()
-        sentiment_scores = {'positive': 0, 'negative': 0, 'neutral': 0}
-        
-        for word in words:
-            # Check for negated words
-            if word.startswith('NOT_'):
-                base_word = word[4:]  # Remove 'NOT_' prefix
-                if base_word in self.sentiment_words:
-                    # Flip the sentiment for negated words
-                    original_sentiment = self.sentiment_words[base_word]
-                    if original_sentiment == 'positive':
-                        sentiment_scores['negative'] += 1
-                    elif original_sentiment == 'negative':
-                        sentiment_scores['positive'] += 1
-                    else:
-                        sentiment_scores['neutral'] += 1
-            else:
-                # Check regular words
-                if word in self.sentiment_words:
-                    sentiment = self.sentiment_words[word]
-                    sentiment_scores[sentiment] += 1
-        
-        # Determine overall sentiment
-        total_words = sum(sentiment_scores.values())
-        if total_words == 0:
+        return self._sentiment_from_words(self.preprocess_text(text))
+    
+    def _sentiment_from_words(self, processed_text):
+        """Lexicon sentiment of already preprocessed text (the tokens the model sees)"""
+        if self.lexicon is None:
             return None
-            
-        # Find the dominant sentiment
-        dominant_sentiment = max(sentiment_scores, key=sentiment_scores.get)
-        confidence = sentiment_scores[dominant_sentiment] / total_words
-        
-        return {
-            'sentiment': dominant_sentiment,
-            'confidence': confidence
-        }
+        return self.lexicon.sentiment(processed_text.split())
+    
+    def _text_column(self, texts, preprocess):
+        """Preprocess a text column now, or check it can be preprocessed later"""
+        if preprocess:
+            return self.preprocessor.preprocess_batch(texts)
+        if not texts.map(lambda text: isinstance(text, str)).all():
+            raise ValueError("Dataset contains missing or non-text entries")
+        return texts
     
-    def load_dataset(self, file_path):
-        """Load and preprocess the dataset"""
+    def load_dataset(self, file_path, preprocess=True):
+        """Load and preprocess the dataset
+        
+        With preprocess=False the raw text is kept in a 'text' column instead
+        of 'processed_text', for the training pipeline to preprocess.
+        """
         try:
             df = pd.read_csv(file_path)
             print(f"Loaded dataset with shape: {df.shape}")
@@ -194,7 +196,7 @@ class TextAnalyzer:
                 df['sentiment'] = df['sentiment'].str.lower()
             
             # Preprocess sentences
-            df['processed_text'] = df['sentence'].apply(self.preprocess_text)
+            df['processed_text' if preprocess else 'text'] = self._text_column(df['sentence'], preprocess)
             # Map sentiments to numeric values
             df['sentiment_numeric'] = df['sentiment'].map(self.label_mapping)
             
@@ -209,8 +211,8 @@ class TextAnalyzer:
             traceback.print_exc()
             return None
     
-    def load_emotion_dataset(self, file_path):
-        """Load and preprocess the emotion dataset"""
+    def load_emotion_dataset(self, file_path, preprocess=True):
+        """Load and preprocess the emotion dataset (see load_dataset for preprocess)"""
         try:
             df = pd.read_csv(file_path)
             
@@ -218,13 +220,13 @@ class TextAnalyzer:
             if 'Text' in df.columns and 'Emotion' in df.columns:
                 # Handle voice emotion dataset
                 # Preprocess sentences
-                df['processed_text'] = df['Text'].apply(self.preprocess_text)
+                df['processed_text' if preprocess else 'text'] = self._text_column(df['Text'], preprocess)
                 # Map emotions to numeric values
                 df['emotion_numeric'] = df['Emotion'].str.lower().map(self.emotion_label_mapping)
             else:
                 # Handle other emotion datasets (Sentence, Emotion columns)
                 # Preprocess sentences
-                df['processed_text'] = df['Sentence'].apply(self.preprocess_text)
+                df['processed_text' if preprocess else 'text'] = self._text_column(df['Sentence'], preprocess)
                 # Map emotions to numeric values
                 df['emotion_numeric'] = df['Emotion'].str.lower().map(self.emotion_label_mapping)
             
@@ -237,16 +239,67 @@ class TextAnalyzer:
             print(f"Error loading emotion dataset: {e}")
             return None
     
+    def _mark_trained(self):
+        """Flag the model as ready and give it a new model_version"""
+        extra = [self.reverse_label_mapping, self.emotion_reverse_mapping, self.lexicon and self.lexicon.source]
+        self.model_version = model_digest(self.vectorizer, self.model, extra)
+        self.scorer = self._build_scorer() if TEXT_FAST_SCORER else None
+        self.is_trained = True
+    
+    def _build_scorer(self):
+        """A LinearScorer of the fitted model, or None when it cannot reproduce sklearn's probabilities"""
+        try:
+            scorer = LinearScorer.from_model(self.vectorizer, self.model)
+        except ValueError:
+            return None
+        processed_texts = self.preprocessor.preprocess_batch(VALIDATION_TEXTS)
+        expected = self.model.predict_proba(self.vectorizer.transform(processed_texts))
+        if not np.allclose(scorer.predict_proba(scorer.transform(processed_texts)), expected, rtol=0, atol=1e-9):
+            print("Linear scorer does not match the sklearn model; using sklearn for predictions")
+            return None
+        return scorer
+    
+    def _fit(self, combined_df, label_column, load_seconds):
+        """Preprocess, vectorize and fit the model on combined datasets; returns the test accuracy"""
+        pipeline = self.training_pipeline
+        pipeline.timings = {'load': load_seconds}
+        
+        # Split features and labels
+        X = pipeline.preprocess(combined_df['text'])
+        y = combined_df[label_column]
+        
+        # Vectorize text
+        X_vectorized = pipeline.featurize(self.vectorizer, X)
+        
+        # Split data
+        X_train, X_test, y_train, y_test = train_test_split(
+            X_vectorized, y, test_size=0.2, random_state=42
+        )
+        
+        # Train model
+        start = time.perf_counter()
+        self.model.fit(X_train, y_train)
+        pipeline.timings['fit'] = time.perf_counter() - start
+        
+        stages = ', '.join(f"{stage} {seconds:.2f}s" for stage, seconds in pipeline.timings.items())
+        print(f"Training stages: {stages} ({pipeline.workers} workers)")
+        
+        # Evaluate model
+        y_pred = self.model.predict(X_test)
+        self.training_accuracy = accuracy_score(y_test, y_pred)
+        return self.training_accuracy
+    
     def train(self, file_paths):
         """Train the text sentiment analysis model with multiple datasets"""
         try:
             all_data = []
+            start = time.perf_counter()
             
             # Load all datasets
             for file_path in file_paths:
                 if os.path.exists(file_path):
                     print(f"Loading dataset from: {file_path}")
-                    df = self.load_dataset(file_path)
+                    df = self.load_dataset(file_path, preprocess=False)
                     if df is not None and not df.empty:
                         all_data.append(df)
                         print(f"Successfully loaded {len(df)} samples")
@@ -268,27 +321,10 @@ class TextAnalyzer:
                 print("Not enough training data")
                 return False
             
-            # Split features and labels
-            X = combined_df['processed_text']
-            y = combined_df['sentiment_numeric']
-            
-            # Vectorize text
-            X_vectorized = self.vectorizer.fit_transform(X)
-            
-            # Split data
-            X_train, X_test, y_train, y_test = train_test_split(
-                X_vectorized, y, test_size=0.2, random_state=42
-            )
-            
-            # Train model
-            self.model.fit(X_train, y_train)
-            
-            # Evaluate model
-            y_pred = self.model.predict(X_test)
-            accuracy = accuracy_score(y_test, y_pred)
+            accuracy = self._fit(combined_df, 'sentiment_numeric', time.perf_counter() - start)
             print(f"Model trained with accuracy: {accuracy:.4f}")
             
-            self.is_trained = True
+            self._mark_trained()
             return True
         except Exception as e:
             print(f"Error training model: {e}")
@@ -300,12 +336,13 @@ class TextAnalyzer:
         """Train the emotion detection model with emotion datasets"""
         try:
             all_data = []
+            start = time.perf_counter()
             
             # Load all emotion datasets
             for file_path in file_paths:
                 if os.path.exists(file_path):
                     print(f"Loading emotion dataset from: {file_path}")
-                    df = self.load_emotion_dataset(file_path)
+                    df = self.load_emotion_dataset(file_path, preprocess=False)
                     if df is not None:
                         all_data.append(df)
                     else:
@@ -321,115 +358,293 @@ class TextAnalyzer:
             combined_df = pd.concat(all_data, ignore_index=True)
             print(f"Combined emotion dataset shape: {combined_df.shape}")
             
-            # Split features and labels
-            X = combined_df['processed_text']
-            y = combined_df['emotion_numeric']
-            
-            # Vectorize text
-            X_vectorized = self.vectorizer.fit_transform(X)
-            
-            # Split data
-            X_train, X_test, y_train, y_test = train_test_split(
-                X_vectorized, y, test_size=0.2, random_state=42
-            )
-            
-            # Train model
-            self.model.fit(X_train, y_train)
-            
-            # Evaluate model
-            y_pred = self.model.predict(X_test)
-            accuracy = accuracy_score(y_test, y_pred)
+            accuracy = self._fit(combined_df, 'emotion_numeric', time.perf_counter() - start)
             print(f"Emotion model trained with accuracy: {accuracy:.4f}")
             
-            self.is_trained = True
+            self._mark_trained()
             return True
         except Exception as e:
             print(f"Error training emotion model: {e}")
             return False
     
+    def training_config(self, task):
+        """Settings besides the datasets that change what training produces"""
+        try:
+            stop_words = sorted(stopwords.words('english'))
+        except LookupError:
+            stop_words = None
+        return {
+            "task": task,
+            "featurizer": self.featurizer,
+            "vectorizer": self.vectorizer.get_params(),
+            "model": self.model.get_params(),
+            "negation_words": sorted(self.negation_words),
+            "stopwords": stop_words,
+            "labels": self.label_mapping if task == 'sentiment' else self.emotion_label_mapping
+        }
+    
+    def save_model(self, path, fingerprint, task='sentiment'):
+        """Save the trained vectorizer and model for fast startup"""
+        labels = self.reverse_label_mapping if task == 'sentiment' else self.emotion_reverse_mapping
+        save_text_model(path, self.vectorizer, self.model, fingerprint, labels)
+    
+    def load_model(self, path, fingerprint=None, task='sentiment'):
+        """Load a saved model; returns False if it is missing or was trained on other data"""
+        try:
+            labels = load_text_model(path, self.vectorizer, self.model, fingerprint)
+        except Exception as e:
+            print(f"Error loading cached model from {path}: {e}")
+            return False
+        if labels is None:
+            return False
+        if task == 'sentiment':
+            self.reverse_label_mapping = labels
+        else:
+            self.emotion_reverse_mapping = labels
+        self._mark_trained()
+        return True
+    
+    def train_cached(self, file_paths, task, cache_path):
+        """Load the cached model for these datasets, training only when they changed
+        
+        task is 'sentiment' (train) or 'emotion' (train_emotion_model).
+        """
+        existing_paths = [path for path in file_paths if os.path.exists(path)]
+        if os.path.exists(cache_path):
+            start = time.perf_counter()
+            if not existing_paths:
+                print(f"No {task} datasets found, using the cached model")
+                fingerprint = None
+            else:
+                fingerprint = dataset_fingerprint(existing_paths, self.training_config(task))
+            if self.load_model(cache_path, fingerprint, task):
+                print(f"Loaded cached {task} model from {cache_path} in {(time.perf_counter() - start) * 1000:.0f} ms")
+                return True
+            print(f"Cached {task} model is out of date, retraining")
+        
+        trained = self.train(file_paths) if task == 'sentiment' else self.train_emotion_model(file_paths)
+        if trained:
+            try:
+                fingerprint = dataset_fingerprint(existing_paths, self.training_config(task))
+                self.save_model(cache_path, fingerprint, task)
+                print(f"Saved {task} model to {cache_path}")
+            except Exception as e:
+                print(f"Error saving {task} model to {cache_path}: {e}")
+        return trained
+    
+    def partial_fit(self, texts, labels, task='emotion'):
+        """Fold labeled texts into an incremental model; returns the number of rows learned
+        
+        labels are label names ('happy', 'Sad', ...). Rows with unknown
+        labels, or with a class the model was not trained on, are skipped;
+        a full retrain (compaction) picks those up. The update is made on a
+        copy of the model that then replaces it, so concurrent predictions
+        never see a half-updated model.
+        """
+        if not self.incremental:
+            raise ValueError("partial_fit needs an incremental analyzer (TEXT_INCREMENTAL=1)")
+        mapping = self.label_mapping if task == 'sentiment' else self.emotion_label_mapping
+        classes = getattr(self.model, 'classes_', None)
+        if classes is None:
+            classes = np.array(sorted(set(mapping.values())))
+        
+        rows = []
+        for text, label in zip(texts, labels):
+            if isinstance(text, str) and isinstance(label, str) and mapping.get(label.lower()) in classes:
+                rows.append((text, mapping[label.lower()]))
+        if not rows:
+            return 0
+        
+        features = self.vectorizer.transform(self.preprocessor.preprocess_batch([text for text, _ in rows]))
+        with self.update_lock:
+            model = copy.deepcopy(self.model)
+            model.partial_fit(features, [label for _, label in rows], classes=classes)
+            self.model = model
+            self._mark_trained()
+        return len(rows)
+    
+    def analysis_contexts(self, texts, timer=None):
+        """An AnalysisContext per text, sharing one StageTimer; repeated texts share a context"""
+        timer = timer or StageTimer()
+        contexts = {}
+        for text in texts:
+            if text not in contexts:
+                contexts[text] = AnalysisContext(text, self.preprocessor, self.vectorizer, timer)
+        return [contexts[text] for text in texts]
+    
+    def _predict_contexts(self, contexts, timer, task):
+        """Predicted class and its probability for each context
+        
+        Small calls are scored by the LinearScorer; larger ones are
+        vectorized into one sparse matrix and scored with a single
+        predict_proba call. The label is the argmax, which is what
+        predict() returns for logistic regression. The call is recorded
+        in the model metrics under task.
+        """
+        start = time.perf_counter()
+        scorer = self.scorer
+        if scorer is not None and len(contexts) <= TEXT_SCORER_MAX_BATCH:
+            features = timer.run('featurize', scorer.transform, [context.processed_text for context in contexts])
+            probabilities = timer.run('predict', scorer.predict_proba, features)
+            classes = scorer.classes
+        else:
+            model = self.model
+            features = AnalysisContext.featurize(contexts)
+            probabilities = timer.run('predict', model.predict_proba, features)
+            classes = model.classes_
+        observe_inference(task, len(contexts), time.perf_counter() - start)
+        best = probabilities.argmax(axis=1)
+        predictions = classes[best]
+        confidences = probabilities[np.arange(len(best)), best]
+        return zip(predictions.tolist(), confidences.tolist())
+    
     def analyze_sentiment(self, text):
         """Analyze sentiment of a given text using both ML model and sentiment words dictionary"""
-        # First try to get sentiment from sentiment words dictionary
-        word_sentiment = self.get_sentiment_from_words(text)
+        return self.analyze_sentiment_batch([text])[0]
+    
+    def analyze_sentiment_batch(self, texts, timer=None):
+        """Analyze sentiment of a list of texts; returns one result per text, in order
         
-        # If we have a strong confidence from word analysis, use it
-        if word_sentiment and word_sentiment['confidence'] > 0.6:
-            return {
-                "sentiment": word_sentiment['sentiment'],
-                "confidence": word_sentiment['confidence'],
-                "message": "Analysis completed using sentiment words dictionary"
-            }
+        Each text is routed like analyze_sentiment: the sentiment words
+        dictionary when it is confident, otherwise the ML model, which
+        scores all remaining texts at once. Both see the tokens of the
+        same AnalysisContext. Stage timings go to timer, or to the stage
+        hooks when no timer is given.
+        """
+        report = timer is None
+        timer = timer or StageTimer()
+        contexts = self.analysis_contexts(texts, timer)
+        outcomes = {}
+        model_contexts = []
+        
+        for context in dict.fromkeys(contexts):
+            # First try to get sentiment from sentiment words dictionary
+            word_sentiment = None
+            if self.lexicon is not None:
+                words = context.words
+                word_sentiment = timer.run('lexicon', self.lexicon.sentiment, words)
+            
+            # If we have a strong confidence from word analysis, use it
+            if word_sentiment and word_sentiment['confidence'] > 0.6:
+                outcomes[context] = {
+                    "sentiment": word_sentiment['sentiment'],
+                    "confidence": word_sentiment['confidence'],
+                    "message": "Analysis completed using sentiment words dictionary"
+                }
+            else:
+                model_contexts.append(context)
         
         # Otherwise, use the ML model
-        if not self.is_trained:
-            return {
-                "sentiment": "neutral",
-                "confidence": 0.5,
-                "message": "Model not trained yet"
-            }
+        if model_contexts and not self.is_trained:
+            for context in model_contexts:
+                outcomes[context] = {
+                    "sentiment": "neutral",
+                    "confidence": 0.5,
+                    "message": "Model not trained yet"
+                }
+        elif model_contexts:
+            try:
+                predictions = self._predict_contexts(model_contexts, timer, 'sentiment')
+                for context, (prediction, confidence) in zip(model_contexts, predictions):
+                    outcomes[context] = {
+                        "sentiment": self.reverse_label_mapping[prediction].lower(),
+                        "confidence": confidence,
+                        "message": "Analysis completed using ML model"
+                    }
+            except Exception as e:
+                for context in model_contexts:
+                    outcomes[context] = {
+                        "sentiment": "neutral",
+                        "confidence": 0.5,
+                        "message": f"Error during analysis: {str(e)}"
+                    }
         
-        try:
-            # Preprocess text
-            processed_text = self.preprocess_text(text)
-            
-            # Vectorize text
-            text_vectorized = self.vectorizer.transform([processed_text])
-            
-            # Predict
-            prediction = self.model.predict(text_vectorized)[0]
-            probabilities = self.model.predict_proba(text_vectorized)[0]
-            
-            # Get confidence (probability of predicted class)
-            confidence = float(np.max(probabilities))
-            sentiment = self.reverse_label_mapping[prediction].lower()
-            
-            return {
-                "sentiment": sentiment,
-                "confidence": confidence,
-                "message": "Analysis completed using ML model"
-            }
-        except Exception as e:
-            return {
-                "sentiment": "neutral",
-                "confidence": 0.5,
-                "message": f"Error during analysis: {str(e)}"
-            }
+        if report:
+            timer.report()
+        return [dict(outcomes[context]) for context in contexts]
     
     def analyze_emotion(self, text):
         """Analyze emotion of a given text"""
+        return self.analyze_emotion_batch([text])[0]
+    
+    def analyze_emotion_batch(self, texts, timer=None):
+        """Analyze emotion of a list of texts with one model call; returns one result per text, in order"""
         if not self.is_trained:
-            return {
+            return [{
                 "emotion": "neutral",
                 "confidence": 0.5,
                 "message": "Model not trained yet"
-            }
+            } for _ in texts]
         
+        report = timer is None
+        timer = timer or StageTimer()
         try:
-            # Preprocess text
-            processed_text = self.preprocess_text(text)
-            
-            # Vectorize text
-            text_vectorized = self.vectorizer.transform([processed_text])
-            
-            # Predict
-            prediction = self.model.predict(text_vectorized)[0]
-            probabilities = self.model.predict_proba(text_vectorized)[0]
-            
-            # Get confidence (probability of predicted class)
-            confidence = float(np.max(probabilities))
-            emotion = self.emotion_reverse_mapping[prediction].capitalize()  # Capitalize first letter instead of lowercase
-            
-            return {
-                "emotion": emotion,
+            contexts = self.analysis_contexts(texts, timer)
+            unique_contexts = list(dict.fromkeys(contexts))
+            outcomes = {context: {
+                "emotion": self.emotion_reverse_mapping[prediction].capitalize(),  # Capitalize first letter instead of lowercase
                 "confidence": confidence,
                 "message": "Emotion analysis completed"
-            }
+            } for context, (prediction, confidence) in zip(unique_contexts, self._predict_contexts(unique_contexts, timer, 'emotion'))}
+            return [dict(outcomes[context]) for context in contexts]
         except Exception as e:
-            return {
+            return [{
                 "emotion": "Neutral",  # Capitalize default emotion
                 "confidence": 0.5,
                 "message": f"Error during emotion analysis: {str(e)}"
-            }
+            } for _ in texts]
+        finally:
+            if report:
+                timer.report()
+
+# Texts every retrained model must be able to score before it is swapped in
+VALIDATION_TEXTS = [
+    "I am so happy with how everything turned out today",
+    "This is not good at all, I am really upset",
+    "I'm scared of what might happen next"
+]
+
+def _train_model_file(task, file_paths, model_path, analyzer_args):
+    """Worker process entry point: train a fresh analyzer and save it to model_path"""
+    analyzer = TextAnalyzer(**analyzer_args)
+    trained = analyzer.train(file_paths) if task == 'sentiment' else analyzer.train_emotion_model(file_paths)
+    if not trained:
+        raise RuntimeError(f"Training the {task} model failed")
+    existing_paths = [path for path in file_paths if os.path.exists(path)]
+    analyzer.save_model(model_path, dataset_fingerprint(existing_paths, analyzer.training_config(task)), task)
+    return {
+        "accuracy": analyzer.training_accuracy,
+        "timings": analyzer.training_pipeline.timings
+    }
+
+def train_analyzer_in_process(task, file_paths, **analyzer_args):
+    """Train a new TextAnalyzer(**analyzer_args) in a separate process; returns (analyzer, training info)
+    
+    The training run never touches analyzers that are serving requests: the
+    worker saves the fitted model to a temporary file that is loaded into a
+    fresh instance here. Raises RuntimeError if training fails or the new
+    model cannot score VALIDATION_TEXTS, so a broken model is never returned.
+    """
+    model_path = os.path.join(TEXT_MODEL_CACHE_DIR, f"{task}_model.{uuid.uuid4().hex}.npz")
+    os.makedirs(TEXT_MODEL_CACHE_DIR, exist_ok=True)
+    try:
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+            info = executor.submit(_train_model_file, task, file_paths, model_path, analyzer_args).result()
+        
+        analyzer = TextAnalyzer(**analyzer_args)
+        if not analyzer.load_model(model_path, task=task):
+            raise RuntimeError(f"Could not load the retrained {task} model")
+    finally:
+        if os.path.exists(model_path):
+            os.remove(model_path)
+    
+    analyze_batch = analyzer.analyze_sentiment_batch if task == 'sentiment' else analyzer.analyze_emotion_batch
+    for result in analyze_batch(VALIDATION_TEXTS):
+        if result['message'].startswith('Error'):
+            raise RuntimeError(f"Retrained {task} model failed validation: {result['message']}")
+    info["model_version"] = analyzer.model_version
+    return analyzer, info
 
 def get_text_analyzer():
     """Factory function to create and train text analyzer"""
@@ -443,7 +658,8 @@ def get_text_analyzer():
     ]
     
     print("Training text analysis model with multiple datasets...")
-    if analyzer.train(dataset_paths):
+    cache_path = os.path.join(TEXT_MODEL_CACHE_DIR, "sentiment_model.npz")
+    if analyzer.train_cached(dataset_paths, 'sentiment', cache_path):
         print("Text analysis model trained successfully")
     else:
         print("Failed to train text analysis model")
@@ -458,11 +674,13 @@ def get_emotion_analyzer():
     dataset_paths = [
         r"C:\Users\knile\Downloads\emotion_sentences\emotion_sentences.csv",
         r"c:\Users\knile\OneDrive\Desktop\EmotionSense\data\emotion_sentences.csv",
-        r"c:\Users\knile\OneDrive\Desktop\EmotionSense\data\voice_emotion_dataset.csv"  # Add uploaded dataset
+        r"c:\Users\knile\OneDrive\Desktop\EmotionSense\data\voice_emotion_dataset.csv",  # Add uploaded dataset
+        EMOTION_FEEDBACK_PATH  # Feedback rows learned incrementally
     ]
     
     print("Training emotion analysis model with emotion datasets...")
-    if analyzer.train_emotion_model(dataset_paths):
+    cache_path = os.path.join(TEXT_MODEL_CACHE_DIR, "emotion_model.npz")
+    if analyzer.train_cached(dataset_paths, 'emotion', cache_path):
         print("Emotion analysis model trained successfully")
     else:
         print("Failed to train emotion analysis model")
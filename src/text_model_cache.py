@@ -0,0 +1,107 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.pipeline import Pipeline
+
+# Bump when the artifact layout or the training procedure changes
+CACHE_FORMAT_VERSION = 1
+
+
+def dataset_fingerprint(file_paths, config):
+    """SHA-256 of the training config and the contents of the dataset files
+
+    Files are hashed in the given order, so reordering the datasets (which
+    changes the train/test split) also changes the fingerprint.
+    """
+    digest = hashlib.sha256()
+    header = {"version": CACHE_FORMAT_VERSION, "config": config, "files": len(file_paths)}
+    digest.update(json.dumps(header, sort_keys=True, default=str).encode('utf-8'))
+    for path in file_paths:
+        digest.update(b'\0')
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+def model_digest(vectorizer, model, extra=None):
+    """Short hash identifying a fitted vectorizer and model (plus any JSON-able extra state)
+
+    Equal models give equal digests in every process, so it can be used
+    to version results shared between workers.
+    """
+    digest = hashlib.sha256()
+    for array in (model.coef_, model.intercept_, model.classes_):
+        digest.update(np.ascontiguousarray(array).tobytes())
+    if isinstance(vectorizer, HashingVectorizer):
+        digest.update(str(vectorizer.get_params()).encode('utf-8'))
+    elif isinstance(vectorizer, Pipeline):
+        digest.update(vectorizer.named_steps['tfidf'].idf_.tobytes())
+        digest.update(str(vectorizer.named_steps['hashing'].get_params()).encode('utf-8'))
+    else:
+        digest.update(vectorizer.idf_.tobytes())
+        vocabulary = vectorizer.vocabulary_
+        digest.update('\n'.join(sorted(vocabulary, key=vocabulary.get)).encode('utf-8'))
+    digest.update(json.dumps(extra, sort_keys=True, default=str).encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+
+def save_text_model(path, vectorizer, model, fingerprint, labels):
+    """Write a fitted TF-IDF vectorizer (or hashing vectorizer) and linear model to an .npz file
+
+    Only plain arrays are stored (vocabulary terms in column order, IDF
+    vector, coefficients, intercepts, classes, the update count of
+    incremental models and the label names as JSON), so loading needs no
+    pickle. The file is replaced atomically.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    if isinstance(vectorizer, HashingVectorizer):
+        # Stateless: nothing to store
+        terms = np.array([], dtype=str)
+        idf = np.array([])
+    elif isinstance(vectorizer, Pipeline):
+        # Hashing pipeline: the features need no vocabulary, only the IDF weights
+        terms = np.array([], dtype=str)
+        idf = vectorizer.named_steps['tfidf'].idf_
+    else:
+        vocabulary = vectorizer.vocabulary_
+        terms = np.array(sorted(vocabulary, key=vocabulary.get))
+        idf = vectorizer.idf_
+    # Learning rate schedule position of SGD models, so partial_fit can resume
+    state = {'t': np.array(model.t_)} if hasattr(model, 't_') else {}
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        np.savez(f, fingerprint=np.array(fingerprint), terms=terms, idf=idf,
+                 coef=model.coef_, intercept=model.intercept_, classes=model.classes_,
+                 labels=np.array(json.dumps(labels)), **state)
+    os.replace(tmp_path, path)
+
+
+def load_text_model(path, vectorizer, model, fingerprint=None):
+    """Restore a model saved by save_text_model into unfitted instances
+
+    vectorizer and model must be constructed with the same parameters as
+    when the model was trained. Returns the stored label names, or None
+    when the file does not match the fingerprint.
+    """
+    with np.load(path, allow_pickle=False) as data:
+        if fingerprint is not None and str(data['fingerprint']) != fingerprint:
+            return None
+        if isinstance(vectorizer, Pipeline):
+            vectorizer.named_steps['tfidf'].idf_ = data['idf']
+        elif not isinstance(vectorizer, HashingVectorizer):
+            vectorizer.vocabulary_ = {term: i for i, term in enumerate(data['terms'].tolist())}
+            vectorizer.idf_ = data['idf']
+        model.coef_ = data['coef']
+        model.intercept_ = data['intercept']
+        model.classes_ = data['classes']
+        model.n_features_in_ = model.coef_.shape[1]
+        if 't' in data:
+            model.t_ = float(data['t'])
+        labels = json.loads(str(data['labels']))
+    return {int(index): name for index, name in labels.items()}
@@ -0,0 +1,135 @@
+import re
+from functools import lru_cache
+
+import pandas as pd
+from nltk.corpus import stopwords
+from nltk.tokenize import word_tokenize
+
+NEGATION_WORDS = frozenset({'not', 'no', 'never', 'nothing', 'nowhere', 'noone', 'none', 'nor', 'neither', 'n\'t'})
+# Punctuation that keeps a pending negation for the next word
+NEGATION_KEEPERS = frozenset({',', '.', '!', '?', ';', ':'})
+
+# Lowercase text made only of these pieces is tokenized with regexes below,
+# giving the tokens of word_tokenize. Anything else goes through NLTK,
+# because sentence splitting and the remaining Treebank rules can change the
+# tokens there: digits, double quotes, brackets, non-ASCII letters, a single
+# period before the end, ',' or ':' right before another ',' or ':' (NLTK
+# leaves the second one glued to the next word) and a closing quote after an
+# apostrophe suffix such as "it's'" (NLTK keeps "it's" whole at the end of a
+# sentence). benchmarks/text_preprocessing_benchmark.py checks the two paths
+# against each other on the bundled CSVs and on random strings.
+_WORD = r"'?[a-z]+(?:-[a-z]+)*(?:'[a-z]+|')?(?![a-z']|-(?!-))"
+_PUNCT = r"[’;!?]|[,:](?![,:])|\.{2,}|--"
+_SIMPLE_TEXT = re.compile(rf"(?: |{_WORD}|{_PUNCT})*(?:(?<!\.)\.)? *")
+_CHUNK = re.compile(rf"{_WORD}|{_PUNCT}|\.")
+_PUNCT_START = frozenset("’,;:!?.-")
+
+# The Treebank rules of nltk's NLTKWordTokenizer that can split a word chunk
+# once the punctuation around it has been separated, in the order NLTK runs them
+_WORD_RULES = [
+    (re.compile(r"(?i)(?<!\w)(\')(?!(?:re|ve|ll|m|t|s|d|n)\b)(?=\w)"), r"\1 "),
+    (re.compile(r"([^'])' "), r"\1 ' "),
+    (re.compile(r"([^' ])('[sS]|'[mM]|'[dD]|') "), r"\1 \2 "),
+    (re.compile(r"([^' ])('ll|'LL|'re|'RE|'ve|'VE|n't|N'T) "), r"\1 \2 ")
+] + [(re.compile(pattern), r" \1 \2 ") for pattern in (
+    r"(?i)\b(can)(?#X)(not)\b",
+    r"(?i)\b(d)(?#X)('ye)\b",
+    r"(?i)\b(gim)(?#X)(me)\b",
+    r"(?i)\b(gon)(?#X)(na)\b",
+    r"(?i)\b(got)(?#X)(ta)\b",
+    r"(?i)\b(lem)(?#X)(me)\b",
+    r"(?i)\b(more)(?#X)('n)\b",
+    r"(?i)\b(wan)(?#X)(na)(?=\s)",
+    r"(?i) ('t)(?#X)(is)\b",
+    r"(?i) ('t)(?#X)(was)\b"
+)]
+
+_NON_LETTERS = re.compile(r'[^a-zA-Z\s_]')
+
+
+@lru_cache(maxsize=65536)
+def _split_word(chunk):
+    """Split a word chunk (e.g. "don't") into its Treebank tokens"""
+    text = f" {chunk} "
+    for regexp, substitution in _WORD_RULES:
+        text = regexp.sub(substitution, text)
+    return tuple(text.split())
+
+
+class TextPreprocessor:
+    """Precompiled implementation of TextAnalyzer.preprocess_text
+
+    Produces the same output as lowercasing, word_tokenize, NOT_ marking
+    of the word after a negation, stripping non-letters and removing
+    stopwords, but tokenizes common text with a single regex pass (see
+    _SIMPLE_TEXT for what falls back to word_tokenize) and keeps the
+    stopword set between calls.
+    """
+
+    def __init__(self, negation_words=NEGATION_WORDS, stop_words=None):
+        self.negation_words = frozenset(negation_words)
+        self._stop_words = None if stop_words is None else frozenset(stop_words)
+
+    @property
+    def stop_words(self):
+        # Loaded on first use so importing works before the NLTK data is downloaded
+        if self._stop_words is None:
+            self._stop_words = frozenset(stopwords.words('english'))
+        return self._stop_words
+
+    def tokenize(self, text):
+        """Tokenize lowercase text like nltk's word_tokenize"""
+        if not _SIMPLE_TEXT.fullmatch(text):
+            return word_tokenize(text)
+        tokens = []
+        for chunk in _CHUNK.findall(text):
+            if chunk[0] in _PUNCT_START:
+                tokens.append(chunk)
+            else:
+                tokens.extend(_split_word(chunk))
+        return tokens
+
+    def mark_negations(self, tokens):
+        """Prefix the first word after a negation word with NOT_"""
+        negation_words = self.negation_words
+        marked_tokens = []
+        negate = False
+        for token in tokens:
+            if token in negation_words:
+                negate = True
+                marked_tokens.append(token)
+            elif negate and token.isalpha():
+                marked_tokens.append(f"NOT_{token}")
+                negate = False
+            else:
+                marked_tokens.append(token)
+                if token not in NEGATION_KEEPERS:
+                    negate = False
+        return marked_tokens
+
+    def clean(self, tokens):
+        """Strip non-letters from negation-marked tokens and remove stopwords"""
+        stop_words = self.stop_words
+        words = _NON_LETTERS.sub(' ', ' '.join(tokens)).split()
+        return ' '.join([word for word in words if word not in stop_words or word.startswith('NOT_')])
+
+    def preprocess(self, text):
+        """Preprocess one text"""
+        return self.clean(self.mark_negations(self.tokenize(text.lower())))
+
+    def preprocess_batch(self, texts):
+        """Preprocess a list or pandas Series of texts
+
+        Repeated texts are processed once. A Series comes back as a Series
+        with the same index, anything else as a list.
+        """
+        done = {}
+        results = []
+        for text in texts:
+            result = done.get(text)
+            if result is None:
+                result = done[text] = self.preprocess(text)
+            results.append(result)
+        if isinstance(texts, pd.Series):
+            return pd.Series(results, index=texts.index)
+        return results
@@ -0,0 +1,124 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import scipy.sparse as sp
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer
+from sklearn.pipeline import Pipeline
+
+from src.text_preprocessing import TextPreprocessor
+
+# Width of the hashed feature space used by the 'hashing' featurizer
+HASHING_FEATURES = 2 ** 16
+
+
+def make_hashing_vectorizer(n_features=HASHING_FEATURES):
+    """Stateless counterpart of the TF-IDF vectorizer: hashed 1-2 grams, then IDF weighting
+
+    The hashing step needs no fitted vocabulary, so it can run on shards
+    of the corpus in parallel; only the IDF weights are fitted.
+    """
+    return Pipeline([
+        ('hashing', HashingVectorizer(n_features=n_features, stop_words='english', ngram_range=(1, 2),
+                                      alternate_sign=False, norm=None)),
+        ('tfidf', TfidfTransformer())
+    ])
+
+
+def make_online_vectorizer(n_features=HASHING_FEATURES):
+    """Fully stateless vectorizer for incremental learning: L2-normalized hashed 1-2 grams
+
+    Nothing is fitted, so new texts can be featurized and folded into the
+    model at any time without refitting the vectorizer.
+    """
+    return HashingVectorizer(n_features=n_features, stop_words='english', ngram_range=(1, 2),
+                             alternate_sign=False, norm='l2')
+
+
+# Per-process state of the pool workers, created by _init_worker
+_worker_preprocessor = None
+_worker_hasher = None
+
+
+def _init_worker(negation_words, hashing_params):
+    global _worker_preprocessor, _worker_hasher
+    _worker_preprocessor = TextPreprocessor(negation_words)
+    if hashing_params is not None:
+        _worker_hasher = HashingVectorizer(**hashing_params)
+
+
+def _preprocess_chunk(texts):
+    return _worker_preprocessor.preprocess_batch(texts)
+
+
+def _hash_chunk(texts):
+    return _worker_hasher.transform(texts)
+
+
+class TrainingPipeline:
+    """Preprocess and featurize training text on a process pool
+
+    Texts are split into chunks of chunk_size that the workers process in
+    parallel; results are merged in chunk order, so the output is the same
+    as running serially. Inputs with fewer than min_parallel_texts distinct
+    texts are processed in this process, since starting the workers costs
+    more than it saves there. timings holds the seconds spent per stage by
+    the last run.
+    """
+
+    def __init__(self, negation_words, workers=None, chunk_size=10000, min_parallel_texts=50000):
+        self.negation_words = frozenset(negation_words)
+        self.preprocessor = TextPreprocessor(self.negation_words)
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.min_parallel_texts = min_parallel_texts
+        self.timings = {}
+
+    def _chunks(self, items):
+        return [items[i:i + self.chunk_size] for i in range(0, len(items), self.chunk_size)]
+
+    def _parallel(self, count):
+        return self.workers > 1 and count >= max(self.min_parallel_texts, 2) and count > self.chunk_size
+
+    def _map(self, function, chunks, hashing_params=None):
+        """Run function over chunks in spawned worker processes, keeping the order"""
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=min(self.workers, len(chunks)), mp_context=context,
+                                 initializer=_init_worker,
+                                 initargs=(self.negation_words, hashing_params)) as executor:
+            return list(executor.map(function, chunks))
+
+    def preprocess(self, texts):
+        """Preprocess a Series of texts; every distinct text is processed once"""
+        start = time.perf_counter()
+        unique_texts = list(dict.fromkeys(texts))
+        if self._parallel(len(unique_texts)):
+            processed = [text for chunk in self._map(_preprocess_chunk, self._chunks(unique_texts))
+                         for text in chunk]
+        else:
+            processed = self.preprocessor.preprocess_batch(unique_texts)
+        lookup = dict(zip(unique_texts, processed))
+        result = texts.map(lookup.__getitem__)
+        self.timings['preprocess'] = time.perf_counter() - start
+        return result
+
+    def featurize(self, vectorizer, texts):
+        """Fit vectorizer on texts and return the feature matrix
+
+        Hashing vectorizers (make_hashing_vectorizer() and
+        make_online_vectorizer()) hash the shards in parallel, and only the
+        IDF weights of a hashing pipeline are fitted here; any other
+        vectorizer is fitted as usual.
+        """
+        start = time.perf_counter()
+        texts = list(texts)
+        is_pipeline = isinstance(vectorizer, Pipeline)
+        if (is_pipeline or isinstance(vectorizer, HashingVectorizer)) and self._parallel(len(texts)):
+            hasher = vectorizer.named_steps['hashing'] if is_pipeline else vectorizer
+            counts = sp.vstack(self._map(_hash_chunk, self._chunks(texts), hasher.get_params()), format='csr')
+            features = vectorizer.named_steps['tfidf'].fit_transform(counts) if is_pipeline else counts
+        else:
+            features = vectorizer.fit_transform(texts)
+        self.timings['featurize'] = time.perf_counter() - start
+        return features
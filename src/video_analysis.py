@@ -0,0 +1,297 @@
+import collections
+import math
+import multiprocessing
+import os
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+import numpy as np
+
+from src.face_analysis import DISPLAY_EMOTIONS, predict_emotions
+from src.face_detection import DetectionConfig, create_face_detector
+from src.inference_backends import create_backend
+from src.structured_log import RateLimitedLogger
+
+logger = RateLimitedLogger('video_analysis')
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.webp')
+# Larger archive members are skipped rather than decoded
+MAX_IMAGE_BYTES = 20 * 1024 * 1024
+
+
+def video_info(path):
+    """Return the frame rate, frame count and duration of a video file"""
+    capture = cv2.VideoCapture(path)
+    try:
+        if not capture.isOpened():
+            raise ValueError(f"Could not open video file: {os.path.basename(path)}")
+        fps = capture.get(cv2.CAP_PROP_FPS) or 30.0
+        frame_count = max(int(capture.get(cv2.CAP_PROP_FRAME_COUNT)), 0)
+    finally:
+        capture.release()
+    return {"fps": fps, "frame_count": frame_count, "duration": frame_count / fps}
+
+
+def sample_video_frames(path, sample_fps=1.0, start_second=0.0, end_second=None):
+    """Yield (timestamp, frame) for frames sampled at sample_fps
+
+    Frames are decoded one at a time; skipped frames are only grabbed,
+    not converted, which keeps sparse sampling cheap.
+    """
+    capture = cv2.VideoCapture(path)
+    try:
+        fps = capture.get(cv2.CAP_PROP_FPS) or 30.0
+        step = fps / sample_fps
+        index = int(math.ceil(start_second * fps - 1e-6))
+        end_frame = None if end_second is None else int(math.ceil(end_second * fps - 1e-6))
+        if index > 0:
+            capture.set(cv2.CAP_PROP_POS_FRAMES, index)
+        sample = int(math.ceil(index / step - 1e-6))
+        while end_frame is None or index < end_frame:
+            target = int(round(sample * step))
+            if index < target:
+                if not capture.grab():
+                    break
+                index += 1
+                continue
+            success, frame = capture.read()
+            if not success:
+                break
+            yield index / fps, frame
+            index += 1
+            while int(round(sample * step)) < index:
+                sample += 1
+    finally:
+        capture.release()
+
+
+def zip_image_names(path):
+    """List the image members of a zip archive, sorted by name"""
+    with zipfile.ZipFile(path) as archive:
+        return sorted(info.filename for info in archive.infolist()
+                      if not info.is_dir() and not info.filename.startswith('__MACOSX/')
+                      and info.filename.lower().endswith(IMAGE_EXTENSIONS))
+
+
+def iter_zip_images(path, names):
+    """Yield (name, BGR image) for the given members of a zip archive"""
+    with zipfile.ZipFile(path) as archive:
+        for name in names:
+            if archive.getinfo(name).file_size > MAX_IMAGE_BYTES:
+                logger.warning("image_skipped", name=name, reason="too large")
+                continue
+            image = cv2.imdecode(np.frombuffer(archive.read(name), dtype=np.uint8), cv2.IMREAD_COLOR)
+            if image is None:
+                logger.warning("image_skipped", name=name, reason="not a readable image")
+                continue
+            yield name, image
+
+
+class TimelineBuilder:
+    """Aggregate per-frame face predictions into one entry per second"""
+
+    def __init__(self, num_classes=len(DISPLAY_EMOTIONS)):
+        self.sums = np.zeros(num_classes, dtype=np.float64)
+        self.second = None
+        self.frames = 0
+        self.faces = 0
+        self.max_faces = 0
+
+    def add(self, timestamp, probabilities):
+        """Add one sampled frame; returns the previous second once it is complete"""
+        second = int(timestamp)
+        entry = None
+        if self.second is not None and second != self.second:
+            entry = self.flush()
+        self.second = second
+        self.frames += 1
+        self.faces += len(probabilities)
+        self.max_faces = max(self.max_faces, len(probabilities))
+        for row in probabilities:
+            self.sums += row
+        return entry
+
+    def flush(self):
+        """Return the entry of the current second and start a new one"""
+        if self.second is None:
+            return None
+        entry = {
+            "second": self.second,
+            "frames": self.frames,
+            "faces": self.faces,
+            "max_faces": self.max_faces,
+            "dominant_emotion": None,
+            "confidence": 0.0,
+            "predictions": None
+        }
+        if self.faces:
+            mean = self.sums / self.faces
+            emotion_idx = int(np.argmax(mean))
+            entry["dominant_emotion"] = DISPLAY_EMOTIONS[emotion_idx]
+            entry["confidence"] = float(mean[emotion_idx])
+            entry["predictions"] = mean.tolist()
+        self.sums[:] = 0.0
+        self.second = None
+        self.frames = 0
+        self.faces = 0
+        self.max_faces = 0
+        return entry
+
+
+class MediaAnalyzer:
+    """Detect faces in still frames and predict their emotions in batches
+
+    predict_faces has the same contract as for FrameAnalyzer. Faces from
+    consecutive frames are collected until batch_size crops are pending,
+    then go through the model in one call.
+    """
+
+    def __init__(self, face_detector, predict_faces, batch_size=32):
+        self.face_detector = face_detector
+        self.predict_faces = predict_faces
+        self.batch_size = batch_size
+
+    def _detect(self, frame):
+        image = frame if self.face_detector.uses_color else cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        # Sampled frames are far apart, so always scan the whole frame
+        return [tuple(int(v) for v in box) for box in self.face_detector.detect(image, hints=[])]
+
+    def _flush(self, pending, crops):
+        results = self.predict_faces(crops) if crops else []
+        start = 0
+        for key, boxes in pending:
+            yield key, boxes, results[start:start + len(boxes)]
+            start += len(boxes)
+
+    def analyze_frames(self, frames):
+        """Yield (key, boxes, results) for every (key, frame) in order"""
+        pending, crops = [], []
+        for key, frame in frames:
+            boxes = self._detect(frame)
+            pending.append((key, boxes))
+            crops.extend(frame[y:y+h, x:x+w] for (x, y, w, h) in boxes)
+            if len(crops) >= self.batch_size or len(pending) >= self.batch_size:
+                yield from self._flush(pending, crops)
+                pending, crops = [], []
+        yield from self._flush(pending, crops)
+
+    def video_timeline(self, path, sample_fps=1.0, start_second=0.0, end_second=None, progress=None):
+        """Yield the per-second emotion timeline of a video segment"""
+        builder = TimelineBuilder()
+        frames = sample_video_frames(path, sample_fps, start_second, end_second)
+        for timestamp, _, results in self.analyze_frames(frames):
+            entry = builder.add(timestamp, [r[2] for r in results if r[2] is not None])
+            if entry is not None:
+                if progress is not None:
+                    progress(entry["second"] + 1)
+                yield entry
+        entry = builder.flush()
+        if entry is not None:
+            yield entry
+
+    def image_records(self, path, names):
+        """Yield one record with the faces found in each image of a zip archive"""
+        for name, boxes, results in self.analyze_frames(iter_zip_images(path, names)):
+            faces = []
+            for box, (emotion, confidence, probabilities) in zip(boxes, results):
+                faces.append({
+                    "box": list(box),
+                    "emotion": emotion,
+                    "confidence": confidence,
+                    "predictions": None if probabilities is None else [float(p) for p in probabilities]
+                })
+            yield {"image": name, "faces": faces}
+
+
+def build_analyzer(detector_name, detection_settings, backend_name, model_path, batch_size=32):
+    """Create a MediaAnalyzer with its own face detector and model instance"""
+    detector = create_face_detector(detector_name, DetectionConfig(**detection_settings))
+    model = create_backend(backend_name, model_path)
+    return MediaAnalyzer(detector, lambda faces: predict_emotions(model, faces), batch_size)
+
+
+# Analyzer of the current pool worker process, created by _init_worker
+_worker_analyzer = None
+
+
+def _init_worker(*analyzer_args):
+    global _worker_analyzer
+    _worker_analyzer = build_analyzer(*analyzer_args)
+
+
+def _video_segment_task(path, sample_fps, start_second, end_second):
+    return list(_worker_analyzer.video_timeline(path, sample_fps, start_second, end_second))
+
+
+def _image_segment_task(path, names):
+    return list(_worker_analyzer.image_records(path, names))
+
+
+def _run_segments(task, segments, workers, analyzer_args, progress=None):
+    """Run task over segments in a process pool, yielding records in order
+
+    Every worker loads the detector and model once. Processes are spawned
+    rather than forked so they do not inherit the parent's TensorFlow
+    threads. At most one segment per worker is submitted at a time, so the
+    results waiting to be consumed stay bounded however long the file is.
+    """
+    workers = min(workers, len(segments))
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                             initializer=_init_worker, initargs=analyzer_args) as executor:
+        futures = collections.deque(executor.submit(task, *segment) for segment in segments[:workers])
+        for done in range(1, len(segments) + 1):
+            records = futures.popleft().result()
+            # Keep every worker busy while the caller consumes these records
+            if done + len(futures) < len(segments):
+                futures.append(executor.submit(task, *segments[done + len(futures)]))
+            yield from records
+            if progress is not None:
+                progress(done / len(segments))
+
+
+def analyze_video(path, analyzer_args, sample_fps=1.0, workers=1, segment_seconds=30, progress=None,
+                  analyzer=None):
+    """Yield the per-second emotion timeline of a video file
+
+    analyzer_args are the build_analyzer() arguments. With more than one
+    worker the video is split into segments of whole seconds that are
+    decoded and analyzed in parallel processes; entries still come out in
+    time order. Otherwise the video is analyzed in this process, with
+    analyzer if given (e.g. one sharing an already loaded model) or a new
+    one built from analyzer_args. progress, if given, is called with the
+    fraction done.
+    """
+    info = video_info(path)
+    duration = info["duration"]
+    if workers <= 1 or duration <= segment_seconds:
+        def report(seconds_done):
+            if progress is not None and duration > 0:
+                progress(min(seconds_done / duration, 1.0))
+        analyzer = analyzer or build_analyzer(*analyzer_args)
+        yield from analyzer.video_timeline(path, sample_fps, progress=report)
+        return
+
+    starts = list(range(0, int(math.ceil(duration)), segment_seconds))
+    # The last segment is open ended, frame counts from containers are estimates
+    segments = [(path, sample_fps, start, end) for start, end in zip(starts, starts[1:] + [None])]
+    yield from _run_segments(_video_segment_task, segments, workers, analyzer_args, progress)
+
+
+def analyze_image_zip(path, analyzer_args, workers=1, chunk_size=64, progress=None, analyzer=None):
+    """Yield one record per image of a zip archive, in name order
+
+    workers and analyzer are used as in analyze_video().
+    """
+    names = zip_image_names(path)
+    chunks = [names[i:i + chunk_size] for i in range(0, len(names), chunk_size)]
+    if workers <= 1 or len(chunks) <= 1:
+        analyzer = analyzer or build_analyzer(*analyzer_args)
+        for done, chunk in enumerate(chunks, 1):
+            yield from analyzer.image_records(path, chunk)
+            if progress is not None:
+                progress(done / len(chunks))
+        return
+    yield from _run_segments(_image_segment_task, [(path, chunk) for chunk in chunks], workers,
+                             analyzer_args, progress)
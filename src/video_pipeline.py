@@ -0,0 +1,289 @@
+import queue
+import threading
+import time
+
+import cv2
+
+from src.metrics import FRAME_STAGE_SECONDS
+from src.structured_log import RateLimitedLogger
+
+logger = RateLimitedLogger('video_pipeline')
+
+
+class StageStats:
+    """Latency and drop counters for one pipeline stage"""
+
+    def __init__(self, name):
+        self.name = name
+        self.lock = threading.Lock()
+        self.processed = 0
+        self.dropped = 0
+        self.total_time = 0.0
+        self.last_time = 0.0
+        self.max_time = 0.0
+
+    def record(self, seconds):
+        with self.lock:
+            self.processed += 1
+            self.total_time += seconds
+            self.last_time = seconds
+            if seconds > self.max_time:
+                self.max_time = seconds
+
+    def record_drop(self):
+        with self.lock:
+            self.dropped += 1
+
+    def snapshot(self):
+        with self.lock:
+            average = self.total_time / self.processed if self.processed else 0.0
+            return {
+                "processed": self.processed,
+                "dropped": self.dropped,
+                "avg_ms": average * 1000,
+                "last_ms": self.last_time * 1000,
+                "max_ms": self.max_time * 1000
+            }
+
+
+def put_latest(target_queue, item, stats):
+    """Put item on a bounded queue, discarding the oldest entry when full"""
+    while True:
+        try:
+            target_queue.put_nowait(item)
+            return
+        except queue.Full:
+            try:
+                target_queue.get_nowait()
+                stats.record_drop()
+            except queue.Empty:
+                pass
+
+
+class FrameSubscription:
+    """One viewer of a FrameBroadcaster
+
+    Iterating yields memoryviews over the shared multipart frame bytes.
+    A viewer that falls behind always jumps to the newest frame, so slow
+    clients skip frames instead of buffering them.
+    """
+
+    def __init__(self, broadcaster, timeout=1.0):
+        self.broadcaster = broadcaster
+        self.timeout = timeout
+        self.frame_id = 0
+        self.sent = 0
+        self.skipped = 0
+        self.closed = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        while not self.closed:
+            frame_id, view = self.broadcaster.wait_for_frame(self.frame_id, self.timeout)
+            if view is None:
+                if not self.broadcaster.running:
+                    break
+                continue
+            if self.frame_id:
+                self.skipped += max(0, frame_id - self.frame_id - 1)
+            self.frame_id = frame_id
+            self.sent += 1
+            return view
+        self.close()
+        raise StopIteration
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self.broadcaster.unsubscribe(self)
+
+
+class FrameBroadcaster:
+    """Fan out each encoded frame to any number of viewers
+
+    The multipart MJPEG part for a frame is built once when it is
+    published and every subscriber receives a memoryview of the same
+    bytes object. Only the newest frame is kept.
+    """
+
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.running = True
+        self.frame_id = 0
+        self.latest = None
+        self.subscribers = set()
+        self.total_skipped = 0
+
+    def publish(self, jpeg_buffer):
+        """Publish an encoded JPEG (bytes or numpy buffer) to all viewers"""
+        part = b''.join((b'--frame\r\nContent-Type: image/jpeg\r\n\r\n', jpeg_buffer, b'\r\n'))
+        with self.condition:
+            self.latest = memoryview(part)
+            self.frame_id += 1
+            self.condition.notify_all()
+
+    def wait_for_frame(self, last_frame_id, timeout=1.0):
+        """Block until a frame newer than last_frame_id is published
+
+        Returns (frame_id, memoryview), or (last_frame_id, None) on timeout
+        or after close().
+        """
+        with self.condition:
+            self.condition.wait_for(
+                lambda: self.frame_id != last_frame_id or not self.running,
+                timeout=timeout
+            )
+            if self.frame_id == last_frame_id or not self.running:
+                return last_frame_id, None
+            return self.frame_id, self.latest
+
+    def subscribe(self, timeout=1.0):
+        subscription = FrameSubscription(self, timeout)
+        with self.condition:
+            self.subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.condition:
+            self.subscribers.discard(subscription)
+            self.total_skipped += subscription.skipped
+
+    def close(self):
+        """Stop broadcasting and release every waiting viewer"""
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+
+    def get_stats(self):
+        with self.condition:
+            subscribers = list(self.subscribers)
+            total_skipped = self.total_skipped
+        return {
+            "subscribers": len(subscribers),
+            "frames_published": self.frame_id,
+            "frames_skipped": total_skipped + sum(s.skipped for s in subscribers)
+        }
+
+
+class VideoPipeline:
+    """Threaded capture -> detection -> JPEG encoding pipeline
+
+    Each stage runs in its own thread and hands work to the next one over
+    a small bounded queue. When a downstream stage falls behind the oldest
+    queued frame is dropped, so capture never blocks and viewers always
+    get the newest analyzed frame.
+    """
+
+    def __init__(self, camera, process_frame, queue_size=2, jpeg_quality=80):
+        self.camera = camera
+        self.process_frame = process_frame
+        self.jpeg_params = [int(cv2.IMWRITE_JPEG_QUALITY), jpeg_quality]
+        self.detect_queue = queue.Queue(maxsize=queue_size)
+        self.encode_queue = queue.Queue(maxsize=queue_size)
+        self.stats = {
+            "capture": StageStats("capture"),
+            "detect": StageStats("detect"),
+            "encode": StageStats("encode")
+        }
+        self.running = False
+        self.threads = []
+        self.broadcaster = FrameBroadcaster()
+        self.frames_encoded = 0
+        self.latest_result = None
+        self.started_at = None
+
+    def start(self):
+        """Start the capture, detection and encoding threads"""
+        if self.running:
+            return
+        self.running = True
+        self.started_at = time.time()
+        self.threads = [
+            threading.Thread(target=self._capture_loop, name="video-capture", daemon=True),
+            threading.Thread(target=self._detect_loop, name="video-detect", daemon=True),
+            threading.Thread(target=self._encode_loop, name="video-encode", daemon=True)
+        ]
+        for thread in self.threads:
+            thread.start()
+
+    def stop(self, timeout=2.0):
+        """Stop all stages and wake up any waiting viewers"""
+        self.running = False
+        self.broadcaster.close()
+        for thread in self.threads:
+            if thread is not threading.current_thread():
+                thread.join(timeout)
+        self.threads = []
+
+    def _capture_loop(self):
+        stats = self.stats["capture"]
+        while self.running:
+            start = time.perf_counter()
+            success, frame = self.camera.read()
+            if not success or frame is None:
+                logger.error("camera_read_failed")
+                self.running = False
+                break
+            elapsed = time.perf_counter() - start
+            stats.record(elapsed)
+            FRAME_STAGE_SECONDS.observe(elapsed, "read")
+            put_latest(self.detect_queue, frame, stats)
+        self.broadcaster.close()
+
+    def _detect_loop(self):
+        stats = self.stats["detect"]
+        while self.running:
+            try:
+                frame = self.detect_queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            start = time.perf_counter()
+            try:
+                frame, result = self.process_frame(frame)
+            except Exception as e:
+                logger.error("frame_processing_failed", error=str(e))
+                continue
+            stats.record(time.perf_counter() - start)
+            if result is not None:
+                self.latest_result = result
+            put_latest(self.encode_queue, frame, stats)
+
+    def _encode_loop(self):
+        stats = self.stats["encode"]
+        while self.running:
+            try:
+                frame = self.encode_queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            start = time.perf_counter()
+            ret, buffer = cv2.imencode('.jpg', frame, self.jpeg_params)
+            if not ret:
+                logger.error("frame_encoding_failed")
+                stats.record_drop()
+                continue
+            self.broadcaster.publish(buffer)
+            self.frames_encoded += 1
+            elapsed = time.perf_counter() - start
+            stats.record(elapsed)
+            FRAME_STAGE_SECONDS.observe(elapsed, "encode")
+
+    def subscribe(self):
+        """Subscribe a viewer to the encoded MJPEG frames"""
+        return self.broadcaster.subscribe()
+
+    def get_latest_result(self):
+        """Return the analysis result of the newest processed frame"""
+        return self.latest_result
+
+    def get_stats(self):
+        """Per-stage latency and drop counters plus the output frame rate"""
+        elapsed = time.time() - self.started_at if self.started_at else 0.0
+        return {
+            "running": self.running,
+            "frames_encoded": self.frames_encoded,
+            "output_fps": self.frames_encoded / elapsed if elapsed > 0 else 0.0,
+            "stages": {name: stats.snapshot() for name, stats in self.stats.items()},
+            "viewers": self.broadcaster.get_stats()
+        }